@@ -0,0 +1,184 @@
+""" Module for benchmarking the Gsys pipeline end to end on synthetic logs """
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import gsys_pipeline
+import gsyslyzer_cli
+import log_generator
+from group_parser import EventGroupParser
+
+DEFAULT_SIZES_MB = [10, 100, 1000]
+DEFAULT_LOG_DIR = "benchmark_logs"
+COUNT_CHUNK_SIZE_BYTES = 1 << 20
+
+def get_benchmark_log(log_dir, size_mb, seed):
+    """ Returns the path to a generated log of the size, generating it
+        only if an earlier benchmark has not already. """
+
+    os.makedirs(log_dir, exist_ok=True)
+    path_to_log = os.path.join(log_dir, "gsys_bench_{0}mb_seed{1}.log".format(size_mb, seed))
+
+    if not os.path.exists(path_to_log):
+        temp_log_path = path_to_log + ".tmp"
+        log_generator.LogGenerator(int(size_mb * (1 << 20)), seed=seed).write_log(temp_log_path)
+        os.replace(temp_log_path, path_to_log)
+
+    return path_to_log
+
+def count_log_lines(path_to_log):
+    line_count = 0
+
+    with open(path_to_log, "rb") as raw_log:
+        chunk = raw_log.read(COUNT_CHUNK_SIZE_BYTES)
+        while chunk:
+            line_count += chunk.count(b"\n")
+            chunk = raw_log.read(COUNT_CHUNK_SIZE_BYTES)
+
+    return line_count
+
+def get_peak_rss_mb():
+    """ Returns the peak resident set size of this process or any of its
+        finished worker processes, in megabytes. """
+
+    peak_rss_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                      resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+    # Linux reports kilobytes and macOS reports bytes
+    if sys.platform == "darwin":
+        return peak_rss_kb / (1 << 20)
+    return peak_rss_kb / 1024
+
+def run_benchmark_case(cli_args):
+    """ Runs the Gsys pipeline over one log with the CLI flags given and
+        returns the wall time of each stage and the peak RSS. This runs
+        in a fresh process for each case so peak RSS is not shared. """
+
+    flags = gsyslyzer_cli.build_argument_parser().parse_args(cli_args)
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        sifter = gsys_pipeline.build_gsys_sifter_builder().build_sifter(flags)
+
+    stage_seconds = {}
+
+    start_time = time.perf_counter()
+    log_events = sifter.parse_log_files()
+    stage_seconds["parse"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    event_groups = sifter.parse_log_events(log_events)
+    stage_seconds["group"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    group_parser = EventGroupParser(event_groups, sifter.criterias, flags.collect_statistics,
+                                    sifter.get_burst_max_gap())
+    group_parser.parse_event_groups()
+    stage_seconds["signal"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sifter.output_to_terminal(group_parser)
+    stage_seconds["output"] = time.perf_counter() - start_time
+
+    return {
+        "events": len(log_events),
+        "event_groups": len(event_groups),
+        "symptoms": len(group_parser.symptoms_found),
+        "stage_seconds": stage_seconds,
+        "peak_rss_mb": get_peak_rss_mb()
+    }
+
+class Benchmark:
+    """ Benchmarks the Gsys pipeline on generated logs of each size,
+        reporting throughput, the wall time of each stage and peak RSS
+        so that each optimization can be measured.
+
+        Attributes
+        ----------
+        sizes_mb: list of log sizes in megabytes to benchmark
+        log_dir: string path to the directory of generated logs
+        seed: int seed the logs are generated from
+        cli_args: list of extra CLI flags to run the pipeline with
+        results: list of dicts of the measurements for each size """
+
+    def __init__(self, sizes_mb=None, log_dir=DEFAULT_LOG_DIR, seed=0, cli_args=None):
+        self.sizes_mb = sizes_mb if sizes_mb is not None else DEFAULT_SIZES_MB
+        self.log_dir = log_dir
+        self.seed = seed
+        self.cli_args = cli_args or []
+        self.results = []
+
+    def run(self):
+        self.results = []
+
+        for size_mb in self.sizes_mb:
+            path_to_log = get_benchmark_log(self.log_dir, size_mb, self.seed)
+            line_count = count_log_lines(path_to_log)
+
+            case_result = self.run_case_process(["--log_file_path", path_to_log] + self.cli_args)
+            total_seconds = sum(case_result["stage_seconds"].values())
+
+            case_result.update({
+                "size_mb": size_mb,
+                "lines": line_count,
+                "total_seconds": total_seconds,
+                "lines_per_second": line_count / total_seconds if total_seconds > 0 else 0
+            })
+            self.results.append(case_result)
+
+    def run_case_process(self, cli_args):
+        """ Runs a single case in a child process and returns its result. """
+
+        case_process = subprocess.run([sys.executable, os.path.abspath(__file__), "--run_case",
+                                       json.dumps(cli_args)],
+                                      stdout=subprocess.PIPE, check=True,
+                                      cwd=os.path.dirname(os.path.abspath(__file__)))
+        return json.loads(case_process.stdout)
+
+    def write_report(self):
+        print("{0:>8} {1:>10} {2:>12} {3:>8} {4:>8} {5:>8} {6:>8} {7:>8} {8:>10}".format(
+            "Size MB", "Lines", "Lines/sec", "Parse", "Group", "Signal", "Output", "Total",
+            "Peak RSS"))
+
+        for result in self.results:
+            stage_seconds = result["stage_seconds"]
+            print("{0:>8} {1:>10} {2:>12.0f} {3:>7.2f}s {4:>7.2f}s {5:>7.2f}s {6:>7.2f}s "
+                  "{7:>7.2f}s {8:>7.1f} MB".format(
+                      result["size_mb"], result["lines"], result["lines_per_second"],
+                      stage_seconds["parse"], stage_seconds["group"], stage_seconds["signal"],
+                      stage_seconds["output"], result["total_seconds"], result["peak_rss_mb"]))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gsys pipeline benchmark")
+    parser.add_argument("--sizes_mb", default=DEFAULT_SIZES_MB, nargs="+",
+                        type=float, help=("Sizes of the logs to benchmark in megabytes"))
+    parser.add_argument("--log_dir", default=DEFAULT_LOG_DIR,
+                        help=("Directory the generated logs are kept in"))
+    parser.add_argument("--seed", default=0,
+                        type=int, help=("Seed the logs are generated from"))
+    parser.add_argument("--json_output", default=None,
+                        help=("File to also write the results to as JSON"))
+    parser.add_argument("--run_case", default=None,
+                        help=argparse.SUPPRESS)
+    flags, cli_args = parser.parse_known_args()
+
+    if flags.run_case is not None:
+        # Child process running a single case
+        print(json.dumps(run_benchmark_case(json.loads(flags.run_case))))
+        sys.exit(0)
+
+    benchmark = Benchmark([int(size) if size == int(size) else size for size in flags.sizes_mb],
+                          flags.log_dir, flags.seed, cli_args)
+    benchmark.run()
+    benchmark.write_report()
+
+    if flags.json_output is not None:
+        with open(flags.json_output, "w") as outfile:
+            json.dump(benchmark.results, outfile, indent=4)
@@ -0,0 +1,131 @@
+""" Module for detecting and streaming compressed Gsys logs """
+
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import threading
+
+# Leading bytes that identify each supported compression format
+COMPRESSION_MAGIC_BYTES = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd")
+]
+
+BATCH_SIZE_BYTES = 1 << 20
+MAX_PENDING_BATCHES = 8
+
+def detect_compression(path_to_log):
+    """ Returns the name of the compression format of the log file based
+        on its magic bytes, or None if the log is not compressed. """
+
+    try:
+        with open(path_to_log, "rb") as raw_log:
+            leading_bytes = raw_log.read(8)
+    except OSError:
+        return None
+
+    for magic_bytes, compression in COMPRESSION_MAGIC_BYTES:
+        if leading_bytes.startswith(magic_bytes):
+            return compression
+
+    return None
+
+def open_compressed_log(path_to_log, compression):
+    """ Opens a compressed log as a binary stream that decompresses the
+        log incrementally while it is read. """
+
+    if compression == "gzip":
+        return gzip.open(path_to_log, "rb")
+    elif compression == "bz2":
+        return bz2.open(path_to_log, "rb")
+    elif compression == "xz":
+        return lzma.open(path_to_log, "rb")
+    elif compression == "zstd":
+        return open_zstd_log(path_to_log)
+
+    raise Exception("Unsupported log compression: {0}".format(compression))
+
+def open_zstd_log(path_to_log):
+    """ Opens a zstd compressed log with the optional zstandard package,
+        or the standard library module on Python versions that have it. """
+
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+
+    if zstandard is not None:
+        raw_log = open(path_to_log, "rb")
+        decompressor = zstandard.ZstdDecompressor()
+        return io.BufferedReader(decompressor.stream_reader(raw_log, closefd=True))
+
+    try:
+        from compression import zstd
+    except ImportError:
+        raise Exception("Reading zstd compressed logs requires the zstandard package.")
+
+    return zstd.open(path_to_log, "rb")
+
+class ThreadedLineReader:
+    """ Iterable over the lines of a compressed log. A background thread
+        decompresses and decodes the log in batches of lines, so that
+        decompression overlaps with the parsing of earlier batches.
+
+        Attributes
+        ----------
+        text_log: text stream over the decompressed log
+        batch_queue: bounded queue of line batches waiting to be parsed
+        stop_event: event set when the reader is closed early
+        reader_thread: background thread filling the batch queue """
+
+    def __init__(self, binary_log):
+        self.text_log = io.TextIOWrapper(binary_log)
+        self.batch_queue = queue.Queue(maxsize=MAX_PENDING_BATCHES)
+        self.stop_event = threading.Event()
+
+        self.reader_thread = threading.Thread(target=self.read_batches, daemon=True)
+        self.reader_thread.start()
+
+    def read_batches(self):
+        try:
+            while not self.stop_event.is_set():
+                batch = self.text_log.readlines(BATCH_SIZE_BYTES)
+                if not batch:
+                    break
+
+                self.put_batch(batch)
+        except Exception as error:
+            self.put_batch(error)
+        finally:
+            self.put_batch(None)
+
+    def put_batch(self, batch):
+        """ Blocks until the batch fits in the queue or the reader is
+            closed. """
+
+        while not self.stop_event.is_set():
+            try:
+                self.batch_queue.put(batch, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        while True:
+            batch = self.batch_queue.get()
+
+            if batch is None:
+                return
+            if isinstance(batch, Exception):
+                raise batch
+
+            yield from batch
+
+    def close(self):
+        self.stop_event.set()
+        self.reader_thread.join()
+        self.text_log.close()
@@ -15,12 +15,12 @@ class MessageType(enum.IntEnum):
     FAILURE = 3
     
     @staticmethod
-    def from_log_prefix(self, string_message):
+    def from_log_prefix(string_message):
         mapping = {
-            "I": INFO,
-            "W": WARNING,
-            "E": ERROR,
-            "F": FAILURE
+            "I": MessageType.INFO,
+            "W": MessageType.WARNING,
+            "E": MessageType.ERROR,
+            "F": MessageType.FAILURE
         }
 
         if string_message in mapping:
@@ -28,6 +28,9 @@ class MessageType(enum.IntEnum):
 
         return None
 
+    def to_log_prefix(self):
+        return "IWEF"[self]
+
 class RegularExpressions(enum.Enum):
     """ Define constant regular expressions """
     MESSAGE_TYPE_REGEX = r"(?P<message_type>[IWEF]{1})"
@@ -0,0 +1,53 @@
+""" Module for building pipelines out of generator based coroutines,
+    where each stage is sent items and sends its results on to a target
+    coroutine. """
+
+import functools
+
+def coroutine(generator_function):
+    """ Decorator priming a generator based coroutine so it is ready to
+        be sent items as soon as it is built. """
+
+    @functools.wraps(generator_function)
+    def start_coroutine(*args, **kwargs):
+        generator = generator_function(*args, **kwargs)
+        next(generator)
+        return generator
+
+    return start_coroutine
+
+@coroutine
+def collect(output):
+    """ Coroutine appending every item sent to it to the output list. """
+
+    while True:
+        output.append((yield))
+
+@coroutine
+def broadcast(targets):
+    """ Coroutine sending every item sent to it on to each target, and
+        closing every target when it is closed. """
+
+    try:
+        while True:
+            item = yield
+            for target in targets:
+                target.send(item)
+    finally:
+        for target in targets:
+            target.close()
+
+def run_pipeline(build_pipeline, items):
+    """ Sends each item through the pipeline build_pipeline makes around
+        a target collecting what the pipeline sends on, then closes the
+        pipeline so any stage holding back items flushes them, and
+        returns what was collected. """
+
+    output = []
+    pipeline = build_pipeline(collect(output))
+
+    for item in items:
+        pipeline.send(item)
+    pipeline.close()
+
+    return output
@@ -1,6 +1,10 @@
 """ Module for defining criteria to be used to evaluate event groups. """
 
+import numpy as np
+
 import constants
+import coroutines
+import signals
 import symptom
 import signal_statistics
 
@@ -25,20 +29,29 @@ class Criteria:
         self.evaluator = evaluator
         self.action_msg = action_msg
 
-    def apply_criteria(self, event_groups, collect_statistics):
+    def apply_criteria(self, event_groups, collect_statistics, signal_plan=None):
         """ Detects signals and applies an evaluator to them. Those
             that are confirmed are then built into symptom instances.
             If the collect_statistics flag is marked, then the 
-            SignalStatistics module is used to collect statistics. """
+            SignalStatistics module is used to collect statistics.
+            event_groups is a list of groups or an EventGroupIndex.
+            Signals are detected through the signal_plan when one is
+            given, so criteria sharing a signal only detect it once. """
+
+        signal_arrays = self.detect_signal_arrays(event_groups, signal_plan)
+        if signal_arrays is not None:
+            return self.apply_criteria_to_arrays(signal_arrays, collect_statistics)
 
-        detected_signals = self.signal.detect_signals(event_groups)
+        if signal_plan is not None:
+            detected_signals = signal_plan.detect_signals(self.signal)
+        else:
+            detected_signals = self.signal.detect_signals(event_groups)
         confirmed_signals = self.evaluator.evaluate_signals(detected_signals)
 
         symptoms = self.build_symptoms(confirmed_signals)
         output_dict = {
             "symptoms": symptoms,
-            "detected_signals": detected_signals,
-            "confirmed_signals": confirmed_signals.keys()
+            "signal_marks": signals.mark_signals(detected_signals, confirmed_signals)
         }
 
         if collect_statistics and len(detected_signals) > 0:
@@ -50,6 +63,64 @@ class Criteria:
 
         return output_dict
 
+    def detect_signal_arrays(self, event_groups, signal_plan=None):
+        """ Returns the SignalArrays of the signal, or None if the signal
+            can only detect DetectedSignals. """
+
+        if not hasattr(self.signal, "detect_signal_arrays"):
+            return None
+
+        if signal_plan is not None:
+            return signal_plan.detect_signal_arrays(self.signal)
+        return self.signal.detect_signal_arrays(event_groups)
+
+    def apply_criteria_to_arrays(self, signal_arrays, collect_statistics):
+        """ Applies the evaluator to every interval of the SignalArrays
+            at once, building a DetectedSignal and symptom only for those that are
+            confirmed. """
+
+        signal_marks = self.evaluator.evaluate_intervals_us(signal_arrays.intervals_us)
+
+        confirmed_signals = [signal_arrays.build_signal(index)
+                             for index in np.flatnonzero(signal_marks).tolist()]
+        output_dict = {
+            "symptoms": self.build_symptoms(confirmed_signals),
+            "signal_marks": signals.SignalMarks(signal_marks,
+                                                signal_arrays.start_timestamps_us,
+                                                signal_arrays.end_timestamps_us)
+        }
+
+        if collect_statistics and len(signal_arrays) > 0:
+            statistics_collector = signal_statistics.SignalStatistics()
+            stat_summary = statistics_collector.collect_signal_array_stats(signal_arrays)
+            output_dict["statistics"] = stat_summary
+        else:
+            output_dict["statistics"] = None
+
+        return output_dict
+
+    @coroutines.coroutine
+    def signal_evaluator(self, target, signal_accumulator=None):
+        """ Coroutine receiving detected signals in order and sending
+            target the Symptom built from each the evaluator confirms,
+            or None for each that it does not. Every detected signal is
+            also added to the SignalAccumulator when one is given. """
+
+        try:
+            while True:
+                detected_signal = yield
+
+                if signal_accumulator is not None:
+                    signal_accumulator.add_signal(detected_signal)
+
+                if self.evaluator.evaluate_value(detected_signal.interval):
+                    target.send(symptom.Symptom(self.symptom_tag, self.action_msg,
+                                                detected_signal))
+                else:
+                    target.send(None)
+        finally:
+            target.close()
+
     def build_symptoms(self, signals):
         """ Creates a symptom instance for each of the confirmed
             signals given. """
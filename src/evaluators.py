@@ -1,6 +1,19 @@
 """ Module for defining the different types of evalulators that can be
     applied to a list of signals. """
 
+import datetime
+
+import numpy as np
+
+AND_OPERATOR = "and"
+OR_OPERATOR = "or"
+
+def get_microseconds(interval):
+    """ Converts a timedelta threshold to a whole number of microseconds
+        to compare against arrays of intervals in microseconds. """
+
+    return interval // datetime.timedelta(microseconds=1)
+
 class Evaluator:
     """ Parent Evaluator that filters signals """
     def __init__(self, threshold):
@@ -9,6 +22,15 @@ class Evaluator:
     def evaluate_value(self, value):
         return None
 
+    def evaluate_intervals_us(self, intervals_us):
+        """ Returns a boolean array marking which of an array of
+            intervals in microseconds are confirmed. Evaluators that
+            cannot compare arrays evaluate each interval in turn. """
+
+        return np.fromiter((bool(self.evaluate_value(datetime.timedelta(microseconds=interval_us)))
+                            for interval_us in intervals_us.tolist()),
+                           bool, len(intervals_us))
+
     def evaluate_signals(self, detected_signals):
         confirmed_signals = {}
 
@@ -28,6 +50,9 @@ class GreaterThanEvaluator(Evaluator):
         result = value > self.threshold
         return result
 
+    def evaluate_intervals_us(self, intervals_us):
+        return intervals_us > get_microseconds(self.threshold)
+
 class GreaterThanEqualEvaluator(Evaluator):
     """ Evaluator for checking when values meet or exceed the threshold """
     def __init__(self, threshold):
@@ -37,6 +62,9 @@ class GreaterThanEqualEvaluator(Evaluator):
         result = value >= self.threshold
         return result
 
+    def evaluate_intervals_us(self, intervals_us):
+        return intervals_us >= get_microseconds(self.threshold)
+
 class LessThanEvaluator(Evaluator):
     """ Evaluator for checking when values drop below the threshold """
     def __init__(self, threshold):
@@ -46,6 +74,9 @@ class LessThanEvaluator(Evaluator):
         result = value < self.threshold
         return result
 
+    def evaluate_intervals_us(self, intervals_us):
+        return intervals_us < get_microseconds(self.threshold)
+
 class LessThanEqualEvaluator(Evaluator):
     """ evaluator for checking when values to or below the threshold """
     def __init__(self, threshold):
@@ -55,6 +86,9 @@ class LessThanEqualEvaluator(Evaluator):
         result = value <= self.threshold
         return result
 
+    def evaluate_intervals_us(self, intervals_us):
+        return intervals_us <= get_microseconds(self.threshold)
+
 class ExistenceEvaluator(Evaluator):
     """ Trivial evalutor to mark the existence of signals """
     def __init__(self):
@@ -63,5 +97,61 @@ class ExistenceEvaluator(Evaluator):
     def evaluate_value(self, value):
         return True
 
+    def evaluate_intervals_us(self, intervals_us):
+        return np.ones(len(intervals_us), dtype=bool)
+
+class RangeEvaluator(Evaluator):
+    """ Evaluator for checking when values fall within a range, bounds
+        included. Either bound may be None to leave that side open. """
+    def __init__(self, min_threshold=None, max_threshold=None):
+        if min_threshold is None and max_threshold is None:
+            raise Exception("Range evaluator needs a min or max threshold.")
+
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+
+    def evaluate_value(self, value):
+        if self.min_threshold is not None and value < self.min_threshold:
+            return False
+        if self.max_threshold is not None and value > self.max_threshold:
+            return False
+        return True
+
+    def evaluate_intervals_us(self, intervals_us):
+        result = np.ones(len(intervals_us), dtype=bool)
+
+        if self.min_threshold is not None:
+            result &= intervals_us >= get_microseconds(self.min_threshold)
+        if self.max_threshold is not None:
+            result &= intervals_us <= get_microseconds(self.max_threshold)
+
+        return result
+
+class CompoundEvaluator(Evaluator):
+    """ Evaluator combining other evaluators, confirming values that all
+        of them confirm with the "and" operator, or that any of them
+        confirms with the "or" operator """
+    def __init__(self, evaluators, operator=AND_OPERATOR):
+        if operator not in [AND_OPERATOR, OR_OPERATOR]:
+            raise Exception("Compound evaluator operator must be "
+                            "\"{0}\" or \"{1}\".".format(AND_OPERATOR, OR_OPERATOR))
+        if len(evaluators) == 0:
+            raise Exception("Compound evaluator needs at least one evaluator.")
+
+        self.evaluators = evaluators
+        self.operator = operator
+
+    def evaluate_value(self, value):
+        results = (evaluator.evaluate_value(value) for evaluator in self.evaluators)
+
+        if self.operator == AND_OPERATOR:
+            return all(results)
+        return any(results)
 
+    def evaluate_intervals_us(self, intervals_us):
+        results = [evaluator.evaluate_intervals_us(intervals_us)
+                   for evaluator in self.evaluators]
 
+        if self.operator == AND_OPERATOR:
+            return np.logical_and.reduce(results)
+        return np.logical_or.reduce(results)
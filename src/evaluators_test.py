@@ -0,0 +1,65 @@
+""" Module for testing the evaluators """
+
+import datetime
+import unittest
+
+import numpy as np
+
+import evaluators
+
+class EvaluatorsTest(unittest.TestCase):
+    """ Test suite for the evaluators """
+    def setUp(self):
+        super(EvaluatorsTest, self).setUp()
+
+        self.intervals_us = np.array([0, 999999, 1000000, 1000001, 5000000, 9000000],
+                                     dtype=np.int64)
+        self.one_second = datetime.timedelta(seconds=1)
+        self.five_seconds = datetime.timedelta(seconds=5)
+
+    def assert_batch_matches_values(self, evaluator):
+        expected_marks = [bool(evaluator.evaluate_value(datetime.timedelta(microseconds=interval_us)))
+                          for interval_us in self.intervals_us.tolist()]
+        self.assertEqual(evaluator.evaluate_intervals_us(self.intervals_us).tolist(),
+                         expected_marks)
+        return expected_marks
+
+    def test_threshold_evaluators(self):
+        for evaluator_type in [evaluators.GreaterThanEvaluator,
+                               evaluators.GreaterThanEqualEvaluator,
+                               evaluators.LessThanEvaluator,
+                               evaluators.LessThanEqualEvaluator]:
+            self.assert_batch_matches_values(evaluator_type(self.one_second))
+
+        self.assert_batch_matches_values(evaluators.ExistenceEvaluator())
+
+    def test_range_evaluator(self):
+        marks = self.assert_batch_matches_values(
+            evaluators.RangeEvaluator(self.one_second, self.five_seconds))
+        self.assertEqual(marks, [False, False, True, True, True, False])
+
+        marks = self.assert_batch_matches_values(
+            evaluators.RangeEvaluator(max_threshold=self.one_second))
+        self.assertEqual(marks, [True, True, True, False, False, False])
+
+    def test_compound_evaluator(self):
+        outside_range = evaluators.CompoundEvaluator(
+            [evaluators.LessThanEvaluator(self.one_second),
+             evaluators.GreaterThanEvaluator(self.five_seconds)],
+            evaluators.OR_OPERATOR)
+        marks = self.assert_batch_matches_values(outside_range)
+        self.assertEqual(marks, [True, True, False, False, False, True])
+
+        inside_range = evaluators.CompoundEvaluator(
+            [evaluators.GreaterThanEqualEvaluator(self.one_second),
+             evaluators.LessThanEqualEvaluator(self.five_seconds)])
+        marks = self.assert_batch_matches_values(inside_range)
+        self.assertEqual(marks, [False, False, True, True, True, False])
+
+    def test_unknown_compound_operator(self):
+        with self.assertRaises(Exception):
+            evaluators.CompoundEvaluator([evaluators.ExistenceEvaluator()], "xor")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+""" Module for indexing event groups by tag """
+
+import heapq
+
+class EventGroupIndex:
+    """ Chronological list of event groups indexed by group tag, so a
+        signal only walks the groups it detects signals in. Iterating
+        the index walks every group, as iterating the list would.
+
+        Attributes
+        ----------
+        event_groups: chronological list of LogEventGroup objects
+        tag_groups: dict of chronological lists of groups with the group
+                    tag as key
+        tag_positions: dict of lists of the position of each group in
+                       event_groups with the group tag as key """
+
+    def __init__(self, event_groups):
+        self.event_groups = event_groups
+        self.tag_groups = {}
+        self.tag_positions = {}
+
+        for position, group in enumerate(event_groups):
+            tag = group.tag
+
+            if tag not in self.tag_groups:
+                self.tag_groups[tag] = [group]
+                self.tag_positions[tag] = [position]
+            else:
+                self.tag_groups[tag].append(group)
+                self.tag_positions[tag].append(position)
+
+    def __len__(self):
+        return len(self.event_groups)
+
+    def __iter__(self):
+        return iter(self.event_groups)
+
+    def get_groups(self, group_tags):
+        """ Returns the groups with any of the given tags, in the order
+            they are in event_groups. """
+
+        group_tags = list(dict.fromkeys(group_tags))
+
+        if len(group_tags) == 1:
+            return self.tag_groups.get(group_tags[0], [])
+
+        positions = heapq.merge(*[self.tag_positions.get(tag, []) for tag in group_tags])
+        return [self.event_groups[position] for position in positions]
+
+def select_groups(event_groups, group_tags):
+    """ Returns the groups with any of the given tags from an
+        EventGroupIndex. A plain list of groups is returned whole, for
+        the signal to filter as it walks it. """
+
+    if isinstance(event_groups, EventGroupIndex):
+        return event_groups.get_groups(group_tags)
+    return event_groups
@@ -10,11 +10,33 @@ class EventGroupRule:
         trigger_event_tags: list of tags associated to LogEvents
                             and that define the event group
         context_event_tags: list of tags associated to LogEvents
-                            and that supply context to event group """
+                            and that supply context to event group
+        max_completion_window: timedelta a partial group may wait for its
+                               remaining trigger events after its first,
+                               or None to wait indefinitely
+        max_pending_groups: int number of partial groups that may wait
+                            at once, the oldest being evicted to make
+                            room, or None for no limit
+        context_max_age: timedelta before the first trigger event that
+                         context events are kept for, or None to keep
+                         every context event since the last group
+        context_max_count: int number of the most recent context events
+                           kept for the next group, or None for no limit """
+
+    def __init__(self, tag, trigger_event_tags, context_event_tags=None,
+                 max_completion_window=None, max_pending_groups=None,
+                 context_max_age=None, context_max_count=None):
+        if max_pending_groups is not None and max_pending_groups < 1:
+            raise Exception("Max pending groups must be at least 1.")
+        if context_max_count is not None and context_max_count < 0:
+            raise Exception("Context max count must not be negative.")
 
-    def __init__(self, tag, trigger_event_tags, context_event_tags=None):
         self.trigger_event_tags = trigger_event_tags
         self.context_event_tags = context_event_tags
+        self.max_completion_window = max_completion_window
+        self.max_pending_groups = max_pending_groups
+        self.context_max_age = context_max_age
+        self.context_max_count = context_max_count
 
         if self.context_event_tags is None:
             self.context_event_tags = []
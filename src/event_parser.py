@@ -1,6 +1,13 @@
 """ Module for parsing Log Events into Event Groups """
 
+import collections
+import datetime
+
 import log_event_group
+import log_event_table
+
+TRIGGER_ROLE = "trigger"
+CONTEXT_ROLE = "context"
 
 class LogEventParser:
     """ Parser for applying group rules against a list of events to
@@ -8,13 +15,36 @@ class LogEventParser:
         
         Attributes
         ----------
-        log_events: list of LogEvent objects to be parsed
+        log_events: LogEventTable or list of LogEvent objects to be parsed
         event_group_rules: list of EventGroupRule objects to be applied
                            for event grouping
         event_groups_found: chronological list list of detected 
                             LogEventGroup objects
         event_groups_found_dict: dictionary of LogEventGroups where
-                                 key is the group tag """
+                                 key is the group tag
+        search_dicts: search dictionary of partial groups for each rule,
+                      kept between calls to parse_new_log_events
+        ordered_trigger_tags: list of the trigger tags of each rule
+        completion_windows_us: list of each rule's max_completion_window
+                               in microseconds, or None
+        context_max_ages_us: list of each rule's context_max_age in
+                             microseconds, or None
+        expired_group_counts: list of the number of partial groups of
+                              each rule dropped for outliving the rule's
+                              max_completion_window
+        overflowed_group_counts: list of the number of partial groups of
+                                 each rule dropped to stay within the
+                                 rule's max_pending_groups
+        context_event_buffers: ring buffers of context events for each rule
+                               that are waiting for the rule's first
+                               trigger, holding at most the rule's
+                               context_max_count most recent events
+        tag_dispatch: dict of lists of (rule index, role, trigger position)
+                      entries with event tag as key, naming each rule that
+                      references the tag and whether as a trigger or as
+                      context
+        rule_groups_found: list of the groups each rule has completed in
+                           the current call to parse_new_log_events """
 
     def __init__(self, log_events, event_group_rules):
         self.log_events = log_events
@@ -23,114 +53,287 @@ class LogEventParser:
         self.event_groups_found = []
         self.event_groups_found_dict = {}
 
+        self.search_dicts = [self.get_event_search_dict(rule)
+                             for rule in event_group_rules]
+        # A repeated trigger tag only counts at its first position, as
+        # the search dict and tag dispatch hold each tag once
+        self.ordered_trigger_tags = [list(search_dict) for search_dict in self.search_dicts]
+        self.completion_windows_us = [get_window_us(rule.max_completion_window)
+                                      for rule in event_group_rules]
+        self.context_max_ages_us = [get_window_us(rule.context_max_age)
+                                    for rule in event_group_rules]
+        self.expired_group_counts = [0 for rule in event_group_rules]
+        self.overflowed_group_counts = [0 for rule in event_group_rules]
+        self.context_event_buffers = [collections.deque(maxlen=rule.context_max_count)
+                                      for rule in event_group_rules]
+        self.tag_dispatch = self.build_tag_dispatch()
+        self.rule_groups_found = [[] for rule in event_group_rules]
+
+    def build_tag_dispatch(self):
+        """ Maps each event tag to the rules that reference it. A tag that
+            is both a trigger and context for a rule is only a trigger. """
+
+        tag_dispatch = {}
+
+        for rule_index, rule in enumerate(self.event_group_rules):
+            search_dict = self.search_dicts[rule_index]
+
+            for position, tag in enumerate(search_dict):
+                tag_dispatch.setdefault(tag, []).append((rule_index, TRIGGER_ROLE, position))
+
+            context_tags = set()
+            for tag in rule.context_event_tags:
+                if tag not in search_dict and tag not in context_tags:
+                    context_tags.add(tag)
+                    tag_dispatch.setdefault(tag, []).append((rule_index, CONTEXT_ROLE, None))
+
+        return tag_dispatch
+
     def get_event_search_dict(self, event_group_rule):
         """ Initializes a search dictionary for tracking whether a group 
         has attained all required events, a partial gorup will sit
-        in a queue with key of the next event it needs
+        in a queue with key of the next event it needs, alongside the
+        time it expires at
 
         ex: Group requires C, A, and T
             Two partial groups exist; one with C and A, one with just C
             search_dict: {
-                "C": []
-                "A": [[C]] # needs an A next
-                "T": [[C, A]] # needs a T next
+                "C": deque()
+                "A": deque([(expiry, [C])]) # needs an A next
+                "T": deque([(expiry, [C, A])]) # needs a T next
             } 
             
         Uses queues to ensure first occurences of events are grouped
-        together """
+        together. Partial groups only move from one queue to the next
+        in order, so a queue further along always holds older groups
+        and the front of each queue is the oldest group in it. Expiry
+        times are in epoch microseconds. """
 
-        search_dict = {tag: [] for tag in event_group_rule.trigger_event_tags}
+        search_dict = {tag: collections.deque() for tag in event_group_rule.trigger_event_tags}
         return search_dict
 
-    def update_search_dict(self, group_tag, search_dict, event, context_event_buffer):
-        """ Moves partial groups from stage to stage in the search dict,
-        or stores them as valid if they complete """
-        
-        ordered_tags = list(search_dict.keys())
-        event_tag = event.tag
-        tag_index = ordered_tags.index(event_tag)
-        next_tag_index = tag_index + 1
+    def update_search_dict(self, rule_index, position, event):
+        """ Moves partial groups of a rule from stage to stage in its search
+        dict, or stores them as valid if they complete. position is the
+        index of the event's tag in the rule's trigger tags. """
+
+        event_group_rule = self.event_group_rules[rule_index]
+        search_dict = self.search_dicts[rule_index]
+        groups_found = self.rule_groups_found[rule_index]
+
+        ordered_tags = self.ordered_trigger_tags[rule_index]
+        next_position = position + 1
 
-        if tag_index == 0 and next_tag_index == len(ordered_tags):
+        completion_window_us = self.completion_windows_us[rule_index]
+        if completion_window_us is not None:
+            self.evict_expired_groups(rule_index, event.timestamp_us)
+
+        if position == 0 and next_position == len(ordered_tags):
             # In the special case that a group only requires one event
             # the current context buffer and first event found are 
             # immediately grouped and stored as a valid group.
-            all_log_events = context_event_buffer + [event]
+            context_log_events = self.take_context_events(rule_index, event)
+            all_log_events = context_log_events + [event]
             
-            event_group = log_event_group.LogEventGroup(tag=group_tag, 
+            event_group = log_event_group.LogEventGroup(tag=event_group_rule.tag, 
                                                         trigger_log_events=[event],
-                                                        context_log_events=context_event_buffer,
+                                                        context_log_events=context_log_events,
                                                         all_log_events=all_log_events)
 
-            self.event_groups_found.append(event_group)
-
-            if group_tag not in self.event_groups_found_dict:
-                self.event_groups_found_dict[group_tag] = [event_group]
-            else:
-                self.event_groups_found_dict[group_tag].append(event_group)
-            
-            context_event_buffer = []
-        elif tag_index == 0:
+            groups_found.append(event_group)
+        elif position == 0:
             # In the case that the first event is found, the
             # context buffer and the event found are grouped into a 
             # partial group and stored in the search dictionary.
-            all_log_events = context_event_buffer + [event]
+            context_log_events = self.take_context_events(rule_index, event)
+            all_log_events = context_log_events + [event]
             
-            event_group = log_event_group.LogEventGroup(tag=group_tag, 
+            event_group = log_event_group.LogEventGroup(tag=event_group_rule.tag, 
                                                         trigger_log_events=[event],
-                                                        context_log_events=context_event_buffer,
+                                                        context_log_events=context_log_events,
                                                         all_log_events=all_log_events)
 
-            context_event_buffer = []
-            
-            next_tag = ordered_tags[next_tag_index]
-            search_dict[next_tag].append(event_group)
-        elif next_tag_index == len(ordered_tags):
+            expiry = None
+            if completion_window_us is not None:
+                expiry = event.timestamp_us + completion_window_us
+
+            if event_group_rule.max_pending_groups is not None:
+                self.evict_overflowed_groups(rule_index, event_group_rule.max_pending_groups - 1)
+
+            search_dict[ordered_tags[next_position]].append((expiry, event_group))
+        elif next_position == len(ordered_tags):
             # In the case that the last event is found, the partial
             # group is removed from the search dictionary and 
             # stored as a valid group.
-            partial_groups_list = search_dict[event_tag]
+            partial_groups_queue = search_dict[ordered_tags[position]]
 
-            if len(partial_groups_list) > 0:
-                event_group = partial_groups_list.pop(0)
+            if partial_groups_queue:
+                _, event_group = partial_groups_queue.popleft()
                 event_group.add_log_event(event)
             
-                self.event_groups_found.append(event_group)
-
-                if group_tag not in self.event_groups_found_dict:
-                    self.event_groups_found_dict[group_tag] = [event_group]
-                else:
-                    self.event_groups_found_dict[group_tag].append(event_group)
+                groups_found.append(event_group)
         else:
             # In the case that it is some other relevant event, the
             # event is added to the partial group at the front of the
             # current queue and then pushed to the next queue.
-            event_group = search_dict[event_tag].pop(0)
-            event_group.add_log_event(event)
-            
-            next_tag = ordered_tags[next_tag_index] 
-            search_dict[next_tag].append(event_group)
+            partial_groups_queue = search_dict[ordered_tags[position]]
+
+            if partial_groups_queue:
+                partial_group = partial_groups_queue.popleft()
+                partial_group[1].add_log_event(event)
+
+                search_dict[ordered_tags[next_position]].append(partial_group)
+
+    def take_context_events(self, rule_index, trigger_event):
+        """ Empties the context buffer of a rule, returning the context
+            events within the rule's context_max_age of the trigger. """
+
+        context_event_buffer = self.context_event_buffers[rule_index]
+        context_max_age_us = self.context_max_ages_us[rule_index]
+
+        if context_max_age_us is not None:
+            self.evict_stale_context_events(rule_index,
+                                            trigger_event.timestamp_us - context_max_age_us)
+
+        context_log_events = list(context_event_buffer)
+        context_event_buffer.clear()
+        return context_log_events
+
+    def evict_stale_context_events(self, rule_index, oldest_timestamp_us):
+        context_event_buffer = self.context_event_buffers[rule_index]
+
+        while context_event_buffer and context_event_buffer[0].timestamp_us < oldest_timestamp_us:
+            context_event_buffer.popleft()
 
-        return context_event_buffer
+    def evict_expired_groups(self, rule_index, timestamp_us):
+        """ Drops the partial groups of a rule that expired before the
+            epoch microsecond timestamp. Only the front of each queue needs checking, as
+            groups wait in each queue in the order they started. """
+
+        for partial_groups_queue in self.search_dicts[rule_index].values():
+            while partial_groups_queue and partial_groups_queue[0][0] < timestamp_us:
+                partial_groups_queue.popleft()
+                self.expired_group_counts[rule_index] += 1
+
+    def evict_overflowed_groups(self, rule_index, max_pending_groups):
+        """ Drops the oldest partial groups of a rule until no more than
+            max_pending_groups remain. The oldest group is at the front
+            of the queue furthest along. """
+
+        partial_groups_queues = list(self.search_dicts[rule_index].values())
+        pending_group_count = sum(len(queue) for queue in partial_groups_queues)
+
+        for partial_groups_queue in reversed(partial_groups_queues):
+            while partial_groups_queue and pending_group_count > max_pending_groups:
+                partial_groups_queue.popleft()
+                pending_group_count -= 1
+                self.overflowed_group_counts[rule_index] += 1
+
+    def get_eviction_report(self):
+        """ Returns a listing of the partial groups each rule dropped
+            without completing, or an empty string if none were. """
+
+        report_lines = []
+
+        for rule_index, rule in enumerate(self.event_group_rules):
+            expired_group_count = self.expired_group_counts[rule_index]
+            overflowed_group_count = self.overflowed_group_counts[rule_index]
+
+            if expired_group_count or overflowed_group_count:
+                report_lines.append(
+                    "Evicted {0} expired and {1} overflowed partial groups of {2}".format(
+                        expired_group_count, overflowed_group_count, rule.tag))
+
+        return "\n".join(report_lines)
 
     def parse_log_events(self):
-        """ Driving method for parsing the log events. Each rule is applied
-        to the full log event set. Context events are grouped in a 
-        buffer until the first trigger event in their group is seen, 
+        """ Driving method for parsing the log events. The events are
+        walked once in chronological order, and each is handed only to
+        the rules that reference its tag. Context events are grouped in
+        a buffer until the first trigger event in their group is seen,
         and then they are grouped with that instance. """
 
-        for rule in self.event_group_rules:
-            search_dict = self.get_event_search_dict(rule)
-            context_tags = rule.context_event_tags
-            context_event_buffer = []
-            group_tag = rule.tag
-
-            for event in self.log_events:
-                tag = event.tag
-                if tag in search_dict:
-                    context_event_buffer = self.update_search_dict(group_tag,
-                                                                   search_dict, event, 
-                                                                   context_event_buffer)
-                elif tag in context_tags:
-                    context_event_buffer.append(event)
+        self.parse_new_log_events(self.log_events)
+
+    def parse_new_log_events(self, new_log_events):
+        """ Applies the rules to events that follow every event parsed so
+        far, continuing from the partial groups and context buffers
+        left by earlier calls. Returns the event groups completed by
+        the new events, ordered by rule and then by completion, as if
+        each rule had been applied to the events in turn. """
+
+        new_event_groups = self.group_new_log_events(new_log_events)
+        self.event_groups_found += new_event_groups
+
+        for rule_index, groups_found in enumerate(self.rule_groups_found):
+            if len(groups_found) == 0:
+                continue
+
+            group_tag = self.event_group_rules[rule_index].tag
+            if group_tag not in self.event_groups_found_dict:
+                self.event_groups_found_dict[group_tag] = list(groups_found)
+            else:
+                self.event_groups_found_dict[group_tag] += groups_found
+
+        return new_event_groups
+
+    def iter_event_groups(self, log_event_batches):
+        """ Yields the event groups completed by each batch of events in
+            turn, ordered as parse_new_log_events orders them. The groups
+            are not kept, so only partial groups and context are held
+            between batches. """
+
+        for new_log_events in log_event_batches:
+            yield from self.group_new_log_events(new_log_events)
+
+    def group_new_log_events(self, new_log_events):
+        """ Walks the new events once in chronological order, handing
+            each only to the rules that reference its tag, and returns
+            the groups they complete in rule order. """
+
+        self.rule_groups_found = [[] for rule in self.event_group_rules]
+
+        tag_dispatch = self.tag_dispatch
+        context_event_buffers = self.context_event_buffers
+        context_max_ages_us = self.context_max_ages_us
+
+        for event in self.iter_relevant_events(new_log_events, tag_dispatch):
+            for rule_index, role, position in tag_dispatch[event.tag]:
+                if role == TRIGGER_ROLE:
+                    self.update_search_dict(rule_index, position, event)
+                else:
+                    context_event_buffers[rule_index].append(event)
+
+                    # Stale context is dropped as it arrives so an
+                    # aged buffer stays small between triggers
+                    context_max_age_us = context_max_ages_us[rule_index]
+                    if context_max_age_us is not None:
+                        self.evict_stale_context_events(rule_index,
+                                                        event.timestamp_us - context_max_age_us)
+
+        new_event_groups = []
+        for groups_found in self.rule_groups_found:
+            new_event_groups += groups_found
+
+        return new_event_groups
+
+    def iter_relevant_events(self, log_events, relevant_tags):
+        """ Yields the chronological events whose tag is in relevant_tags.
+            A LogEventTable is filtered on its tag column, so only the
+            rows a rule cares about become LogEvent objects. """
+
+        if isinstance(log_events, log_event_table.LogEventTable):
+            yield from log_events.iter_events_with_tags(relevant_tags)
+            return
+
+        for event in log_events:
+            if event.tag in relevant_tags:
+                yield event
+
+def get_window_us(window):
+    """ Converts a timedelta window to whole microseconds, so windows are
+        compared against the events' integer timestamps. """
 
+    if window is None:
+        return None
+    return window // datetime.timedelta(microseconds=1)
@@ -1,5 +1,6 @@
 """ Module for unit testing the parsing of log events into event groups """
 
+import datetime
 import unittest
 
 import event_parser
@@ -77,6 +78,87 @@ class EventParserTest(unittest.TestCase):
         num_groups_found = len(groups_found)
         self.assertEqual(num_groups_found, expected_num_groups_found)
 
+    def test_groups_ordered_by_rule(self):
+        test_tags = ["D", "O", "G", "C", "A", "T", "D", "O", "G"]
+        expected_group_tags = ["cat", "dog", "dog"]
+
+        parser = self.get_test_case_event_parser(test_tags)
+        parser.parse_log_events()
+
+        group_tags = [group.tag for group in parser.event_groups_found]
+        self.assertEqual(group_tags, expected_group_tags)
+        self.assertEqual(len(parser.event_groups_found_dict["dog"]), 2)
+
+    def test_middle_event_without_partial_group(self):
+        test_tags = ["A", "O", "C", "A", "T"]
+        expected_num_groups_found = 1
+
+        parser = self.get_test_case_event_parser(test_tags)
+        parser.parse_log_events()
+
+        num_groups_found = len(parser.event_groups_found)
+        self.assertEqual(num_groups_found, expected_num_groups_found)
+
+    def test_repeated_trigger_tag_counted_once(self):
+        self.event_group_rules = [event_group_rule.EventGroupRule("cact", ["C", "A", "C", "T"])]
+
+        parser = self.get_test_case_event_parser(["C", "A", "T"])
+        parser.parse_log_events()
+
+        self.assertEqual([[event.tag for event in group.trigger_log_events]
+                          for group in parser.event_groups_found], [["C", "A", "T"]])
+
+    def test_expired_partial_groups_evicted(self):
+        # The first C waits 10 minutes for its T, beyond the window
+        timed_tags = [("C", 0), ("A", 1), ("C", 599), ("A", 600), ("T", 601)]
+        log_events = [mocks.MockLogEvent(tag, datetime.datetime(2020, 1, 1) +
+                                         datetime.timedelta(seconds=seconds))
+                      for tag, seconds in timed_tags]
+
+        rule = event_group_rule.EventGroupRule(
+            self.tag_cat, self.trigger_tags_cat,
+            max_completion_window=datetime.timedelta(minutes=5))
+        parser = event_parser.LogEventParser(log_events, [rule])
+        parser.parse_log_events()
+
+        self.assertEqual(len(parser.event_groups_found), 1)
+        self.assertEqual(parser.event_groups_found[0].trigger_log_events[0], log_events[2])
+        self.assertEqual(parser.expired_group_counts, [1])
+
+    def test_oldest_partial_groups_evicted_over_limit(self):
+        test_tags = ["C", "A", "C", "C", "A", "T"]
+        log_events = [mocks.MockLogEvent(tag) for tag in test_tags]
+
+        rule = event_group_rule.EventGroupRule(self.tag_cat, self.trigger_tags_cat,
+                                               max_pending_groups=2)
+        parser = event_parser.LogEventParser(log_events, [rule])
+        parser.parse_log_events()
+
+        # The first C had advanced furthest, so it is the oldest evicted
+        self.assertEqual(len(parser.event_groups_found), 1)
+        self.assertEqual(parser.event_groups_found[0].trigger_log_events[0], log_events[2])
+        self.assertEqual(parser.overflowed_group_counts, [1])
+        self.assertEqual(sum(len(queue) for queue in parser.search_dicts[0].values()), 1)
+
+    def test_context_window(self):
+        # Only context within a minute of D, and at most two of it, is kept
+        timed_tags = [("X", 0), ("Y", 100), ("X", 101), ("Y", 102), ("D", 130),
+                      ("O", 131), ("G", 132)]
+        log_events = [mocks.MockLogEvent(tag, datetime.datetime(2020, 1, 1) +
+                                         datetime.timedelta(seconds=seconds))
+                      for tag, seconds in timed_tags]
+
+        rule = event_group_rule.EventGroupRule(
+            self.tag_dog, self.trigger_tags_dog, self.context_tags_dog,
+            context_max_age=datetime.timedelta(minutes=1), context_max_count=2)
+        parser = event_parser.LogEventParser(log_events, [rule])
+        parser.parse_log_events()
+
+        event_group = parser.event_groups_found[0]
+        self.assertEqual(event_group.context_log_events, log_events[2:4])
+        self.assertEqual(event_group.all_log_events, log_events[2:])
+        self.assertEqual(len(parser.context_event_buffers[0]), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
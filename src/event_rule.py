@@ -3,6 +3,7 @@
 import re
 
 import constants
+import rule_optimizer
 
 class EventRule:
     """ A rule that can be applied to a line of the log to check for an event
@@ -12,6 +13,22 @@ class EventRule:
         tag: A string name for the event
         regular_expression: A string holding the regular expression for
                             a specific event
+        detection_regular_expression: cheaper rewrite of regular_expression
+                                      that finds the same lines, used to
+                                      detect events while the original
+                                      recovers their groups
+        bytes_detection_regular_expression: detection_regular_expression
+                                            compiled for bytes so it can be
+                                            applied to a memory mapped log
+        detect_with_search: boolean denoting if the detection regular
+                            expression is searched for rather than matched
+                            from the start of the line
+        has_message_groups: boolean denoting if regular_expression has
+                            named groups, which are recovered from the
+                            whole line of each event it matches
+        nested_quantifiers: list of descriptions of the nested quantifiers
+                            in regular_expression that risk catastrophic
+                            backtracking
         message_type [optional]: An int enum for the type of message the
                                  log produces for this event 
     """
@@ -29,4 +46,30 @@ class EventRule:
         except:
             raise Exception("Provided regular expression is invalid.")
 
+        self.has_message_groups = len(self.regular_expression.groupindex) > 0
+
+        detection_pattern, self.detect_with_search = \
+            rule_optimizer.get_detection_pattern(regular_expression)
+        self.detection_regular_expression = re.compile(detection_pattern)
+        self.bytes_detection_regular_expression = re.compile(detection_pattern.encode())
+        self.nested_quantifiers = rule_optimizer.find_nested_quantifiers(regular_expression)
+
         self.tag = tag
+
+    def detect(self, line):
+        """ Returns a match object if the line holds this event, or None.
+            The match holds no reliable groups, which are recovered from
+            regular_expression instead. """
+
+        if self.detect_with_search:
+            return self.detection_regular_expression.search(line)
+        return self.detection_regular_expression.match(line)
+
+    def detect_mapped(self, mapped_log, line_start, line_end):
+        """ Returns a match object if the line between the offsets of the
+            memory mapped log holds this event, or None. """
+
+        if self.detect_with_search:
+            return self.bytes_detection_regular_expression.search(mapped_log, line_start,
+                                                                  line_end)
+        return self.bytes_detection_regular_expression.match(mapped_log, line_start, line_end)
@@ -0,0 +1,115 @@
+""" Module for fingerprinting the rules a stage of the pipeline depends on """
+
+import datetime
+import enum
+import functools
+import hashlib
+import os
+import re
+import sys
+import types
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+def get_fingerprint(*objs):
+    """ Returns a digest of the contents of the objects, which changes
+        whenever any attribute reachable from them changes, but not when
+        an identical object is rebuilt. """
+
+    return hashlib.blake2b(describe(list(objs), set()).encode(), digest_size=20).hexdigest()
+
+def describe(obj, active_ids):
+    """ Builds a canonical string describing the object and everything
+        it references. active_ids holds the ids of the objects currently
+        being described, so reference cycles terminate. """
+
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        return repr(obj)
+    if isinstance(obj, enum.Enum):
+        return "{0}.{1}".format(type(obj).__qualname__, obj.name)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.timedelta)):
+        return repr(obj)
+    if isinstance(obj, re.Pattern):
+        return "re({0!r}, {1})".format(obj.pattern, obj.flags)
+
+    if id(obj) in active_ids:
+        return "<cycle>"
+    active_ids.add(id(obj))
+
+    try:
+        if isinstance(obj, (list, tuple)):
+            return "[{0}]".format(", ".join(describe(item, active_ids) for item in obj))
+        if isinstance(obj, (set, frozenset)):
+            return "{{{0}}}".format(", ".join(sorted(describe(item, active_ids)
+                                                     for item in obj)))
+        if isinstance(obj, dict):
+            items = sorted("{0}: {1}".format(describe(key, active_ids),
+                                             describe(value, active_ids))
+                           for key, value in obj.items())
+            return "{{{0}}}".format(", ".join(items))
+        if isinstance(obj, types.CodeType):
+            return describe_code(obj, active_ids)
+        if hasattr(obj, "__code__"):
+            return describe_function(obj, active_ids)
+
+        return "{0}.{1}#{2}({3})".format(type(obj).__module__, type(obj).__qualname__,
+                                         get_module_fingerprint(type(obj).__module__),
+                                         describe(get_attributes(obj), active_ids))
+    finally:
+        active_ids.discard(id(obj))
+
+def describe_function(function, active_ids):
+    """ Describes a function by its name, bytecode, constants and closed
+        over values, so editing a lambda used by a rule changes it. """
+
+    closure_values = [cell.cell_contents for cell in (function.__closure__ or [])]
+
+    return "{0}.{1}<{2}, {3}>".format(function.__module__, function.__qualname__,
+                                      describe_code(function.__code__, active_ids),
+                                      describe(closure_values, active_ids))
+
+def describe_code(code, active_ids):
+    return "code<{0}, {1}>".format(code.co_code.hex(), describe(list(code.co_consts), active_ids))
+
+def get_attributes(obj):
+    if hasattr(obj, "__dict__"):
+        return vars(obj)
+
+    attributes = {}
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, "__slots__", []):
+            if hasattr(obj, slot):
+                attributes[slot] = getattr(obj, slot)
+
+    return attributes
+
+@functools.lru_cache(maxsize=None)
+def get_source_fingerprint(module_names):
+    """ Returns a digest of the source of the named modules of the
+        pipeline, so the output of a stage is never reused by a version
+        of the code that could build it differently. """
+
+    source_hash = hashlib.blake2b(digest_size=20)
+
+    for module_name in module_names:
+        file_name = module_name + ".py"
+        with open(os.path.join(SOURCE_DIRECTORY, file_name), "rb") as source_file:
+            source_hash.update(file_name.encode() + b"\0" + source_file.read() + b"\0")
+
+    return source_hash.hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def get_module_fingerprint(module_name):
+    """ Returns a digest of the source file of a module, so objects of a
+        class describe the code of their class too, or None when the
+        module has no readable source file. """
+
+    source_path = getattr(sys.modules.get(module_name), "__file__", None)
+    if source_path is None:
+        return None
+
+    try:
+        with open(source_path, "rb") as source_file:
+            return hashlib.blake2b(source_file.read(), digest_size=20).hexdigest()
+    except OSError:
+        return None
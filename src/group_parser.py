@@ -2,10 +2,19 @@
     to generate signals that will be evaluated to determine if group
     is symptomatic """
 
-import copy
+import heapq
+import itertools
 
+import coroutines
+import evaluators
+import event_group_index
+import signal_plan
 import symptom_burst
 
+# Attributes holding the results of parsing, in the order they are set
+PARSE_RESULT_ATTRIBUTES = ["symptoms_found", "bursts", "burst_dict",
+                           "statistics_summaries", "criteria_symptoms"]
+
 class EventGroupParser:
     """ Parser for applying criteria against event groups 
 
@@ -20,28 +29,41 @@ class EventGroupParser:
         burst_dict: dictionary of bursts with key of symtom tag
         statistics_summaries: dicitonary of statistics summary
                               with key of the signal tag that the
-                              summary describes """
+                              summary describes
+        criteria_symptoms: list of the symptoms found by each criteria
+        burst_max_gap: timedelta after the end of a symptom that the next
+                       symptom of its burst must start within, or None
+                       to only end bursts at innocent signals """
 
-    def __init__(self, event_groups, criterias, collect_statistics=False):
+    def __init__(self, event_groups, criterias, collect_statistics=False, burst_max_gap=None):
         self.event_groups = event_groups
         self.criterias = criterias
         self.collect_statistics = collect_statistics
+        self.burst_max_gap = burst_max_gap
 
         self.symptoms_found = []
         self.bursts = []
         self.burst_dict = {}
         self.statistics_summaries = {}
+        self.criteria_symptoms = []
 
     def parse_event_groups(self):
         """ Applies each criteria against the event groups and stores
             the results, and then detects bursts in the results. """
 
-        detected_signals = []
-        confirmed_signals = []
+        criteria_signal_marks = []
+
+        # Index the groups by tag once so that each signal only walks
+        # the groups it detects signals in
+        group_index = event_group_index.EventGroupIndex(self.event_groups)
+
+        # Criteria applying the same signal share a single detection of it
+        plan = signal_plan.SignalPlan(group_index)
 
         for criteria in self.criterias:
-            criteria_output = criteria.apply_criteria(self.event_groups,
-                                                      self.collect_statistics)
+            criteria_output = criteria.apply_criteria(group_index,
+                                                      self.collect_statistics,
+                                                      plan)
             if self.collect_statistics:
                 statistics_summary = criteria_output["statistics"]
                 if statistics_summary is not None:
@@ -51,84 +73,86 @@ class EventGroupParser:
             symptoms = criteria_output["symptoms"]
 
             self.symptoms_found += symptoms
+            self.criteria_symptoms.append(symptoms)
         
-            detected_signals += criteria_output["detected_signals"]
-            confirmed_signals += criteria_output["confirmed_signals"]
-
-        self.detect_bursts(detected_signals, confirmed_signals)
-
-    def detect_bursts(self, detected_signals, confirmed_signals):
-        """ Loops through confirmed signals and detected signals to
-            group together consecutive confirmed signals. """
-
-        if len(confirmed_signals) == 0:
-            return
-
-        symptoms = copy.copy(self.symptoms_found)
-        confirmed_signal = confirmed_signals.pop(0)
-        related_symptom = symptoms.pop(0)
-        prev_symptom_tag = None
-
-        burst_list = []
-
-        for signal in detected_signals:
-            if signal == confirmed_signal:
-                # Its definitely A symptom ... but is it part of current burst?
-                if prev_symptom_tag is None:
-                    # Its a brand new burst
-                    prev_symptom_tag = related_symptom.tag
-                    burst_list.append(related_symptom)
-
-                    if len(confirmed_signals) > 0:
-                        confirmed_signal = confirmed_signals.pop(0)
-                        related_symptom = symptoms.pop(0)
-                elif prev_symptom_tag == related_symptom.tag:
-                    # Its part of the current burst
-                    burst_list.append(related_symptom)
-
-                    if len(confirmed_signals) > 0:
-                        confirmed_signal = confirmed_signals.pop(0)
-                        related_symptom = symptoms.pop(0)
-                else:
-                    # Its a different burst right after the current one
-                    burst = symptom_burst.SymptomBurst(burst_list)
-                    self.bursts.append(burst)
-
-                    if prev_symptom_tag not in self.burst_dict:
-                        self.burst_dict[prev_symptom_tag] = [burst]
-                    else:
-                        self.burst_dict[prev_symptom_tag].append(burst)
-
-                    burst_list = [related_symptom]
-                    prev_symptom_tag = related_symptom.tag
-
-                    if len(confirmed_signals) > 0:
-                        confirmed_signal = confirmed_signals.pop(0)
-                        related_symptom = symptoms.pop(0)
-            else:
+            criteria_signal_marks.append(criteria_output["signal_marks"])
+
+        self.detect_bursts(criteria_signal_marks)
+
+    def get_parse_results(self):
+        """ Returns a dict of the results of parsing, which
+            set_parse_results restores without parsing again. """
+
+        return {attribute: getattr(self, attribute) for attribute in PARSE_RESULT_ATTRIBUTES}
+
+    def set_parse_results(self, parse_results):
+        for attribute in PARSE_RESULT_ATTRIBUTES:
+            setattr(self, attribute, parse_results[attribute])
+
+    def detect_bursts(self, criteria_signal_marks):
+        """ Groups together consecutive confirmed signals of each criteria
+            into bursts, given the SignalMarks of each criteria. The
+            signals of every criteria are merged in chronological order
+            and walked once, so the bursts are found in the order they
+            start. A burst ends at the next innocent signal of its
+            criteria, or when the next symptom starts more than
+            burst_max_gap after the end of the last. """
+
+        if self.burst_max_gap is not None:
+            max_gap_us = evaluators.get_microseconds(self.burst_max_gap)
+        else:
+            max_gap_us = None
+
+        # Each criteria's signals are already in chronological order
+        criteria_signals = [zip(signal_marks.start_timestamps_us.tolist(),
+                                itertools.repeat(criteria_index), range(len(signal_marks)))
+                            for criteria_index, signal_marks in enumerate(criteria_signal_marks)]
+
+        criteria_symptoms = [iter(symptoms) for symptoms in self.criteria_symptoms]
+        open_bursts = [None for signal_marks in criteria_signal_marks]
+        last_end_timestamps_us = [None for signal_marks in criteria_signal_marks]
+
+        # Bursts are slotted in the order they start as they open
+        burst_slots = []
+
+        for start_timestamp_us, criteria_index, signal_index in heapq.merge(*criteria_signals):
+            signal_marks = criteria_signal_marks[criteria_index]
+            open_burst = open_bursts[criteria_index]
+
+            if not signal_marks.is_confirmed[signal_index]:
                 # The burst is broken by an innocent group
-                if prev_symptom_tag is not None and len(burst_list) > 0:
-                    burst = symptom_burst.SymptomBurst(burst_list)
-                    self.bursts.append(burst)
+                open_bursts[criteria_index] = None
+                continue
 
-                    if prev_symptom_tag not in self.burst_dict:
-                        self.burst_dict[prev_symptom_tag] = [burst]
-                    else:
-                        self.burst_dict[prev_symptom_tag].append(burst)
+            symptom = next(criteria_symptoms[criteria_index])
 
-                burst_list = []
-                prev_symptom_tag = None
+            if open_burst is not None and open_burst[-1].tag != symptom.tag:
+                # Its a different burst right after the current one
+                open_burst = None
+            elif (open_burst is not None and max_gap_us is not None
+                    and start_timestamp_us - last_end_timestamps_us[criteria_index] > max_gap_us):
+                # The burst is broken by a long gap between symptoms
+                open_burst = None
 
+            if open_burst is None:
+                open_burst = open_bursts[criteria_index] = []
+                burst_slots.append(open_burst)
 
-        # Check for leftover burst that did not get logged
-        if prev_symptom_tag is not None and len(burst_list) > 0:
-            burst = symptom_burst.SymptomBurst(burst_list)
+            open_burst.append(symptom)
+            last_end_timestamps_us[criteria_index] = int(
+                signal_marks.end_timestamps_us[signal_index])
+
+        self.add_bursts(symptom_burst.SymptomBurst(burst_symptoms)
+                        for burst_symptoms in burst_slots)
+
+    def add_bursts(self, bursts):
+        for burst in bursts:
             self.bursts.append(burst)
 
-            if prev_symptom_tag not in self.burst_dict:
-                self.burst_dict[prev_symptom_tag] = [burst]
+            if burst.tag not in self.burst_dict:
+                self.burst_dict[burst.tag] = [burst]
             else:
-                self.burst_dict[prev_symptom_tag].append(burst)
+                self.burst_dict[burst.tag].append(burst)
 
     def convert_to_dict(self):
         dict_form = {}
@@ -144,3 +168,39 @@ class EventGroupParser:
             dict_form["symptom_bursts"].append(converted_burst)
 
         return dict_form
+
+@coroutines.coroutine
+def track_bursts(target, burst_max_gap=None):
+    """ Coroutine receiving the symptom of each detected signal in turn,
+        or None for a signal that was not confirmed, and sending target
+        a SymptomBurst for each run of consecutive symptoms of one tag
+        once the run is broken or the coroutine is closed. A run is also
+        broken when a symptom starts more than burst_max_gap after the
+        end of the last. """
+
+    burst_symptoms = []
+
+    try:
+        while True:
+            symptom = yield
+
+            if symptom is None:
+                # The burst is broken by an innocent group
+                if len(burst_symptoms) > 0:
+                    target.send(symptom_burst.SymptomBurst(burst_symptoms))
+                burst_symptoms = []
+            elif len(burst_symptoms) > 0 and (
+                    burst_symptoms[-1].tag != symptom.tag
+                    or (burst_max_gap is not None
+                        and symptom.start_timestamp - burst_symptoms[-1].start_timestamp
+                        - burst_symptoms[-1].duration > burst_max_gap)):
+                # Its a different burst right after the current one
+                target.send(symptom_burst.SymptomBurst(burst_symptoms))
+                burst_symptoms = [symptom]
+            else:
+                burst_symptoms.append(symptom)
+    except GeneratorExit:
+        # Send on the leftover burst that was not broken
+        if len(burst_symptoms) > 0:
+            target.send(symptom_burst.SymptomBurst(burst_symptoms))
+        target.close()
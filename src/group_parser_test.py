@@ -1,5 +1,6 @@
 """ Module for testing the group_parser"""
 
+import datetime
 import unittest
 
 import group_parser
@@ -31,6 +32,29 @@ class GroupParserTest(unittest.TestCase):
         self.assertTrue("C" in bursts)
         self.assertEqual(len(bursts["C"]), 1)
 
+    def test_bursts_in_start_order(self):
+        other_criteria = mocks.MockCriteria(yes=["B"])
+        parser = group_parser.EventGroupParser(self.groups, [self.criteria, other_criteria])
+        parser.parse_event_groups()
+
+        self.assertEqual([burst.tag for burst in parser.bursts], ["A", "B", "C", "A"])
+        self.assertEqual([burst.symptom_count for burst in parser.bursts], [3, 1, 2, 2])
+
+    def test_burst_max_gap(self):
+        groups = [mocks.MockLogEventGroup("A") for _ in range(4)]
+        parser = group_parser.EventGroupParser(groups, [self.criteria],
+                                               burst_max_gap=datetime.timedelta(0))
+        parser.parse_event_groups()
+
+        # Each mocked signal ends a microsecond before the next starts
+        self.assertEqual(len(parser.bursts), 4)
+
+        parser = group_parser.EventGroupParser(groups, [self.criteria],
+                                               burst_max_gap=datetime.timedelta(microseconds=1))
+        parser.parse_event_groups()
+
+        self.assertEqual(len(parser.bursts), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -11,7 +11,10 @@ import criteria
 import sifter_builder
 import gsyslyzer_cli
 
-if __name__ == "__main__":
+def build_gsys_sifter_builder():
+    """ Returns a SifterBuilder holding the rules and criteria for
+        diagnosing Gsys logs. """
+
     log_sifter_builder = sifter_builder.SifterBuilder()
 
     # Add the hotplug event to the builder
@@ -115,7 +118,9 @@ if __name__ == "__main__":
         event_group_rule.EventGroupRule(
             tag="platform_rescan",
             trigger_event_tags=["start_rescan", "finish_rescan"],
-            context_event_tags=["hotplug"]
+            context_event_tags=["hotplug"],
+            context_max_age=datetime.timedelta(minutes=1),
+            context_max_count=1000
         )
     )
 
@@ -230,6 +235,7 @@ if __name__ == "__main__":
         )
     )
 
+    return log_sifter_builder
 
-    gsyslyzer_cli.Gsyslyzer(log_sifter_builder).run()
-    
+if __name__ == "__main__":
+    gsyslyzer_cli.Gsyslyzer(build_gsys_sifter_builder()).run()
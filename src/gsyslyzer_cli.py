@@ -2,28 +2,83 @@
 
 import argparse
 
+def build_argument_parser():
+    """ Returns the parser for the flags accepted by the CLI. """
+
+    parser = argparse.ArgumentParser(description="Gsyslyzer CLI")
+    parser.add_argument("--verbosity", default=0, 
+                        type=int, help=("0: Symptom summary "
+                                        "1: All symptom bursts"))
+    parser.add_argument("--collect_statistics", default=False, 
+                        type=bool, help=("Set True to collect signal statistics"))
+    parser.add_argument("--json_output", default=False, help=("Set True to write output "
+                                                              "to gsift_output.json"))
+    parser.add_argument("--mmap", default=False,
+                        type=bool, help=("Set True to parse the log over a "
+                                         "memory map of the file"))
+    parser.add_argument("--workers", default=None,
+                        type=int, help=("Number of processes to split parsing "
+                                        "of the log across (Default: 1, or one "
+                                        "per CPU for a directory of logs)"))
+    parser.add_argument("--follow", default=False,
+                        type=bool, help=("Set True to keep analyzing the log "
+                                         "as it is written"))
+    parser.add_argument("--checkpoint_path", default=None,
+                        help=("File storing the offset reached while "
+                              "following (Default: <log_file_path>"
+                              ".gsyslyzer_checkpoint)"))
+    parser.add_argument("--poll_interval", default=1.0,
+                        type=float, help=("Seconds to wait between reads "
+                                          "while following"))
+    parser.add_argument("--burst_max_gap", default=None,
+                        type=float, help=("Seconds after the end of a "
+                                          "symptom that the next symptom of "
+                                          "its burst must start within"))
+    parser.add_argument("--pipelined", default=False,
+                        type=bool, help=("Set True to group events and detect "
+                                         "symptoms while the log is still "
+                                         "being read"))
+    parser.add_argument("--cache_dir", default=None,
+                        help=("Directory caching the events parsed from "
+                              "each log so unchanged logs are not "
+                              "parsed again"))
+    parser.add_argument("--cache_size_mb", default=1024,
+                        type=float, help=("Size in megabytes the parse "
+                                          "cache is kept within"))
+    parser.add_argument("--bench_rules", "--bench-rules", default=False,
+                        type=bool, help=("Set True to time each event rule "
+                                         "against a sample of the log's "
+                                         "lines instead of analyzing it"))
+    parser.add_argument("--bench_sample_size", default=10000,
+                        type=int, help=("Number of log lines sampled when "
+                                        "timing event rules"))
+    parser.add_argument("--profile", default=False,
+                        type=bool, help=("Set True to report the time spent "
+                                         "on each event rule, group rule "
+                                         "and criteria"))
+    parser.add_argument("--profile_json", default=None,
+                        help=("File to write the profile to as JSON "
+                              "instead of printing it"))
+    parser.add_argument("--log_file_path", required=True,
+                        help=("Path to the log file, a directory or glob "
+                              "of rotated log files, or - to read the log "
+                              "from stdin"))
+
+    return parser
+
 class Gsyslyzer:
     """ Object for building and running a complete sifting pipeline
     
         Attributes
         ----------
         builder: SifterBuilder object for bulding the LogSifter
-        flags: object storing attributes given as cli flags"""
+        flags: object storing attributes given as cli flags, parsed from
+               args or from the command line when args is None"""
 
-    def __init__(self, builder):
+    def __init__(self, builder, args=None):
         self.builder = builder
 
-        parser = argparse.ArgumentParser(description="Gsyslyzer CLI")
-        parser.add_argument("--verbosity", default=0, 
-                            type=int, help=("0: Symptom summary "
-                                            "1: All symptom bursts"))
-        parser.add_argument("--collect_statistics", default=False, 
-                            type=bool, help=("Set True to collect signal statistics"))
-        parser.add_argument("--json_output", default=False, help=("Set True to write output "
-                                                                  "to gsift_output.json"))
-        parser.add_argument("--log_file_path", required=True)
-
-        self.flags = parser.parse_args()
+        self.flags = build_argument_parser().parse_args(args)
 
     def run(self):
         log_sifter = self.builder.build_sifter(self.flags)
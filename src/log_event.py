@@ -1,67 +1,98 @@
 """ Module for defining an object representation for a detected event in the log """
 
-import datetime
-
 class LogEvent:
     """ A condensed representation of a line in the log that matched
-        with an EventRule. 
-    
+        with an EventRule. A LogEvent is a thin view over one row of a
+        LogEventTable, so its details are read from the table's columns
+        when accessed.
+
         Attributes
         ----------
-        event_rule_match_object: re match object produced by LogParser
+        event_table: LogEventTable holding the event's row
+        row: index of the event's row in the table
         tag: a string name for the event
-        timestamp: string time when source line was logged 
-                   format: ["hh:mm:ss.uuuuuu"]
-        date: string date when source line was logged 
+        timestamp: datetime when source line was logged
+        timestamp_us: int microseconds since the epoch when source line
+                      was logged
+        date: string date when source line was logged
               format: ["mmdd"]
+        year: string year when source line was logged
         thread_id: thread id from source line
         source_file: file that logged the line
         source_file_line_number: line number of source file that logged
                                  the source line
-        message_type: int enum for type of message produced in log
+        message_type: string prefix for type of message produced in log
         message: raw string message from the log
         message_groups_dict: dictionary of separate events and their
                              matched data from the matched EventRule
-                             regular_expression
+                             regular_expression, built when first read
     """
-    def __init__(self, tag, log_line_details_dict, event_rule_match_object):
-        self.tag = tag
 
-        # Here, we get all the info we can from the match object
-        self.message_groups_dict = event_rule_match_object.groupdict()
+    __slots__ = ("event_table", "row")
+
+    def __init__(self, event_table, row):
+        self.event_table = event_table
+        self.row = row
+
+    @property
+    def tag(self):
+        return self.event_table.get_tag(self.row)
+
+    @property
+    def timestamp(self):
+        return self.event_table.get_timestamp(self.row)
 
-        # The rest of the attributes are details about the log line
-        self.message_type = log_line_details_dict["message_type"]
-        self.timestamp = log_line_details_dict["timestamp"] 
-        self.date = log_line_details_dict["date"]
-        self.year = log_line_details_dict["year"]
-        self.thread_id = log_line_details_dict["thread_id"]
-        self.source_file = log_line_details_dict["source_file"]
-        self.source_file_line_number = log_line_details_dict["source_file_line_number"]
-        self.message = log_line_details_dict["message"]
+    @property
+    def timestamp_us(self):
+        return self.event_table.timestamps[self.row]
 
-        # Placeholder for ms converted timestamp
-        self.timestamp = self.get_timestamp()
+    @property
+    def date(self):
+        timestamp = self.timestamp
+        return "{0:02d}{1:02d}".format(timestamp.month, timestamp.day)
 
-    def get_timestamp(self):
-        year_str = self.year
-        date_str = self.date
-        time_str = self.timestamp
+    @property
+    def year(self):
+        return str(self.timestamp.year)
 
-        month_str = date_str[:2]
-        day_str = date_str[2:]
+    @property
+    def thread_id(self):
+        return self.event_table.get_thread_id(self.row)
 
-        # Must convert all the strs into an iso format date
-        iso_date_str = year_str + "-" + month_str + "-" + day_str + "T" + time_str
-        timestamp = datetime.datetime.fromisoformat(iso_date_str)
+    @property
+    def source_file(self):
+        return self.event_table.get_source_file(self.row)
 
-        return timestamp
+    @property
+    def source_file_line_number(self):
+        return self.event_table.get_source_file_line_number(self.row)
+
+    @property
+    def message_type(self):
+        return self.event_table.get_message_type(self.row)
+
+    @property
+    def message(self):
+        return self.event_table.get_message(self.row)
+
+    @property
+    def message_groups_dict(self):
+        return self.event_table.get_message_groups_dict(self.row)
 
     def convert_to_dict(self):
         """ Converts object form of self to dictionary for outputing to json. """
-        
-        dict_form = self.__dict__
-        dict_form["timestamp"] = str(dict_form["timestamp"])
 
-        return dict_form
+        dict_form = {
+            "tag": self.tag,
+            "message_groups_dict": self.message_groups_dict,
+            "message_type": self.message_type,
+            "timestamp": str(self.timestamp),
+            "date": self.date,
+            "year": self.year,
+            "thread_id": self.thread_id,
+            "source_file": self.source_file,
+            "source_file_line_number": self.source_file_line_number,
+            "message": self.message
+        }
 
+        return dict_form
@@ -0,0 +1,339 @@
+""" Module for storing the events found in a log in a compact columnar table """
+
+import array
+import datetime
+import heapq
+import struct
+import zlib
+
+import constants
+import log_event
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MISSING_NUMBER = -1
+
+TABLE_FILE_MAGIC = b"GSYSEVT3"
+SECTION_LENGTH_FORMAT = "<Q"
+STRING_COUNT_FORMAT = "<Q"
+ARRAY_COLUMNS = ["tag_ids", "rule_ids", "timestamps", "message_types", "thread_ids",
+                 "source_file_ids", "source_file_line_numbers", "message_offsets"]
+
+class LogEventTable:
+    """ Array backed table holding one row per LogEvent found in the log.
+        Rows are stored as columns of machine integers instead of
+        objects, and LogEvent objects are thin views over a row.
+
+        Attributes
+        ----------
+        tags: list of event tags indexed by tag id
+        event_rules: list of EventRules indexed by rule id, starting with
+                     the rules the table was built for so tables built
+                     from the same rules share rule and tag ids
+        source_files: list of interned source file names indexed by
+                      source file id
+        tag_ids: array of the tag id of each row
+        rule_ids: array of the id of the EventRule that matched each row
+        timestamps: array of int64 epoch microsecond timestamps
+        message_types: array of int MessageType values
+        thread_ids: array of thread ids, -1 when the line had none
+        source_file_ids: array of interned source file ids
+        source_file_line_numbers: array of source file line numbers, -1
+                                  when the line had none
+        lines: list of the message of each row, or of its whole line
+               when the row's rule has named groups, which are then
+               recovered from the line lazily
+        message_offsets: array of the index each message starts at in
+                         its entry of lines
+        tag_rows: list of arrays of the rows with each tag, indexed by
+                  tag id """
+
+    def __init__(self, event_rules=None):
+        self.tags = []
+        self.event_rules = []
+        self.source_files = []
+        self.tag_rows = []
+
+        self.tag_id_dict = {}
+        self.rule_id_dict = {}
+        self.source_file_id_dict = {}
+
+        if event_rules is not None:
+            for rule in event_rules:
+                self.get_rule_id(rule)
+                self.get_tag_id(rule.tag)
+
+        self.tag_ids = array.array("H")
+        self.rule_ids = array.array("H")
+        self.timestamps = array.array("q")
+        self.message_types = array.array("b")
+        self.thread_ids = array.array("q")
+        self.source_file_ids = array.array("I")
+        self.source_file_line_numbers = array.array("q")
+        self.lines = []
+        self.message_offsets = array.array("I")
+
+    def __len__(self):
+        return len(self.tag_ids)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if row < 0 or row >= len(self):
+            raise IndexError("LogEventTable row out of range.")
+
+        return log_event.LogEvent(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield log_event.LogEvent(self, row)
+
+    def get_tag_id(self, tag):
+        if tag not in self.tag_id_dict:
+            self.tag_id_dict[tag] = len(self.tags)
+            self.tags.append(tag)
+            self.tag_rows.append(array.array("I"))
+
+        return self.tag_id_dict[tag]
+
+    def get_rule_id(self, rule):
+        rule_key = id(rule)
+        if rule_key not in self.rule_id_dict:
+            self.rule_id_dict[rule_key] = len(self.event_rules)
+            self.event_rules.append(rule)
+
+        return self.rule_id_dict[rule_key]
+
+    def get_source_file_id(self, source_file):
+        if source_file not in self.source_file_id_dict:
+            self.source_file_id_dict[source_file] = len(self.source_files)
+            self.source_files.append(source_file)
+
+        return self.source_file_id_dict[source_file]
+
+    def append_event(self, rule, line, log_line_details_dict, timestamp_us):
+        """ Stores a line matched by the given rule as a new row and
+            returns the index of that row. Only the message is kept
+            unless the rule has named groups to recover from the line,
+            so line may be None for a rule without them. """
+
+        message_type = constants.MessageType.from_log_prefix(
+            log_line_details_dict["message_type"])
+        message = log_line_details_dict["message"]
+        tag_id = self.get_tag_id(rule.tag)
+
+        self.tag_rows[tag_id].append(len(self.tag_ids))
+        self.tag_ids.append(tag_id)
+        self.rule_ids.append(self.get_rule_id(rule))
+        self.timestamps.append(timestamp_us)
+        self.message_types.append(message_type)
+        self.thread_ids.append(self.convert_to_number(log_line_details_dict["thread_id"]))
+        self.source_file_ids.append(self.get_source_file_id(log_line_details_dict["source_file"]))
+        self.source_file_line_numbers.append(
+            self.convert_to_number(log_line_details_dict["source_file_line_number"]))
+
+        if rule.has_message_groups:
+            self.lines.append(line)
+            self.message_offsets.append(len(line) - len(message))
+        else:
+            self.lines.append(message)
+            self.message_offsets.append(0)
+
+        return len(self.tag_ids) - 1
+
+    def extend(self, other_table):
+        """ Appends every row of another table built from the same event
+            rules, such as one parsed from another chunk of the log. """
+
+        if len(other_table.event_rules) != len(self.event_rules):
+            raise Exception("LogEventTable Error: Tables were built from different rules.")
+
+        tag_id_map = [self.get_tag_id(tag) for tag in other_table.tags]
+        source_file_id_map = [self.get_source_file_id(source_file)
+                              for source_file in other_table.source_files]
+
+        first_new_row = len(self)
+        for other_tag_id, other_rows in enumerate(other_table.tag_rows):
+            self.tag_rows[tag_id_map[other_tag_id]].extend(first_new_row + other_row
+                                                           for other_row in other_rows)
+
+        self.tag_ids.extend(tag_id_map[tag_id] for tag_id in other_table.tag_ids)
+        self.rule_ids.extend(other_table.rule_ids)
+        self.timestamps.extend(other_table.timestamps)
+        self.message_types.extend(other_table.message_types)
+        self.thread_ids.extend(other_table.thread_ids)
+        self.source_file_ids.extend(source_file_id_map[source_file_id]
+                                    for source_file_id in other_table.source_file_ids)
+        self.source_file_line_numbers.extend(other_table.source_file_line_numbers)
+        self.lines.extend(other_table.lines)
+        self.message_offsets.extend(other_table.message_offsets)
+
+    def append_row(self, other_table, row):
+        """ Appends a copy of one row of another table built from the same
+            event rules, such as when merging the tables of several logs. """
+
+        tag_id = self.get_tag_id(other_table.get_tag(row))
+
+        self.tag_rows[tag_id].append(len(self.tag_ids))
+        self.tag_ids.append(tag_id)
+        self.rule_ids.append(other_table.rule_ids[row])
+        self.timestamps.append(other_table.timestamps[row])
+        self.message_types.append(other_table.message_types[row])
+        self.thread_ids.append(other_table.thread_ids[row])
+        self.source_file_ids.append(self.get_source_file_id(other_table.get_source_file(row)))
+        self.source_file_line_numbers.append(other_table.source_file_line_numbers[row])
+        self.lines.append(other_table.lines[row])
+        self.message_offsets.append(other_table.message_offsets[row])
+
+    def convert_to_number(self, number_str):
+        if number_str == "":
+            return MISSING_NUMBER
+        return int(number_str)
+
+    def get_tag(self, row):
+        return self.tags[self.tag_ids[row]]
+
+    def get_timestamp(self, row):
+        return EPOCH + datetime.timedelta(microseconds=self.timestamps[row])
+
+    def get_message_type(self, row):
+        return constants.MessageType(self.message_types[row]).to_log_prefix()
+
+    def get_thread_id(self, row):
+        return self.convert_to_number_str(self.thread_ids[row])
+
+    def get_source_file(self, row):
+        return self.source_files[self.source_file_ids[row]]
+
+    def get_source_file_line_number(self, row):
+        return self.convert_to_number_str(self.source_file_line_numbers[row])
+
+    def get_message(self, row):
+        return self.lines[row][self.message_offsets[row]:]
+
+    def get_message_groups_dict(self, row):
+        """ Rematches the row's line against its EventRule, so message
+            groups are only built for events whose groups are read. """
+
+        rule = self.event_rules[self.rule_ids[row]]
+        if not rule.has_message_groups:
+            return {}
+
+        match_object = rule.regular_expression.match(self.lines[row])
+
+        if match_object is None:
+            return {}
+        return match_object.groupdict()
+
+    def convert_to_number_str(self, number):
+        if number == MISSING_NUMBER:
+            return ""
+        return str(number)
+
+    def iter_events_with_tags(self, tags):
+        """ Yields a LogEvent view for each row whose tag is in tags, in
+            row order, walking only the rows indexed under those tags so
+            rows with other tags are never visited. """
+
+        tag_ids = set(self.tag_id_dict[tag] for tag in tags if tag in self.tag_id_dict)
+        tag_rows = [self.tag_rows[tag_id] for tag_id in tag_ids]
+
+        if len(tag_rows) == 1:
+            rows = tag_rows[0]
+        else:
+            rows = heapq.merge(*tag_rows)
+
+        for row in rows:
+            yield log_event.LogEvent(self, row)
+
+    def get_events_by_tag(self):
+        """ Builds a dict of lists of LogEvent views with the tag as key
+            for every tag found, on demand from the tag index. """
+
+        return {tag: [log_event.LogEvent(self, row) for row in self.tag_rows[tag_id]]
+                for tag_id, tag in enumerate(self.tags) if len(self.tag_rows[tag_id]) > 0}
+
+    def write_to_file(self, table_file):
+        """ Writes the table to a binary file as length prefixed sections:
+            the interned tags and source files, the raw bytes of each
+            array column, and the zlib compressed lines. The event rules
+            are not written, since the reader must supply the same ones. """
+
+        table_file.write(TABLE_FILE_MAGIC)
+        write_strings(table_file, self.tags)
+        write_strings(table_file, self.source_files)
+
+        for column_name in ARRAY_COLUMNS:
+            write_section(table_file, getattr(self, column_name).tobytes())
+
+        write_strings(table_file, self.lines, compress=True)
+
+def read_from_file(table_file, event_rules):
+    """ Reads a table written by LogEventTable.write_to_file, attaching
+        the event rules it was built from. """
+
+    if table_file.read(len(TABLE_FILE_MAGIC)) != TABLE_FILE_MAGIC:
+        raise Exception("LogEventTable Error: Not a log event table file.")
+
+    events_table = LogEventTable(event_rules)
+
+    tags = read_strings(table_file)
+    if tags[:len(events_table.tags)] != events_table.tags:
+        raise Exception("LogEventTable Error: Table was built from different rules.")
+
+    for tag in tags:
+        events_table.get_tag_id(tag)
+    for source_file in read_strings(table_file):
+        events_table.get_source_file_id(source_file)
+
+    for column_name in ARRAY_COLUMNS:
+        getattr(events_table, column_name).frombytes(read_section(table_file))
+
+    for row, tag_id in enumerate(events_table.tag_ids):
+        events_table.tag_rows[tag_id].append(row)
+
+    events_table.lines = read_strings(table_file, compress=True)
+
+    return events_table
+
+def write_section(table_file, section_bytes):
+    table_file.write(struct.pack(SECTION_LENGTH_FORMAT, len(section_bytes)))
+    table_file.write(section_bytes)
+
+def read_section(table_file):
+    length_bytes = table_file.read(struct.calcsize(SECTION_LENGTH_FORMAT))
+    section_length = struct.unpack(SECTION_LENGTH_FORMAT, length_bytes)[0]
+
+    section_bytes = table_file.read(section_length)
+    if len(section_bytes) != section_length:
+        raise Exception("LogEventTable Error: Table file is truncated.")
+
+    return section_bytes
+
+def write_strings(table_file, strings, compress=False):
+    """ Writes the strings as a section holding their count followed by
+        the strings joined by newlines, so empty strings survive the
+        round trip. """
+
+    joined_strings = "\n".join(strings).encode()
+    if compress:
+        joined_strings = zlib.compress(joined_strings, 1)
+
+    write_section(table_file, struct.pack(STRING_COUNT_FORMAT, len(strings)) + joined_strings)
+
+def read_strings(table_file, compress=False):
+    section_bytes = read_section(table_file)
+    count_size = struct.calcsize(STRING_COUNT_FORMAT)
+    string_count = struct.unpack(STRING_COUNT_FORMAT, section_bytes[:count_size])[0]
+
+    joined_strings = section_bytes[count_size:]
+    if compress:
+        joined_strings = zlib.decompress(joined_strings)
+
+    if string_count == 0:
+        return []
+
+    strings = joined_strings.decode().split("\n")
+    if len(strings) != string_count:
+        raise Exception("LogEventTable Error: Table file is corrupt.")
+
+    return strings
@@ -0,0 +1,104 @@
+""" Module for unit testing the columnar log event table """
+
+import datetime
+import io
+import unittest
+
+import event_rule
+import log_event_table
+import timestamp_decoder
+
+class LogEventTableTest(unittest.TestCase):
+    """ Test suite for the log event table """
+    def setUp(self):
+        super(LogEventTableTest, self).setUp()
+
+        self.fake_rule = event_rule.EventRule("smbus_error",
+                                              "(.*)(SMBus device\\s)(?P<dev_num>\\d*\\-\\d*)")
+        self.fake_line = "E0924 00:33:04.000001   22675 smbus.cc:10] SMBus device 3-55: Read8"
+        self.fake_details = {
+            "message_type": "E",
+            "date": "0924",
+            "timestamp": "00:33:04.000001",
+            "thread_id": "22675",
+            "source_file": "smbus.cc",
+            "source_file_line_number": "10",
+            "message": "SMBus device 3-55: Read8"
+        }
+
+        self.fake_timestamp_us = timestamp_decoder.TimestampDecoder(2019, 9).decode(
+            "0924", "00:33:04.000001")
+        self.fake_table = log_event_table.LogEventTable()
+
+    def test_event_view_matches_line_details(self):
+        row = self.fake_table.append_event(self.fake_rule, self.fake_line,
+                                           self.fake_details, self.fake_timestamp_us)
+        event = self.fake_table[row]
+
+        self.assertEqual(event.tag, "smbus_error")
+        self.assertEqual(event.timestamp, datetime.datetime(2019, 9, 24, 0, 33, 4, 1))
+        self.assertEqual(event.date, "0924")
+        self.assertEqual(event.year, "2019")
+        self.assertEqual(event.message_type, "E")
+        self.assertEqual(event.thread_id, "22675")
+        self.assertEqual(event.source_file, "smbus.cc")
+        self.assertEqual(event.source_file_line_number, "10")
+        self.assertEqual(event.message, "SMBus device 3-55: Read8")
+        self.assertEqual(event.message_groups_dict, {"dev_num": "3-55"})
+
+    def test_source_files_are_interned(self):
+        for _ in range(3):
+            self.fake_table.append_event(self.fake_rule, self.fake_line,
+                                         self.fake_details, self.fake_timestamp_us)
+
+        self.assertEqual(len(self.fake_table), 3)
+        self.assertEqual(self.fake_table.source_files, ["smbus.cc"])
+        self.assertEqual(list(self.fake_table.source_file_ids), [0, 0, 0])
+
+    def test_iter_events_with_tags(self):
+        other_rule = event_rule.EventRule("sigterm", "(.*)(SIGTERM)(.*)")
+        self.fake_table.append_event(self.fake_rule, self.fake_line,
+                                     self.fake_details, self.fake_timestamp_us)
+        self.fake_table.append_event(other_rule, self.fake_line,
+                                     self.fake_details, self.fake_timestamp_us)
+        self.fake_table.append_event(self.fake_rule, self.fake_line,
+                                     self.fake_details, self.fake_timestamp_us)
+
+        rows = [event.row for event in self.fake_table.iter_events_with_tags(["smbus_error"])]
+        self.assertEqual(rows, [0, 2])
+
+        other_table = log_event_table.LogEventTable([self.fake_rule, other_rule])
+        other_table.append_event(other_rule, None, self.fake_details, self.fake_timestamp_us)
+        self.fake_table.extend(other_table)
+
+        rows = [event.row for event in self.fake_table.iter_events_with_tags(["sigterm",
+                                                                              "smbus_error"])]
+        self.assertEqual(rows, [0, 1, 2, 3])
+        self.assertEqual(self.fake_table.get_events_by_tag()["sigterm"][1].row, 3)
+
+    def test_only_message_kept_without_message_groups(self):
+        other_rule = event_rule.EventRule("smbus_device", "(.*)(SMBus device)(.*)")
+        row = self.fake_table.append_event(other_rule, None, self.fake_details,
+                                           self.fake_timestamp_us)
+
+        self.assertEqual(self.fake_table.lines[row], "SMBus device 3-55: Read8")
+        self.assertEqual(self.fake_table[row].message, "SMBus device 3-55: Read8")
+        self.assertEqual(self.fake_table[row].message_groups_dict, {})
+
+    def test_empty_message_survives_file_round_trip(self):
+        other_rule = event_rule.EventRule("empty", "(.*)")
+        empty_details = dict(self.fake_details, message="")
+        self.fake_table.append_event(other_rule, None, empty_details, self.fake_timestamp_us)
+
+        table_file = io.BytesIO()
+        self.fake_table.write_to_file(table_file)
+        table_file.seek(0)
+        read_table = log_event_table.read_from_file(table_file, self.fake_table.event_rules)
+
+        self.assertEqual(read_table.lines, [""])
+        self.assertEqual(read_table[0].message, "")
+        self.assertEqual(read_table[0].tag, "empty")
+
+
+if __name__ == "__main__":
+    unittest.main()
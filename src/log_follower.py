@@ -0,0 +1,149 @@
+""" Module for continuously analyzing a live log as it is written """
+
+import json
+import os
+import sys
+import time
+
+import text_generator
+from log_parser import LogParser, STDIN_LOG_PATH
+from sift_pipeline import SiftPipeline
+
+CHECKPOINT_SUFFIX = ".gsyslyzer_checkpoint"
+
+class LogFollower:
+    """ Follows a live log, parsing only the bytes appended since the
+        last poll. The compiled rules, the partial groups of the
+        LogEventParser, and the signal, evaluator, burst and statistics
+        state of every criteria all stay in memory between polls, so
+        each poll only handles the groups the new bytes complete. The
+        byte offset reached is checkpointed so a restart resumes where
+        the last run stopped.
+
+        Attributes
+        ----------
+        log_file_path: string relative file path to the log
+        checkpoint_path: string path to the file storing the offset
+        poll_interval: float seconds to wait between polls
+        verbosity: int level of verbosity for terminal output
+        log_parser: LogParser kept between polls for its compiled rules
+        sift_pipeline: SiftPipeline the completed groups are sent through
+        event_parser: LogEventParser holding the partial groups
+        group_parser: EventGroupParser holding the symptoms and bursts
+        offset: int byte offset of the first line not yet parsed
+        log_inode: int inode of the log file the offset is into
+        log_timestamp_decoder: TimestampDecoder built from the log's
+                               creation header, or None until the
+                               header has been read """
+
+    def __init__(self, log_file_path, event_rules, group_rules, criterias,
+                 collect_statistics=False, burst_max_gap=None, checkpoint_path=None,
+                 poll_interval=1.0, verbosity=0):
+        if log_file_path == STDIN_LOG_PATH:
+            raise Exception("Following is not supported when reading the log from stdin.")
+        if not os.path.isfile(log_file_path):
+            raise Exception("Following is only supported for a single log file.")
+
+        self.log_file_path = log_file_path
+        self.checkpoint_path = checkpoint_path
+        self.poll_interval = poll_interval
+        self.verbosity = verbosity
+
+        if self.checkpoint_path is None:
+            self.checkpoint_path = log_file_path + CHECKPOINT_SUFFIX
+
+        self.log_parser = LogParser(log_file_path, event_rules)
+        if self.log_parser.compression is not None:
+            raise Exception("Following is not supported for compressed logs.")
+
+        self.sift_pipeline = SiftPipeline([], group_rules, criterias, collect_statistics,
+                                          burst_max_gap)
+        self.sift_pipeline.start()
+        self.event_parser = self.sift_pipeline.event_parser
+        self.group_parser = self.sift_pipeline.group_parser
+
+        self.log_inode = os.stat(log_file_path).st_ino
+        self.offset = self.load_checkpoint()
+        self.log_timestamp_decoder = None
+
+    def load_checkpoint(self):
+        """ Returns the offset stored by a previous run, or 0 when there
+            is none or the log has since been replaced or truncated. """
+
+        try:
+            with open(self.checkpoint_path) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+        except (OSError, ValueError):
+            return 0
+
+        log_size = os.stat(self.log_file_path).st_size
+        if checkpoint.get("inode") != self.log_inode or checkpoint.get("offset", 0) > log_size:
+            return 0
+
+        return checkpoint["offset"]
+
+    def save_checkpoint(self):
+        checkpoint = {
+            "log_file_path": self.log_file_path,
+            "inode": self.log_inode,
+            "offset": self.offset
+        }
+
+        temp_checkpoint_path = self.checkpoint_path + ".tmp"
+        with open(temp_checkpoint_path, "w") as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(temp_checkpoint_path, self.checkpoint_path)
+
+    def poll(self):
+        """ Parses the lines appended since the last poll through every
+            stage and returns the symptoms they confirmed. """
+
+        log_stat = os.stat(self.log_file_path)
+        if log_stat.st_ino != self.log_inode or log_stat.st_size < self.offset:
+            # The log was rotated or truncated, so start it over
+            self.log_inode = log_stat.st_ino
+            self.offset = 0
+            self.log_timestamp_decoder = None
+
+        # The header may not be fully written yet, so the decoder is
+        # rebuilt until the log's creation year is known
+        if self.log_timestamp_decoder is None or self.log_timestamp_decoder.log_year is None:
+            self.log_timestamp_decoder = self.log_parser.read_timestamp_decoder()
+
+        new_offset = self.log_parser.parse_appended_lines(self.offset,
+                                                          self.log_timestamp_decoder)
+        if new_offset == self.offset:
+            return []
+
+        new_log_events = self.log_parser.log_events_found
+        self.log_parser.clear_log_events()
+        self.offset = new_offset
+
+        # The groups are not kept once they are through the pipeline
+        new_event_groups = self.event_parser.group_new_log_events(new_log_events)
+        new_symptoms = self.sift_pipeline.send_event_groups(new_event_groups)
+
+        self.save_checkpoint()
+        return new_symptoms
+
+    def follow(self):
+        """ Polls the log until interrupted, writing each symptom to the
+            terminal as soon as it is confirmed, and then writes the
+            summary of everything found while following. """
+
+        output_generator = text_generator.TextGenerator(self.group_parser, self.verbosity)
+
+        try:
+            while True:
+                new_symptoms = self.poll()
+                output_generator.write_symptoms(new_symptoms)
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+
+        self.sift_pipeline.finish()
+        output_generator.write_output()
+
+        eviction_report = self.event_parser.get_eviction_report()
+        if eviction_report:
+            print(eviction_report, file=sys.stderr)
@@ -0,0 +1,143 @@
+""" Module for unit testing the live log follower """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import criteria
+import evaluators
+import event_group_rule
+import event_rule
+import log_follower
+import signals
+
+class LogFollowerTest(unittest.TestCase):
+    """ Test suite for the log follower """
+    def setUp(self):
+        super(LogFollowerTest, self).setUp()
+
+        self.event_rules = [event_rule.EventRule("test", "(.*)(I'm a test event)(.*)")]
+        self.group_rules = [event_group_rule.EventGroupRule("test", ["test"])]
+        self.criterias = [
+            criteria.Criteria(
+                symptom_tag="Test Event",
+                signal=signals.ExistenceGroupSignal(tag="test_signal", group_tag="test"),
+                evaluator=evaluators.ExistenceEvaluator(),
+                action_msg="Do Nothing."
+            )
+        ]
+
+        with open("test_data/fake_logs/gsys_fake_log") as fake_log:
+            self.fake_log_lines = fake_log.readlines()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.path_to_live_log = os.path.join(self.temp_dir, "live_log")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        super(LogFollowerTest, self).tearDown()
+
+    def get_follower(self):
+        return log_follower.LogFollower(self.path_to_live_log, self.event_rules,
+                                        self.group_rules, self.criterias)
+
+    def write_live_log(self, lines, mode="a"):
+        with open(self.path_to_live_log, mode) as live_log:
+            live_log.write("".join(lines))
+
+    def test_poll_only_parses_appended_lines(self):
+        # The first 5 lines hold one test event, the rest hold another
+        self.write_live_log(self.fake_log_lines[:5], mode="w")
+        follower = self.get_follower()
+
+        self.assertEqual(len(follower.poll()), 1)
+        self.assertEqual(follower.poll(), [])
+
+        self.write_live_log(self.fake_log_lines[5:])
+        self.assertEqual(len(follower.poll()), 1)
+        self.assertEqual(len(follower.group_parser.symptoms_found), 2)
+
+    def test_bursts_carry_over_between_polls(self):
+        self.write_live_log(self.fake_log_lines[:5], mode="w")
+        follower = self.get_follower()
+        follower.poll()
+
+        self.write_live_log(self.fake_log_lines[5:])
+        follower.poll()
+        follower.sift_pipeline.finish()
+
+        # Groups are handed on rather than kept, while the open burst
+        # runs on across the polls
+        self.assertEqual(follower.event_parser.event_groups_found, [])
+        self.assertEqual([burst.symptom_count for burst in follower.group_parser.bursts], [2])
+
+    def test_statistics_accumulate_between_polls(self):
+        self.write_live_log(self.fake_log_lines[:5], mode="w")
+        follower = log_follower.LogFollower(self.path_to_live_log, self.event_rules,
+                                            self.group_rules, self.criterias,
+                                            collect_statistics=True)
+        signal_accumulator = follower.sift_pipeline.criteria_signal_accumulators[0]
+        follower.poll()
+        self.assertEqual(signal_accumulator.signal_count, 1)
+
+        self.write_live_log(self.fake_log_lines[5:])
+        follower.poll()
+        self.assertEqual(signal_accumulator.signal_count, 2)
+
+        follower.sift_pipeline.finish()
+        statistics_summary = follower.group_parser.statistics_summaries["test_signal"]
+        self.assertEqual(statistics_summary["durations_data_seconds"]["p50"],
+                         signal_accumulator.durations.get_summary()["p50"])
+
+    def test_partial_line_waits_for_next_poll(self):
+        self.write_live_log(self.fake_log_lines[:3], mode="w")
+        self.write_live_log([self.fake_log_lines[3][:20]])
+        follower = self.get_follower()
+
+        self.assertEqual(follower.poll(), [])
+
+        self.write_live_log([self.fake_log_lines[3][20:]])
+        self.assertEqual(len(follower.poll()), 1)
+
+    def test_header_read_once_written(self):
+        self.write_live_log([], mode="w")
+        follower = self.get_follower()
+        self.assertEqual(follower.poll(), [])
+
+        self.write_live_log([self.fake_log_lines[0][:10]])
+        self.assertEqual(follower.poll(), [])
+
+        self.write_live_log([self.fake_log_lines[0][10:]] + self.fake_log_lines[1:5])
+        self.assertEqual(len(follower.poll()), 1)
+
+    def test_rotation_starts_log_over(self):
+        self.write_live_log(self.fake_log_lines[:5], mode="w")
+        follower = self.get_follower()
+        self.assertEqual(len(follower.poll()), 1)
+
+        # A rotated log of the same size is only told apart by its inode
+        rotated_log_path = self.path_to_live_log + ".new"
+        with open(rotated_log_path, "w") as rotated_log:
+            rotated_log.write("".join(self.fake_log_lines[:5]))
+        os.replace(rotated_log_path, self.path_to_live_log)
+        self.assertEqual(len(follower.poll()), 1)
+
+        # A truncated log is shorter than the offset reached
+        self.write_live_log(self.fake_log_lines[:4], mode="w")
+        self.assertEqual(len(follower.poll()), 1)
+
+    def test_restart_resumes_from_checkpoint(self):
+        self.write_live_log(self.fake_log_lines[:5], mode="w")
+        self.assertEqual(len(self.get_follower().poll()), 1)
+
+        self.write_live_log(self.fake_log_lines[5:])
+        restarted_follower = self.get_follower()
+
+        # Only the event appended after the checkpoint is found again
+        self.assertEqual(len(restarted_follower.poll()), 1)
+        self.assertEqual(len(restarted_follower.group_parser.symptoms_found), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
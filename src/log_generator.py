@@ -0,0 +1,218 @@
+""" Module for generating synthetic Gsys logs to test and benchmark with """
+
+import argparse
+import datetime
+import random
+
+# Relative weights of the scenarios written between noise lines
+DEFAULT_EVENT_MIX = {
+    "hotplug_flood": 2,
+    "rescan_loop": 2,
+    "smbus_spam": 2,
+    "pcie_error": 1,
+    "sigterm": 1,
+    "sigsegv": 1,
+    "startup": 1
+}
+
+DEFAULT_NOISE_RATIO = 0.9
+DEFAULT_START_TIME = datetime.datetime(2019, 12, 31, 23, 0, 0)
+WRITE_BATCH_LINES = 10000
+
+SOURCE_FILES = ["gsysd.cc", "platform.cc", "pcie.cc", "smbus.cc", "hotplug.cc",
+                "rpc_server.cc", "sensor_poller.cc"]
+
+NOISE_MESSAGES = [
+    "polling sensor {0} returned {1} mC",
+    "rpc GetInventory from client {0} served in {1} us",
+    "fan {0} speed set to {1} rpm",
+    "refreshing inventory cache entry {0} (generation {1})",
+    "health check {0} passed after {1} ms",
+    "publishing metric /gsys/sensor/{0} value {1}"
+]
+
+HOTPLUG_SUBSYSTEMS = ["pci", "usb", "i2c", "block"]
+HOTPLUG_ACTIONS = ["add", "remove", "change"]
+SMBUS_FAILURE_TYPES = ["Read8", "Read16", "Write8", "ReadBlock"]
+
+class LogGenerator:
+    """ Writes a glog format Gsys log with a "Log file created at:"
+        header. The log is a stream of noise lines interleaved with
+        scenarios, each a run of related lines such as a hotplug flood,
+        a platform rescan loop, SMBus error spam or a SIGTERM and
+        restart. Timestamps only move forward, so long logs may roll
+        over into the next year.
+
+        Attributes
+        ----------
+        size_bytes: int size the log is written up to
+        event_mix: dict of relative scenario weights with the scenario
+                   name as key
+        noise_ratio: float fraction of lines that are noise
+        start_time: datetime of the header and the first line
+        random: random.Random seeded so a seed always gives the same log
+        current_time: datetime of the most recently written line
+        line_count: int number of lines written after the header
+        scenarios: list of names of the scenarios with a positive weight
+        scenario_weights: list of the weight of each scenario """
+
+    def __init__(self, size_bytes, event_mix=None, noise_ratio=DEFAULT_NOISE_RATIO,
+                 start_time=DEFAULT_START_TIME, seed=0):
+        if event_mix is None:
+            event_mix = DEFAULT_EVENT_MIX
+        if not 0 <= noise_ratio < 1:
+            raise Exception("Noise ratio must be at least 0 and less than 1.")
+
+        for scenario in event_mix:
+            if not hasattr(self, "write_" + scenario):
+                raise Exception("Unknown log scenario: {0}".format(scenario))
+
+        self.size_bytes = size_bytes
+        self.event_mix = event_mix
+        self.noise_ratio = noise_ratio
+        self.start_time = start_time
+        self.random = random.Random(seed)
+
+        self.current_time = start_time
+        self.line_count = 0
+
+        self.scenarios = [scenario for scenario in event_mix if event_mix[scenario] > 0]
+        self.scenario_weights = [event_mix[scenario] for scenario in self.scenarios]
+
+    def write_log(self, path_to_log):
+        """ Writes the log to the path and returns the number of lines
+            written after the header. """
+
+        with open(path_to_log, "w") as log_file:
+            header = "Log file created at: {0}\n".format(
+                self.start_time.strftime("%Y/%m/%d %H:%M:%S"))
+            log_file.write(header)
+            written_bytes = len(header)
+
+            while written_bytes < self.size_bytes:
+                batch = self.generate_lines(WRITE_BATCH_LINES)
+                batch_text = "\n".join(batch) + "\n"
+
+                log_file.write(batch_text)
+                written_bytes += len(batch_text)
+
+        return self.line_count
+
+    def generate_lines(self, min_line_count):
+        """ Returns at least min_line_count new lines, ending on a whole
+            scenario. """
+
+        lines = []
+        while len(lines) < min_line_count:
+            if not self.scenarios or self.random.random() < self.noise_ratio:
+                self.write_noise(lines)
+            else:
+                scenario = self.random.choices(self.scenarios, self.scenario_weights)[0]
+                getattr(self, "write_" + scenario)(lines)
+
+        return lines
+
+    def format_line(self, message_type, message, delay_ms=None):
+        """ Advances the clock and formats a line logged at the new time. """
+
+        if delay_ms is None:
+            delay_ms = self.random.uniform(1, 500)
+        self.current_time += datetime.timedelta(milliseconds=delay_ms)
+        self.line_count += 1
+
+        return "{0}{1} {2:>5} {3}:{4}] {5}".format(
+            message_type, self.current_time.strftime("%m%d %H:%M:%S.%f"),
+            self.random.randint(1000, 99999), self.random.choice(SOURCE_FILES),
+            self.random.randint(10, 2000), message)
+
+    def write_noise(self, lines):
+        message = self.random.choice(NOISE_MESSAGES).format(self.random.randint(0, 64),
+                                                            self.random.randint(0, 100000))
+        lines.append(self.format_line("I", message))
+
+    def write_hotplug_flood(self, lines):
+        for _ in range(self.random.randint(5, 50)):
+            lines.append(self.format_line("I", self.get_hotplug_message(),
+                                          self.random.uniform(0.1, 5)))
+
+    def write_rescan_loop(self, lines):
+        # Rescans less than 5 seconds apart are a rescan loop
+        for _ in range(self.random.randint(2, 6)):
+            lines.append(self.format_line("I", "launching scheduled platform rebuild",
+                                          self.random.uniform(500, 4000)))
+            for _ in range(self.random.randint(0, 3)):
+                lines.append(self.format_line("I", self.get_hotplug_message(),
+                                              self.random.uniform(1, 50)))
+            lines.append(self.format_line("I", "successfully reinitialized platform",
+                                          self.random.uniform(100, 1000)))
+
+    def write_smbus_spam(self, lines):
+        device = "{0}-{1:04d}".format(self.random.randint(0, 9), self.random.randint(0, 99))
+        for _ in range(self.random.randint(3, 30)):
+            message = "SMBus device {0}: {1} failure: bus timeout".format(
+                device, self.random.choice(SMBUS_FAILURE_TYPES))
+            lines.append(self.format_line("E", message, self.random.uniform(1, 100)))
+
+    def write_pcie_error(self, lines):
+        message = "Failed read of reg {0} for device at 0000:{1:02d}:00.{2}".format(
+            self.random.randint(0, 255), self.random.randint(0, 255), self.random.randint(0, 7))
+        lines.append(self.format_line("E", message))
+
+    def write_sigterm(self, lines):
+        lines.append(self.format_line("W", "Received signal SIGTERM, shutting down"))
+        self.write_startup(lines)
+
+    def write_sigsegv(self, lines):
+        lines.append(self.format_line("F", "*** SIGSEGV (@0x0) received by PID {0} ***".format(
+            self.random.randint(100, 30000))))
+        self.write_startup(lines)
+
+    def write_startup(self, lines):
+        # Startups taking more than a second are slow
+        lines.append(self.format_line("I", "gsysd version: 1.{0}.{1}".format(
+            self.random.randint(0, 9), self.random.randint(0, 99)), self.random.uniform(500, 5000)))
+        lines.append(self.format_line("I", "initializing gsys server",
+                                      self.random.uniform(50, 2000)))
+
+    def get_hotplug_message(self):
+        device_number = self.random.randint(0, 31)
+        return ('queueing hotplug event for post rebuild processing: subsystem: "{0}" '
+                'action: "{1}" device_link: "/dev/gsys{2}" devpath: '
+                '"/devices/pci0000:00/0000:00:{2:02x}.0"').format(
+                    self.random.choice(HOTPLUG_SUBSYSTEMS), self.random.choice(HOTPLUG_ACTIONS),
+                    device_number)
+
+def parse_event_mix(event_mix_str):
+    """ Parses an event mix written as scenario=weight pairs separated
+        by commas.
+
+        ex: "hotplug_flood=3,sigterm=1" => {"hotplug_flood": 3, "sigterm": 1} """
+
+    event_mix = {}
+    for scenario_weight in event_mix_str.split(","):
+        scenario, _, weight = scenario_weight.partition("=")
+        event_mix[scenario.strip()] = float(weight) if weight else 1.0
+
+    return event_mix
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic Gsys log generator")
+    parser.add_argument("--output_path", required=True,
+                        help=("Path to write the log to"))
+    parser.add_argument("--size_mb", default=10,
+                        type=float, help=("Size of the log in megabytes"))
+    parser.add_argument("--event_mix", default=None,
+                        help=("Comma separated scenario=weight pairs from: "
+                              + ", ".join(DEFAULT_EVENT_MIX)))
+    parser.add_argument("--noise_ratio", default=DEFAULT_NOISE_RATIO,
+                        type=float, help=("Fraction of lines that are noise"))
+    parser.add_argument("--seed", default=0,
+                        type=int, help=("Seed for generating the same log again"))
+    flags = parser.parse_args()
+
+    event_mix = parse_event_mix(flags.event_mix) if flags.event_mix else None
+    generator = LogGenerator(int(flags.size_mb * (1 << 20)), event_mix,
+                             flags.noise_ratio, seed=flags.seed)
+    line_count = generator.write_log(flags.output_path)
+
+    print("Wrote {0} lines to {1}".format(line_count, flags.output_path))
@@ -0,0 +1,66 @@
+""" Module for unit testing the synthetic log generator """
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+import constants
+import gsys_pipeline
+import log_generator
+from log_parser import LogParser
+
+class LogGeneratorTest(unittest.TestCase):
+    """ Test suite for the log generator """
+    def setUp(self):
+        super(LogGeneratorTest, self).setUp()
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.path_to_log = os.path.join(self.temp_dir, "generated_log")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        super(LogGeneratorTest, self).tearDown()
+
+    def test_log_is_valid_glog(self):
+        generator = log_generator.LogGenerator(50000, seed=1)
+        line_count = generator.write_log(self.path_to_log)
+
+        with open(self.path_to_log) as generated_log:
+            lines = generated_log.read().splitlines()
+
+        self.assertGreaterEqual(os.path.getsize(self.path_to_log), 50000)
+        self.assertEqual(len(lines), line_count + 1)
+        self.assertRegex(lines[0], constants.RegularExpressions.LOG_CREATION_REGEX.value)
+
+        details_regex = re.compile(constants.RegularExpressions.LOG_LINE_DETAILS_REGEX.value)
+        for line in lines[1:]:
+            self.assertIsNotNone(details_regex.match(line))
+
+    def test_every_scenario_is_detected(self):
+        log_generator.LogGenerator(200000, noise_ratio=0.5, seed=1).write_log(self.path_to_log)
+        event_rules = gsys_pipeline.build_gsys_sifter_builder().event_rules
+
+        parser = LogParser(self.path_to_log, event_rules)
+        parser.parse_log()
+
+        self.assertEqual(set(parser.log_events_found_dict), {rule.tag for rule in event_rules})
+
+        timestamps = [event.timestamp_us for event in parser.log_events_found]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_event_mix_limits_scenarios(self):
+        generator = log_generator.LogGenerator(20000, log_generator.parse_event_mix("sigterm=1"),
+                                               noise_ratio=0, seed=1)
+        generator.write_log(self.path_to_log)
+
+        with open(self.path_to_log) as generated_log:
+            self.assertNotIn("SMBus", generated_log.read())
+
+        with self.assertRaises(Exception):
+            log_generator.LogGenerator(100, {"unknown_scenario": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
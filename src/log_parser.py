@@ -1,9 +1,19 @@
 """ Module for parsing a raw Gsys log into predefined events """
 
+import concurrent.futures
+import mmap
+import os
 import re
+import sys
 
+import compressed_log
 import constants
-import log_event
+import log_event_table
+import rule_set
+import timestamp_decoder
+
+STDIN_LOG_PATH = "-"
+DEFAULT_BATCH_LINE_COUNT = 10000
 
 class LogParser:
     """ Parser that loads, preproccesses, and extracts events from the
@@ -12,70 +22,425 @@ class LogParser:
         Attributes
         ----------
         log_line_details_regex: compiled regex for extracting log line
-        path_to_raw_log: relative path to raw log to be ingested
-        raw_log: string of the entire raw log
-        log_lines: list of string lines that comprise the log
+        bytes_log_line_details_regex: log_line_details_regex compiled for
+                                      bytes, applied to mapped lines
+        use_mmap: boolean denoting if the log should be parsed over a
+                  memory map of the file using bytes regexes
+        workers: int number of processes to split parsing of the log
+                 across, where 1 parses the log in this process
+        path_to_raw_log: relative path to raw log to be ingested, or "-"
+                         to read the log from stdin
+        compression: name of the compression format of the log, or None
+                     when the log is not compressed
         event_rules: list of EventRules to search for in the log
-        log_events_found: list of chronological LogEvents found
-        log_events_found_dict: dict of LogEvents found in the log with tag as key
+        event_rule_set: EventRuleSet compiled from event_rules, used to
+                        select the rules whose anchors appear in a line
+        log_events_found: LogEventTable of chronological LogEvents found
+        log_events_found_dict: dict of LogEvents found in the log with tag
+                               as key, built from log_events_found when read
     """
 
-    def __init__(self, path_to_raw_log, event_rules):
+    def __init__(self, path_to_raw_log, event_rules, use_mmap=False, workers=1):
         line_details_regex = constants.RegularExpressions.LOG_LINE_DETAILS_REGEX.value
         self.log_line_details_regex = re.compile(line_details_regex) 
+        self.bytes_log_line_details_regex = re.compile(line_details_regex.encode())
         self.path_to_raw_log = path_to_raw_log
         self.event_rules = event_rules
+        self.event_rule_set = rule_set.EventRuleSet(event_rules)
+
+        if path_to_raw_log == STDIN_LOG_PATH:
+            self.compression = None
+        else:
+            self.compression = compressed_log.detect_compression(path_to_raw_log)
+
+        # Only uncompressed files can be mapped or split into byte ranges
+        is_seekable = path_to_raw_log != STDIN_LOG_PATH and self.compression is None
+        self.use_mmap = use_mmap and is_seekable
+        self.workers = workers if is_seekable else 1
 
-        self.log_events_found = []
-        self.log_events_found_dict = {}
+        self.log_events_found = log_event_table.LogEventTable(event_rules)
+
+    @property
+    def log_events_found_dict(self):
+        return self.log_events_found.get_events_by_tag()
 
-        self.raw_log = self.load_log()
-        self.log_lines = self.raw_log.split('\n')
-        
     def load_log(self):
+        """ Opens the raw log for reading without loading it into memory.
+            Compressed logs are decompressed on a background thread as
+            their lines are read. """
+
+        if self.path_to_raw_log == STDIN_LOG_PATH:
+            return sys.stdin
+
         try:
-            with open(self.path_to_raw_log) as raw_log:
-                loaded_log = str(raw_log.read())
-                return loaded_log
+            if self.compression is None:
+                return open(self.path_to_raw_log)
+
+            compressed_raw_log = compressed_log.open_compressed_log(self.path_to_raw_log,
+                                                                    self.compression)
+            return compressed_log.ThreadedLineReader(compressed_raw_log)
         except:
             raise Exception("Something went wrong loading the log file.")
 
-    def extract_year(self, line):
+    def read_log_lines(self):
+        """ Lazily yields the lines of the raw log with their line endings
+            removed, so only the current line is held in memory. """
+
+        raw_log = self.load_log()
+
+        try:
+            for line in raw_log:
+                if line.endswith("\n"):
+                    line = line[:-1]
+                yield line
+        finally:
+            if raw_log is not sys.stdin:
+                raw_log.close()
+
+    def get_timestamp_decoder(self, line):
+        """ Builds the TimestampDecoder for a log from its creation header
+            line, which supplies the year and month missing from the
+            timestamps of every other line. """
+
         creation_regex = constants.RegularExpressions.LOG_CREATION_REGEX.value
-        log_creation_regex = re.compile(creation_regex)
-        log_creation_match = log_creation_regex.match(line)
+        log_creation_match = re.match(creation_regex, line)
 
         if log_creation_match:
-            return log_creation_match.group('year')
-        return None
+            log_year = int(log_creation_match.group('year'))
+            log_month = int(log_creation_match.group('month'))
+            return timestamp_decoder.TimestampDecoder(log_year, log_month)
+        return timestamp_decoder.TimestampDecoder(None)
 
     def parse_log(self):
+        if self.workers > 1:
+            self.parse_log_in_parallel()
+            return
+
+        if self.use_mmap:
+            self.parse_mapped_log()
+            return
+
         first_line = True
-        log_year = None
+        log_timestamp_decoder = None
 
-        for line in self.log_lines:
+        for line in self.read_log_lines():
 
             if first_line:
-                log_year = self.extract_year(line)
+                log_timestamp_decoder = self.get_timestamp_decoder(line)
                 first_line = False
                 continue
 
-            for rule in self.event_rules:
-                result = self.apply_rule(line, rule)
+            self.parse_line(line, log_timestamp_decoder)
+
+    def iter_log_event_batches(self, batch_line_count=DEFAULT_BATCH_LINE_COUNT):
+        """ Parses the log a batch of lines at a time, yielding a
+            LogEventTable of the events found in each batch as soon as
+            it is parsed. The found events are cleared after each batch
+            so only the events still in use are kept in memory. """
+
+        first_line = True
+        log_timestamp_decoder = None
+        line_count = 0
+
+        for line in self.read_log_lines():
+
+            if first_line:
+                log_timestamp_decoder = self.get_timestamp_decoder(line)
+                first_line = False
+                continue
+
+            self.parse_line(line, log_timestamp_decoder)
+            line_count += 1
+
+            if line_count % batch_line_count == 0:
+                yield self.log_events_found
+                self.clear_log_events()
+
+        yield self.log_events_found
+        self.clear_log_events()
+
+    def parse_line(self, line, log_timestamp_decoder):
+        """ Applies the event rules whose anchors appear in a single line
+            and stores the LogEvents they produce. """
+
+        for rule in self.event_rule_set.get_candidate_rules(line):
+            result = self.apply_rule(line, rule)
+
+            if result is not None:
+                self.add_log_event(line, rule, log_timestamp_decoder)
+
+    def add_log_event(self, line, rule, log_timestamp_decoder):
+        """ Stores a line matched by the given rule as a new row of the
+            found events table. No LogEvent is built for the row until
+            a group rule reads it. """
 
-                if result is not None:
-                    tag = rule.tag
+        log_line_details_dict = self.extract_log_line_details(line)
+        self.store_log_event(rule, line, log_line_details_dict, log_timestamp_decoder)
 
-                    log_line_details_dict = self.extract_log_line_details(line)
-                    log_line_details_dict['year'] = log_year
-                    new_log_event = log_event.LogEvent(tag, log_line_details_dict, result)
+    def store_log_event(self, rule, line, log_line_details_dict, log_timestamp_decoder):
+        timestamp_us = log_timestamp_decoder.decode(log_line_details_dict['date'],
+                                                    log_line_details_dict['timestamp'])
+        self.log_events_found.append_event(rule, line, log_line_details_dict, timestamp_us)
+
+    def parse_log_in_parallel(self):
+        """ Splits the log into one byte range per worker, aligned to line
+            boundaries, and parses each range in a separate process. The
+            chunk tables are merged back in file order, so the events
+            found match those of parsing the log serially. """
+
+        try:
+            raw_log = open(self.path_to_raw_log, "rb")
+        except:
+            raise Exception("Something went wrong loading the log file.")
+
+        with raw_log:
+            header_line = self.decode_raw_line(raw_log.readline())
+            log_timestamp_decoder = self.get_timestamp_decoder(header_line)
+
+            body_start = raw_log.tell()
+            log_size = os.fstat(raw_log.fileno()).st_size
+            chunk_bounds = self.get_chunk_bounds(raw_log, body_start, log_size)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as executor:
+            chunk_futures = [executor.submit(parse_log_chunk, self.path_to_raw_log,
+                                             self.event_rules, self.use_mmap,
+                                             chunk_start, chunk_end,
+                                             log_timestamp_decoder)
+                             for chunk_start, chunk_end in chunk_bounds]
+
+            for chunk_future in chunk_futures:
+                self.add_log_events_table(chunk_future.result())
+
+    def get_chunk_bounds(self, raw_log, body_start, log_size):
+        """ Splits [body_start, log_size) into one byte range per worker
+            where every range starts at the beginning of a line. """
+
+        chunk_size = max((log_size - body_start) // self.workers, 1)
+        chunk_starts = [body_start]
+
+        for worker_index in range(1, self.workers):
+            approximate_start = body_start + worker_index * chunk_size
+            if approximate_start >= log_size:
+                break
+
+            # Move forward to the start of the next line
+            raw_log.seek(approximate_start - 1)
+            raw_log.readline()
+            chunk_start = raw_log.tell()
+
+            if chunk_start > chunk_starts[-1] and chunk_start < log_size:
+                chunk_starts.append(chunk_start)
+
+        chunk_ends = chunk_starts[1:] + [log_size]
+        return list(zip(chunk_starts, chunk_ends))
+
+    def parse_log_range(self, start, end, log_timestamp_decoder):
+        """ Parses the lines of the log file that start within the byte
+            range [start, end). """
+
+        try:
+            raw_log = open(self.path_to_raw_log, "rb")
+        except:
+            raise Exception("Something went wrong loading the log file.")
+
+        with raw_log:
+            if self.use_mmap:
+                with mmap.mmap(raw_log.fileno(), 0, access=mmap.ACCESS_READ) as mapped_log:
+                    self.parse_mapped_range(mapped_log, start, end, log_timestamp_decoder)
+                return
+
+            raw_log.seek(start)
+            line_start = start
+
+            while line_start < end:
+                raw_line = raw_log.readline()
+                if not raw_line:
+                    break
+
+                line_start += len(raw_line)
+                self.parse_line(self.decode_raw_line(raw_line), log_timestamp_decoder)
+
+    def read_timestamp_decoder(self):
+        """ Builds the TimestampDecoder from the creation header on the
+            first line of the log file. """
+
+        try:
+            raw_log = open(self.path_to_raw_log, "rb")
+        except:
+            raise Exception("Something went wrong loading the log file.")
 
-                    self.log_events_found.append(new_log_event)
-                    
-                    if tag not in self.log_events_found_dict:
-                        self.log_events_found_dict[tag] = [new_log_event]
-                    else:
-                        self.log_events_found_dict[tag].append(new_log_event)
+        with raw_log:
+            header_line = self.decode_raw_line(raw_log.readline())
+
+        return self.get_timestamp_decoder(header_line)
+
+    def parse_appended_lines(self, start, log_timestamp_decoder):
+        """ Parses the complete lines written to the log file after byte
+            offset start, which must be the start of a line, and returns
+            the offset just past the last complete line. A line still
+            being written is left for the next call. """
+
+        try:
+            raw_log = open(self.path_to_raw_log, "rb")
+        except:
+            raise Exception("Something went wrong loading the log file.")
+
+        with raw_log:
+            raw_log.seek(start)
+            offset = start
+
+            for raw_line in raw_log:
+                if not raw_line.endswith(b"\n"):
+                    break
+
+                if offset > 0:
+                    self.parse_line(self.decode_raw_line(raw_line), log_timestamp_decoder)
+                offset += len(raw_line)
+
+        return offset
+
+    def clear_log_events(self):
+        """ Drops the events found so far, such as once they have been
+            handed on while following a live log. """
+
+        self.log_events_found = log_event_table.LogEventTable(self.event_rules)
+
+    def add_log_events_table(self, events_table):
+        """ Appends the events of a table parsed from a later part of the
+            log to the events found. """
+
+        self.log_events_found.extend(events_table)
+
+    def parse_mapped_log(self):
+        """ Parses the log over a read only memory map of the file. Rules
+            are applied to the mapped bytes directly, so only lines that
+            match a rule are ever decoded into strings. """
+
+        try:
+            raw_log = open(self.path_to_raw_log, "rb")
+        except:
+            raise Exception("Something went wrong loading the log file.")
+
+        with raw_log:
+            if os.fstat(raw_log.fileno()).st_size == 0:
+                return
+
+            with mmap.mmap(raw_log.fileno(), 0, access=mmap.ACCESS_READ) as mapped_log:
+                header_end = mapped_log.find(b"\n")
+                if header_end == -1:
+                    header_end = len(mapped_log)
+
+                header_line = self.decode_mapped_line(mapped_log, 0, header_end)
+                log_timestamp_decoder = self.get_timestamp_decoder(header_line)
+
+                self.parse_mapped_range(mapped_log, header_end + 1,
+                                        len(mapped_log), log_timestamp_decoder)
+
+    def parse_mapped_range(self, mapped_log, start, end, log_timestamp_decoder):
+        """ Applies the event rules to every line that starts within the
+            byte range [start, end) of the mapped log. When every rule
+            has a literal anchor, the anchors are searched for over the
+            whole range at once and only the lines holding one are
+            parsed, otherwise each line is parsed in turn. """
+
+        anchor_regex = self.event_rule_set.bytes_anchor_regex
+
+        if anchor_regex is None or self.event_rule_set.unanchored_rule_indices:
+            self.parse_mapped_lines(mapped_log, start, end, log_timestamp_decoder)
+            return
+
+        # The last line starting in the range may run on past its end
+        scan_end = len(mapped_log)
+        if end < scan_end:
+            last_newline = mapped_log.find(b"\n", end - 1)
+            if last_newline != -1:
+                scan_end = last_newline
+
+        next_line_start = start
+
+        for anchor_match in anchor_regex.finditer(mapped_log, start, scan_end):
+            anchor_start = anchor_match.start()
+            if anchor_start < next_line_start:
+                # The line holding this anchor has already been parsed
+                continue
+
+            line_start = mapped_log.rfind(b"\n", next_line_start, anchor_start) + 1
+            if line_start == 0:
+                line_start = next_line_start
+
+            line_end = mapped_log.find(b"\n", anchor_start)
+            if line_end == -1:
+                line_end = len(mapped_log)
+            next_line_start = line_end + 1
+
+            self.parse_mapped_line(mapped_log, line_start, strip_carriage_return(
+                mapped_log, line_start, line_end), log_timestamp_decoder)
+
+    def parse_mapped_lines(self, mapped_log, start, end, log_timestamp_decoder):
+        """ Parses every line that starts within the byte range [start,
+            end) of the mapped log in turn. """
+
+        line_start = start
+
+        while line_start < end:
+            line_end = mapped_log.find(b"\n", line_start)
+            if line_end == -1:
+                line_end = len(mapped_log)
+            next_line_start = line_end + 1
+
+            self.parse_mapped_line(mapped_log, line_start, strip_carriage_return(
+                mapped_log, line_start, line_end), log_timestamp_decoder)
+            line_start = next_line_start
+
+    def parse_mapped_line(self, mapped_log, line_start, line_end, log_timestamp_decoder):
+        """ Applies the bytes version of each candidate rule to one mapped
+            line. Once some rule matches it, the line details are matched
+            on the mapped bytes and only their groups are decoded. The
+            whole line is only decoded for a rule with named groups to
+            recover from it. """
+
+        line = None
+        log_line_details_dict = None
+        candidate_rules = self.event_rule_set.get_mapped_candidate_rules(mapped_log,
+                                                                         line_start,
+                                                                         line_end)
+
+        for rule in candidate_rules:
+            rule_message_type = rule.message_type
+
+            if rule_message_type is not None:
+                message_str = chr(mapped_log[line_start]) if line_end > line_start else ""
+                line_message_type = self.convert_string_message_type_to_enum(message_str)
+
+                if line_message_type is None or line_message_type != rule_message_type:
+                    continue
+
+            if rule.detect_mapped(mapped_log, line_start, line_end) is None:
+                continue
+
+            if log_line_details_dict is None:
+                log_line_details_dict = self.extract_mapped_log_line_details(mapped_log,
+                                                                             line_start,
+                                                                             line_end)
+
+            if line is None and rule.has_message_groups:
+                line = self.decode_mapped_line(mapped_log, line_start, line_end)
+
+            self.store_log_event(rule, line, log_line_details_dict, log_timestamp_decoder)
+
+    def decode_mapped_line(self, mapped_log, line_start, line_end):
+        return mapped_log[line_start:line_end].decode("utf-8", errors="replace")
+
+    def decode_raw_line(self, raw_line):
+        """ Decodes a line read in binary mode, removing its line ending
+            the same way reading in text mode would. """
+
+        if raw_line.endswith(b"\r\n"):
+            raw_line = raw_line[:-2]
+        elif raw_line.endswith(b"\n"):
+            raw_line = raw_line[:-1]
+
+        return raw_line.decode("utf-8", errors="replace")
 
     def convert_string_message_type_to_enum(self, line_message_type):
         options = {
@@ -96,13 +461,13 @@ class LogParser:
         rule_message_type = rule.message_type
 
         if rule_message_type is not None:
-            message_str = line[0]
-            line_message_type = constants.MessageType.from_str(message_str)
+            message_str = line[:1]
+            line_message_type = self.convert_string_message_type_to_enum(message_str)
             
             if line_message_type is None or line_message_type != rule_message_type:
                 return None
 
-        match_object = rule.regular_expression.match(line)
+        match_object = rule.detect(line)
         return match_object
 
     def extract_log_line_details(self, line):
@@ -115,6 +480,31 @@ class LogParser:
 
         return log_line_details_dict
 
+    def extract_mapped_log_line_details(self, mapped_log, line_start, line_end):
+        result = self.bytes_log_line_details_regex.match(mapped_log, line_start, line_end)
+        if result:
+            log_line_details_dict = {name: value.decode("utf-8", errors="replace")
+                                     for name, value in result.groupdict().items()}
+        else:
+            print(self.decode_mapped_line(mapped_log, line_start, line_end))
+            raise Exception("Bad file format.")
+
+        return log_line_details_dict
+
+def strip_carriage_return(mapped_log, line_start, line_end):
+    """ Returns the end of a mapped line without a trailing carriage
+        return, matching text mode reading of Windows line endings. """
+
+    if line_end > line_start and mapped_log[line_end - 1] == ord("\r"):
+        return line_end - 1
+    return line_end
 
+def parse_log_chunk(path_to_raw_log, event_rules, use_mmap, start, end,
+                    log_timestamp_decoder):
+    """ Entry point for a worker process that parses the lines starting
+        within one byte range of the log and returns their events. """
 
+    chunk_parser = LogParser(path_to_raw_log, event_rules, use_mmap=use_mmap)
+    chunk_parser.parse_log_range(start, end, log_timestamp_decoder)
 
+    return chunk_parser.log_events_found
@@ -1,10 +1,16 @@
 """ Module for unit testing the raw Gsys log parser """
 
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
 import unittest
 
 import log_parser
 import event_rule
 import constants
+import timestamp_decoder
 
 class LogParserTest(unittest.TestCase):
     """ Test suite for the log parser """
@@ -12,6 +18,7 @@ class LogParserTest(unittest.TestCase):
         super(LogParserTest, self).setUp()
 
         self.path_to_fake_log = "test_data/fake_logs/log_parser_fake_log"
+        self.path_to_gsys_fake_log = "test_data/fake_logs/gsys_fake_log"
 
         self.fake_event_with_message_type = event_rule.EventRule("A", "(.*)(I'm a test event)(.*)", constants.MessageType.INFO)
         self.fake_event = event_rule.EventRule("B", "(.*)(I'm a different test event)(.*)")
@@ -36,13 +43,135 @@ class LogParserTest(unittest.TestCase):
         for key in real_info.keys():
             self.assertEqual(real_info[key], extracted_info[key])
 
-    def test_extract_year(self):
+    def test_get_timestamp_decoder(self):
         line = "Log file created at: 2019/09/24 00:33:03"
-        year = "2019"
 
-        extracted_year = self.fake_parser.extract_year(line)
+        log_timestamp_decoder = self.fake_parser.get_timestamp_decoder(line)
 
-        self.assertEqual(extracted_year, year)
+        self.assertEqual(log_timestamp_decoder.log_year, 2019)
+        self.assertEqual(log_timestamp_decoder.log_month, 9)
+        self.assertIsNone(self.fake_parser.get_timestamp_decoder("not a header").log_year)
+
+    def test_parse_log(self):
+        parser = log_parser.LogParser(self.path_to_gsys_fake_log, [self.fake_event])
+        parser.parse_log()
+
+        events_found = parser.log_events_found
+        self.assertEqual(len(events_found), 2)
+        self.assertEqual(len(parser.log_events_found_dict["B"]), 2)
+
+        # The year from the creation header is applied to every event
+        for event in events_found:
+            self.assertEqual(event.timestamp.year, 2019)
+
+        self.assertEqual(events_found[0].source_file, "fake.cc")
+        self.assertEqual(events_found[1].source_file, "other.cc")
+
+    def test_parse_mapped_log_matches_streamed_log(self):
+        grouped_event = event_rule.EventRule("C", "(.*)(I'm a )(?P<kind>\\w+)( test event)")
+        event_rules = self.fake_events + [grouped_event]
+
+        streamed_parser = log_parser.LogParser(self.path_to_gsys_fake_log, event_rules)
+        streamed_parser.parse_log()
+
+        mapped_parser = log_parser.LogParser(self.path_to_gsys_fake_log, event_rules,
+                                             use_mmap=True)
+        mapped_parser.parse_log()
+
+        streamed_events = streamed_parser.log_events_found
+        mapped_events = mapped_parser.log_events_found
+
+        # Rule A only accepts INFO lines, so the ERROR line is skipped
+        self.assertEqual(len(mapped_parser.log_events_found_dict["A"]), 1)
+        self.assertEqual(len(mapped_events), len(streamed_events))
+
+        for mapped_event, streamed_event in zip(mapped_events, streamed_events):
+            self.assertEqual(mapped_event.tag, streamed_event.tag)
+            self.assertEqual(mapped_event.timestamp, streamed_event.timestamp)
+            self.assertEqual(mapped_event.message, streamed_event.message)
+            self.assertEqual(mapped_event.thread_id, streamed_event.thread_id)
+            self.assertEqual(mapped_event.source_file, streamed_event.source_file)
+            self.assertEqual(mapped_event.message_groups_dict,
+                             streamed_event.message_groups_dict)
+
+        self.assertEqual(mapped_parser.log_events_found_dict["C"][0].message_groups_dict,
+                         {"kind": "different"})
+
+    def test_parse_mapped_range_only_parses_lines_in_range(self):
+        noise_message = "polling sensor 3"
+        event_message = "I'm a test event, I'm a different test event"
+        lines = ["I0924 00:33:04.000001 1 fake.cc:1] " + noise_message,
+                 "I0924 00:33:05.000001 1 fake.cc:2] " + event_message,
+                 "I0924 00:33:06.000001 1 fake.cc:3] I'm a test event"]
+        mapped_log = b"".join(line.encode() + b"\r\n" for line in lines)
+
+        # The range ends within the second line, which is still parsed
+        range_end = mapped_log.index(b"different")
+        log_timestamp_decoder = timestamp_decoder.TimestampDecoder(2019, 9)
+
+        anchored_parser = log_parser.LogParser(self.path_to_gsys_fake_log, self.fake_events,
+                                               use_mmap=True)
+        anchored_parser.parse_mapped_range(mapped_log, 0, range_end, log_timestamp_decoder)
+
+        self.assertEqual([(event.tag, event.message)
+                          for event in anchored_parser.log_events_found],
+                         [("A", event_message), ("B", event_message)])
+
+        # A rule without an anchor needs every line to be tried
+        unanchored_event = event_rule.EventRule("D", "(.*)")
+        unanchored_parser = log_parser.LogParser(self.path_to_gsys_fake_log,
+                                                 self.fake_events + [unanchored_event],
+                                                 use_mmap=True)
+        unanchored_parser.parse_mapped_range(mapped_log, 0, range_end, log_timestamp_decoder)
+
+        self.assertEqual([(event.tag, event.message)
+                          for event in unanchored_parser.log_events_found],
+                         [("D", noise_message), ("A", event_message), ("B", event_message),
+                          ("D", event_message)])
+
+    def test_parse_log_in_parallel_matches_serial_log(self):
+        serial_parser = log_parser.LogParser(self.path_to_gsys_fake_log, self.fake_events)
+        serial_parser.parse_log()
+
+        parallel_parser = log_parser.LogParser(self.path_to_gsys_fake_log, self.fake_events,
+                                               workers=3)
+        parallel_parser.parse_log()
+
+        serial_events = serial_parser.log_events_found
+        parallel_events = parallel_parser.log_events_found
+
+        self.assertEqual(len(parallel_events), len(serial_events))
+        self.assertEqual(parallel_parser.log_events_found_dict.keys(),
+                         serial_parser.log_events_found_dict.keys())
+
+        for parallel_event, serial_event in zip(parallel_events, serial_events):
+            self.assertEqual(parallel_event.tag, serial_event.tag)
+            self.assertEqual(parallel_event.timestamp, serial_event.timestamp)
+            self.assertEqual(parallel_event.source_file, serial_event.source_file)
+
+    def test_parse_compressed_log_matches_uncompressed_log(self):
+        plain_parser = log_parser.LogParser(self.path_to_gsys_fake_log, self.fake_events)
+        plain_parser.parse_log()
+        plain_tags = [event.tag for event in plain_parser.log_events_found]
+
+        with open(self.path_to_gsys_fake_log, "rb") as fake_log:
+            fake_log_bytes = fake_log.read()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for compression_module in [gzip, bz2, lzma]:
+                path_to_compressed_log = os.path.join(temp_dir, "compressed_fake_log")
+                with compression_module.open(path_to_compressed_log, "wb") as compressed_log:
+                    compressed_log.write(fake_log_bytes)
+
+                # Compressed logs can not be mapped, so parsing falls back to streaming
+                compressed_parser = log_parser.LogParser(path_to_compressed_log,
+                                                         self.fake_events, use_mmap=True)
+                self.assertIsNotNone(compressed_parser.compression)
+                self.assertFalse(compressed_parser.use_mmap)
+
+                compressed_parser.parse_log()
+                compressed_tags = [event.tag for event in compressed_parser.log_events_found]
+                self.assertEqual(compressed_tags, plain_tags)
 
 
 if __name__ == "__main__":
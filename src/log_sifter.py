@@ -1,11 +1,21 @@
 """ Module for completing end to end parsing of a log """
 
+import datetime
 import json
+import sys
 
 import constants
 import json_generator
 import text_generator
-from log_parser import LogParser
+import multi_log_parser
+import log_event_table
+import parse_cache
+import rule_bench
+from profiler import Profiler
+from log_parser import LogParser, STDIN_LOG_PATH
+from stage_cache import StageCache, dump_snapshot, load_snapshot
+from log_follower import LogFollower
+from sift_pipeline import SiftPipeline
 from event_parser import LogEventParser
 from group_parser import EventGroupParser 
 from symptom_burst import SymptomBurst
@@ -23,41 +33,262 @@ class LogSifter:
         event_rules: list of EventRule objects to be applied
         group_rules: list of EventGroupRules to be applied
         criterias: list of Criteria objects to be applied
-        flags: argparse Parser object for storing the build flags from the CLI """
+        flags: argparse Parser object for storing the build flags from the CLI
+        stage_cache: StageCache memoizing the output of each stage
+        parse_cache: ParseCache persisting the output of each stage between
+                     runs, or None when no cache directory is given
+        profiler: Profiler recording the cost of each rule, or None when
+                  not profiling """
 
-    def __init__(self, log_file_path, event_rules, group_rules, criterias, flags):
+    def __init__(self, log_file_path, event_rules, group_rules, criterias, flags,
+                 stage_cache=None):
         self.log_file_path = log_file_path
         self.event_rules = event_rules
         self.group_rules = group_rules
         self.criterias = criterias
         self.flags = flags
+        self.stage_cache = stage_cache
+        self.parse_cache = None
+        self.profiler = None
+
+        if self.stage_cache is None:
+            self.stage_cache = StageCache()
 
     def sift_log(self):
         """ Implements the logical flow of the multiple parsing stages. """
 
+        if self.flags.follow:
+            self.follow_log()
+            return
+
+        if self.flags.bench_rules:
+            self.bench_rules()
+            return
+
+        if self.flags.profile or self.flags.profile_json is not None:
+            self.profile_log()
+            return
+
+        if self.flags.pipelined:
+            self.write_output(self.run_pipeline())
+            return
+
+        if self.flags.cache_dir is not None:
+            self.parse_cache = parse_cache.ParseCache(self.flags.cache_dir,
+                                                      self.flags.cache_size_mb)
+
+        group_parser = self.run_stages()
+        self.write_output(group_parser)
+
+    def run_stages(self):
+        """ Runs each parsing stage, or reuses its cached output, and
+            returns the EventGroupParser holding the results. """
+
         # Parse the raw log
-        log_parser = LogParser(self.log_file_path, self.event_rules)
+        log_events, events_key = self.parse_raw_log()
+
+        collect_statistics = self.flags.collect_statistics
+        burst_max_gap = self.get_burst_max_gap()
+
+        # Parse the log events and then the event groups. The groups are
+        # stored with the signal stage's output, so they are only loaded
+        # or parsed on their own when the criteria have changed.
+        groups_key = self.get_stage_key("event_groups", events_key, self.group_rules)
+        signals_key = self.get_stage_key("signals", groups_key, self.criterias,
+                                         collect_statistics, burst_max_gap)
+        event_groups, parse_results = self.run_stage(
+            "signals", signals_key,
+            lambda: self.parse_event_groups(log_events, groups_key, collect_statistics),
+            lambda snapshot_file: load_snapshot(snapshot_file, log_events),
+            dump_snapshot)
+
+        group_parser = EventGroupParser(event_groups, self.criterias,
+                                        collect_statistics, burst_max_gap)
+        group_parser.set_parse_results(parse_results)
+
+        return group_parser
+
+    def run_pipeline(self):
+        """ Runs the stages as a pipeline over batches of the log and
+            returns the EventGroupParser holding the results. The caches
+            are bypassed, as nothing but the results is kept. """
+
+        pipeline = SiftPipeline(self.iter_log_event_batches(), self.group_rules,
+                                self.criterias, self.flags.collect_statistics,
+                                self.get_burst_max_gap())
+        return pipeline.run()
+
+    def iter_log_event_batches(self):
+        """ Yields the events of the log a batch at a time. A directory
+            or glob of logs is merged into a single batch. """
+
+        log_parser = self.get_log_parser()
+
+        if isinstance(log_parser, multi_log_parser.MultiLogParser):
+            log_parser.parse_log()
+            yield log_parser.log_events_found
+            return
+
+        yield from log_parser.iter_log_event_batches()
+
+    def write_output(self, group_parser):
+        if self.flags.json_output:
+            self.output_to_json(group_parser, self.flags.collect_statistics)
+        else:
+            self.output_to_terminal(group_parser)
+
+    def profile_log(self):
+        """ Runs every stage with the cost of each rule recorded, then
+            writes the ranked costs after the usual output. Caches are
+            bypassed and the log is parsed in this process so that all
+            of the work is seen. """
+
+        self.profiler = Profiler()
+        self.profiler.instrument()
+
+        try:
+            group_parser = self.run_stages()
+        finally:
+            self.profiler.remove_instrumentation()
+
+        self.write_output(group_parser)
+
+        if self.flags.profile_json is not None:
+            self.profiler.write_json(self.flags.profile_json)
+        else:
+            self.profiler.write_report()
+
+    def parse_raw_log(self):
+        """ Returns the LogEventTable of events found in the raw log and
+            the key of the log and event rules it was parsed with, which
+            is None when the log is read from stdin or profiled. """
+
+        if self.log_file_path == STDIN_LOG_PATH or self.profiler is not None:
+            return self.parse_log_files(), None
+
+        if multi_log_parser.is_multi_log_path(self.log_file_path):
+            log_file_paths = multi_log_parser.get_log_file_paths(self.log_file_path)
+        else:
+            log_file_paths = [self.log_file_path]
+
+        events_key = parse_cache.get_log_key(log_file_paths, self.event_rules)
+        log_events = self.run_stage(
+            "events", events_key, self.parse_log_files,
+            lambda entry_file: log_event_table.read_from_file(entry_file, self.event_rules),
+            lambda events_table, entry_file: events_table.write_to_file(entry_file))
+
+        return log_events, events_key
+
+    def parse_log_files(self):
+        log_parser = self.get_log_parser()
         log_parser.parse_log()
-        log_events = log_parser.log_events_found
+        return log_parser.log_events_found
 
-        # Parse the log events
+    def parse_log_events(self, log_events):
         event_parser = LogEventParser(log_events, self.group_rules)
         event_parser.parse_log_events()
-        event_groups = event_parser.event_groups_found
 
-        collect_statistics = self.flags.collect_statistics
+        eviction_report = event_parser.get_eviction_report()
+        if eviction_report:
+            print(eviction_report, file=sys.stderr)
+
+        return event_parser.event_groups_found
+
+    def parse_event_groups(self, log_events, groups_key, collect_statistics):
+        """ Returns the event groups found in the log events, and the
+            results of applying the criteria to them. """
+
+        event_groups = self.run_stage(
+            "event_groups", groups_key,
+            lambda: self.parse_log_events(log_events),
+            lambda snapshot_file: load_snapshot(snapshot_file, log_events),
+            dump_snapshot)
 
-        # Parse the event groups
         group_parser = EventGroupParser(event_groups, self.criterias,
-                                        collect_statistics)
+                                        collect_statistics, self.get_burst_max_gap())
         group_parser.parse_event_groups()
-        statistics = group_parser.statistics_summaries
 
-        # Construct the output
-        if self.flags.json_output:
-            self.output_to_json(group_parser, collect_statistics)
-        else:
-            self.output_to_terminal(group_parser)
+        return event_groups, group_parser.get_parse_results()
+
+    def get_burst_max_gap(self):
+        """ Returns the longest gap allowed between the symptoms of a
+            burst as a timedelta, or None when bursts are only broken
+            by innocent signals. """
+
+        if self.flags.burst_max_gap is None:
+            return None
+        return datetime.timedelta(seconds=self.flags.burst_max_gap)
+
+    def get_stage_key(self, stage_name, input_key, *rules):
+        if input_key is None:
+            return None
+        return self.stage_cache.get_stage_key(stage_name, input_key, *rules)
+
+    def run_stage(self, stage_name, stage_key, run_stage, read_entry, write_entry):
+        """ Returns the output of a stage, reusing the output memoized in
+            the stage cache or persisted in the parse cache under the
+            stage key, and otherwise running the stage and storing its
+            output in both. A stage with no key is always run. """
+
+        if stage_key is None:
+            return run_stage()
+
+        output = self.stage_cache.load_output(stage_name, stage_key)
+
+        if output is None and self.parse_cache is not None:
+            output = self.parse_cache.load_entry(stage_key, read_entry)
+
+        if output is None:
+            output = run_stage()
+
+            if self.parse_cache is not None:
+                self.parse_cache.store_entry(stage_key, lambda entry_file:
+                                             write_entry(output, entry_file))
+
+        self.stage_cache.store_output(stage_name, stage_key, output)
+        return output
+
+    def get_log_parser(self):
+        """ Builds the parser for the log, or for every log in the
+            directory or glob given as the log file path. """
+
+        use_mmap = self.flags.mmap
+        workers = self.flags.workers
+
+        if self.profiler is not None:
+            # Rules are only profiled when applied to lines in this process
+            use_mmap = False
+            workers = 1
+
+        if multi_log_parser.is_multi_log_path(self.log_file_path):
+            return multi_log_parser.MultiLogParser(self.log_file_path, self.event_rules,
+                                                   use_mmap=use_mmap, workers=workers)
+
+        return LogParser(self.log_file_path, self.event_rules,
+                         use_mmap=use_mmap, workers=workers or 1)
+
+    def bench_rules(self):
+        """ Times each event rule against a sample of the log's lines and
+            reports which rules dominate parsing time. """
+
+        sample_lines = rule_bench.sample_log_lines(self.log_file_path,
+                                                   self.flags.bench_sample_size)
+        benchmark = rule_bench.RuleBenchmark(self.event_rules, sample_lines)
+        benchmark.run()
+        benchmark.write_report()
+
+    def follow_log(self):
+        """ Keeps analyzing the log as it is written, reporting symptoms
+            as soon as they are confirmed. """
+
+        log_follower = LogFollower(self.log_file_path, self.event_rules,
+                                   self.group_rules, self.criterias,
+                                   collect_statistics=self.flags.collect_statistics,
+                                   burst_max_gap=self.get_burst_max_gap(),
+                                   checkpoint_path=self.flags.checkpoint_path,
+                                   poll_interval=self.flags.poll_interval,
+                                   verbosity=self.flags.verbosity)
+        log_follower.follow()
 
     def output_to_terminal(self, group_parser):
         """ Outputs a listing of each symptom burst and its details to
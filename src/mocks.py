@@ -2,6 +2,10 @@
 
 import datetime
 
+import numpy as np
+
+import signals
+
 class MockLogEvent:
     """ Mock for a LogEvent object """ 
     def __init__(self, tag, timestamp=None, is_context=None):
@@ -9,6 +13,10 @@ class MockLogEvent:
         self.timestamp = timestamp
         self.is_context = is_context
 
+    @property
+    def timestamp_us(self):
+        return signals.get_epoch_microseconds(self.timestamp)
+
 class MockLogEventGroup:
     """ Mock object for an LogEventGroup object """
     def __init__(self, tag, all_mock_events=None):
@@ -39,21 +47,22 @@ class MockCriteria:
     def __init__(self, yes=[]):
         self.yes = yes
 
-    def apply_criteria(self, event_groups, collect_statistics):
+    def apply_criteria(self, event_groups, collect_statistics, signal_plan=None):
         symptoms = []
-        detected_signals = []
-        confirmed_signals = []
+        signal_marks = []
 
         for group in event_groups:
             if group.tag in self.yes:
                 symptoms.append(MockSymptom(group.tag))
-                confirmed_signals.append(group.tag)
 
-            detected_signals.append(group.tag)
+            signal_marks.append(group.tag in self.yes)
+
+        # Each group stands for a signal at the microsecond of its index
+        signal_times_us = np.arange(len(signal_marks), dtype=np.int64)
 
         mocked_output = {
-            "detected_signals": detected_signals,
-            "confirmed_signals": confirmed_signals,
+            "signal_marks": signals.SignalMarks(np.array(signal_marks, dtype=bool),
+                                                signal_times_us, signal_times_us),
             "symptoms": symptoms
         }
 
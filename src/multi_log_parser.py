@@ -0,0 +1,123 @@
+""" Module for parsing a Gsys history split across several rotated logs """
+
+import concurrent.futures
+import glob
+import heapq
+import os
+import re
+
+import constants
+import log_event_table
+from log_parser import LogParser
+
+def is_multi_log_path(path_to_logs):
+    """ Returns True if the path names a directory or glob of logs rather
+        than a single log file. """
+
+    return os.path.isdir(path_to_logs) or glob.has_magic(path_to_logs)
+
+def get_log_file_paths(path_to_logs):
+    """ Expands a directory or glob into the paths of the log files it
+        names, ordered by the creation time in each log's header. """
+
+    if os.path.isdir(path_to_logs):
+        candidate_paths = [os.path.join(path_to_logs, file_name)
+                           for file_name in os.listdir(path_to_logs)
+                           if not file_name.startswith(".")]
+    else:
+        candidate_paths = glob.glob(path_to_logs)
+
+    log_file_paths = [path for path in candidate_paths if os.path.isfile(path)]
+    if len(log_file_paths) == 0:
+        raise Exception("No log files found at {0}.".format(path_to_logs))
+
+    return sorted(log_file_paths, key=get_log_creation_sort_key)
+
+def get_log_creation_sort_key(path_to_log):
+    """ Sort key placing logs in the order they were created, with logs
+        missing a creation header last. """
+
+    header_lines = LogParser(path_to_log, []).read_log_lines()
+    header_line = next(header_lines, "")
+    header_lines.close()
+
+    creation_regex = constants.RegularExpressions.LOG_CREATION_REGEX.value
+    log_creation_match = re.match(creation_regex, header_line)
+
+    if log_creation_match:
+        creation_time = log_creation_match.group("year", "month", "day", "time")
+        return (0, creation_time, path_to_log)
+    return (1, (), path_to_log)
+
+def parse_log_file(path_to_log, event_rules, use_mmap):
+    """ Entry point for a worker process that parses one whole log file
+        and returns its events. """
+
+    file_parser = LogParser(path_to_log, event_rules, use_mmap=use_mmap)
+    file_parser.parse_log()
+
+    return file_parser.log_events_found
+
+class MultiLogParser:
+    """ Parser for a directory or glob of rotated logs, each with its own
+        "Log file created at:" header. The logs are parsed concurrently
+        and their events merged into a single chronological table, so
+        groups and signals spanning a rotation are found as if the logs
+        were one.
+
+        Attributes
+        ----------
+        path_to_logs: path to a directory of logs or a glob of log paths
+        log_file_paths: list of log file paths in creation order
+        event_rules: list of EventRules to search for in the logs
+        use_mmap: boolean denoting if logs should be parsed over a memory
+                  map of each file
+        workers: int number of processes parsing logs concurrently
+        log_events_found: LogEventTable of chronological LogEvents found
+                          across every log
+        log_events_found_dict: dict of LogEvents found in the logs with
+                               tag as key, built from log_events_found
+                               when read """
+
+    def __init__(self, path_to_logs, event_rules, use_mmap=False, workers=None):
+        self.path_to_logs = path_to_logs
+        self.log_file_paths = get_log_file_paths(path_to_logs)
+        self.event_rules = event_rules
+        self.use_mmap = use_mmap
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = max(min(workers, len(self.log_file_paths)), 1)
+
+        self.log_events_found = log_event_table.LogEventTable(event_rules)
+
+    @property
+    def log_events_found_dict(self):
+        return self.log_events_found.get_events_by_tag()
+
+    def parse_log(self):
+        """ Parses every log in a process pool, or in this process when
+            there is a single worker, then merges their events
+            in timestamp order with a k-way heap merge. Events with equal
+            timestamps keep the creation order of their logs. """
+
+        if self.workers == 1:
+            log_file_tables = [parse_log_file(path_to_log, self.event_rules, self.use_mmap)
+                               for path_to_log in self.log_file_paths]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as executor:
+                log_file_futures = [executor.submit(parse_log_file, path_to_log,
+                                                    self.event_rules, self.use_mmap)
+                                    for path_to_log in self.log_file_paths]
+                log_file_tables = [log_file_future.result()
+                                   for log_file_future in log_file_futures]
+
+        merged_rows = heapq.merge(*[self.iter_timestamped_rows(table_index, table)
+                                    for table_index, table in enumerate(log_file_tables)])
+
+        for _, table_index, row in merged_rows:
+            self.log_events_found.append_row(log_file_tables[table_index], row)
+
+    def iter_timestamped_rows(self, table_index, events_table):
+        for row, timestamp_us in enumerate(events_table.timestamps):
+            yield (timestamp_us, table_index, row)
@@ -0,0 +1,63 @@
+""" Module for unit testing the parsing of multiple rotated logs """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import event_rule
+import multi_log_parser
+
+class MultiLogParserTest(unittest.TestCase):
+    """ Test suite for the multiple log parser """
+    def setUp(self):
+        super(MultiLogParserTest, self).setUp()
+
+        self.fake_events = [event_rule.EventRule("A", "(.*)(I'm a test event)(.*)"),
+                            event_rule.EventRule("B", "(.*)(I'm a different test event)(.*)")]
+
+        self.temp_dir = tempfile.mkdtemp()
+
+        # The newer log is named first so the header order is what counts
+        self.write_fake_log("gsysd.log.0", "2019/09/24 00:40:00", [
+            "I0924 00:40:01.000000   22675 fake.cc:10] I'm a test event",
+            "I0924 00:40:03.000000   22675 fake.cc:11] I'm a different test event"
+        ])
+        self.write_fake_log("gsysd.log.1", "2019/09/24 00:30:00", [
+            "I0924 00:30:01.000000   22675 fake.cc:10] I'm a different test event",
+            "I0924 00:40:02.000000   22675 fake.cc:11] I'm a test event"
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        super(MultiLogParserTest, self).tearDown()
+
+    def write_fake_log(self, file_name, creation_time, lines):
+        with open(os.path.join(self.temp_dir, file_name), "w") as fake_log:
+            fake_log.write("Log file created at: " + creation_time + "\n")
+            fake_log.write("\n".join(lines) + "\n")
+
+    def test_log_file_paths_in_creation_order(self):
+        log_file_names = [os.path.basename(path) for path in
+                          multi_log_parser.get_log_file_paths(self.temp_dir)]
+
+        self.assertEqual(log_file_names, ["gsysd.log.1", "gsysd.log.0"])
+
+    def test_events_merged_in_timestamp_order(self):
+        for path_to_logs in [self.temp_dir, os.path.join(self.temp_dir, "gsysd.log.*")]:
+            self.assertTrue(multi_log_parser.is_multi_log_path(path_to_logs))
+
+            parser = multi_log_parser.MultiLogParser(path_to_logs, self.fake_events,
+                                                     workers=2)
+            parser.parse_log()
+
+            events_found = parser.log_events_found
+            timestamps = [event.timestamp for event in events_found]
+
+            self.assertEqual(timestamps, sorted(timestamps))
+            self.assertEqual([event.tag for event in events_found], ["B", "A", "A", "B"])
+            self.assertEqual(len(parser.log_events_found_dict["A"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
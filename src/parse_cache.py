@@ -0,0 +1,172 @@
+""" Module for caching the events extracted from logs between runs """
+
+import hashlib
+import os
+import stat
+import tempfile
+
+import fingerprint
+
+CACHE_FORMAT_VERSION = "2"
+CACHE_FILE_SUFFIX = ".gsyscache"
+HASH_CHUNK_SIZE_BYTES = 1 << 20
+DEFAULT_CACHE_SIZE_MB = 1024
+
+# Modules whose code builds the LogEventTable of a log. The modules
+# defining the rules are left out, as the rules are fingerprinted by value.
+PARSER_MODULES = ("constants", "compressed_log", "log_parser", "multi_log_parser",
+                  "rule_set", "timestamp_decoder", "log_event_table")
+
+def get_rules_fingerprint(event_rules):
+    """ Returns a digest of the tags, patterns and message types of the
+        event rules, in order, since the ids stored in a cached table
+        are positions in the rule list. """
+
+    rules_hash = hashlib.blake2b(digest_size=16)
+
+    for rule in event_rules:
+        rule_description = "{0}\0{1}\0{2}\0".format(rule.tag, rule.regular_expression.pattern,
+                                                    rule.message_type)
+        rules_hash.update(rule_description.encode())
+
+    return rules_hash.hexdigest()
+
+def get_content_hash(path_to_log):
+    """ Returns a digest of the raw bytes of the log file. """
+
+    content_hash = hashlib.blake2b(digest_size=16)
+
+    with open(path_to_log, "rb") as raw_log:
+        chunk = raw_log.read(HASH_CHUNK_SIZE_BYTES)
+        while chunk:
+            content_hash.update(chunk)
+            chunk = raw_log.read(HASH_CHUNK_SIZE_BYTES)
+
+    return content_hash.hexdigest()
+
+def get_log_key(log_file_paths, event_rules):
+    """ Returns the cache key for parsing the log files, in order, with
+        the event rules and the current source of the parser. """
+
+    key_hash = hashlib.blake2b(digest_size=20)
+    key_hash.update(CACHE_FORMAT_VERSION.encode())
+    key_hash.update(fingerprint.get_source_fingerprint(PARSER_MODULES).encode())
+    key_hash.update(get_rules_fingerprint(event_rules).encode())
+
+    for path_to_log in log_file_paths:
+        log_stat = os.stat(path_to_log)
+        log_description = "{0}\0{1}\0{2}\0".format(log_stat.st_size, log_stat.st_mtime_ns,
+                                                   get_content_hash(path_to_log))
+        key_hash.update(log_description.encode())
+
+    return key_hash.hexdigest()
+
+class ParseCache:
+    """ Persistent cache of the LogEventTables extracted from logs, and
+        of the later stage outputs built from them. Each table is keyed
+        by the size, mtime and content hash of every log it was parsed
+        from together with a fingerprint of the event rules, so a hit is
+        only possible when reparsing would produce the same table.
+        Entries are evicted least recently used first once the cache
+        grows past its size limit. Stage entries are unpickled, so a
+        cache directory or entry that another user could have written
+        is never read.
+
+        Attributes
+        ----------
+        cache_dir: string path to the directory holding the entries
+        size_limit_bytes: int total size the entries are evicted down to """
+
+    def __init__(self, cache_dir, size_limit_mb=DEFAULT_CACHE_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.size_limit_bytes = int(size_limit_mb * (1 << 20))
+
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+
+        if not is_private_file(os.stat(self.cache_dir)):
+            raise Exception("The cache directory must be owned by the current user and not "
+                            "writable by other users.")
+
+    def get_entry_path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_FILE_SUFFIX)
+
+    def load_entry(self, key, read_entry):
+        """ Returns the result of read_entry on the open entry file for
+            the key, or None on a miss or an unreadable entry. """
+
+        entry_path = self.get_entry_path(key)
+
+        try:
+            with open(entry_path, "rb") as entry_file:
+                if not is_private_file(os.fstat(entry_file.fileno())):
+                    # An entry another user could have written is a miss
+                    return None
+
+                entry = read_entry(entry_file)
+        except OSError:
+            return None
+        except Exception:
+            # A corrupt entry is dropped and treated as a miss
+            self.remove_entry(entry_path)
+            return None
+
+        # Refresh the mtime so eviction sees the entry as recently used
+        os.utime(entry_path)
+        return entry
+
+    def store_entry(self, key, write_entry):
+        """ Stores the entry written by write_entry under the key, then
+            evicts old entries to keep the cache within its size limit.
+            The entry is written to a temporary file first so readers
+            never see a partial entry. """
+
+        entry_file_descriptor, temp_entry_path = tempfile.mkstemp(dir=self.cache_dir,
+                                                                  suffix=".tmp")
+        try:
+            with os.fdopen(entry_file_descriptor, "wb") as entry_file:
+                write_entry(entry_file)
+            os.replace(temp_entry_path, self.get_entry_path(key))
+        except:
+            self.remove_entry(temp_entry_path)
+            raise
+
+        self.evict_entries()
+
+    def evict_entries(self):
+        """ Removes the least recently used entries until the total size
+            of the cache is within the limit. """
+
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(CACHE_FILE_SUFFIX):
+                continue
+
+            entry_path = os.path.join(self.cache_dir, file_name)
+            try:
+                entry_stat = os.stat(entry_path)
+            except OSError:
+                continue
+            entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry_path))
+
+        total_size = sum(entry_size for _, entry_size, _ in entries)
+
+        for _, entry_size, entry_path in sorted(entries):
+            if total_size <= self.size_limit_bytes:
+                break
+
+            self.remove_entry(entry_path)
+            total_size -= entry_size
+
+    def remove_entry(self, entry_path):
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
+
+def is_private_file(file_stat):
+    """ Checks that a file or directory is owned by the current user and
+        cannot be written by other users. """
+
+    if file_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        return False
+    return not hasattr(os, "getuid") or file_stat.st_uid == os.getuid()
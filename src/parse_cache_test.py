@@ -0,0 +1,112 @@
+""" Module for unit testing the parse cache """
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import event_rule
+import fingerprint
+import log_event_table
+import parse_cache
+from log_parser import LogParser
+
+class ParseCacheTest(unittest.TestCase):
+    """ Test suite for the parse cache """
+    def setUp(self):
+        super(ParseCacheTest, self).setUp()
+
+        self.fake_events = [event_rule.EventRule("A", "(.*)(I'm a test event)(.*)"),
+                            event_rule.EventRule("B", "(.*)(I'm a different test event)(.*)")]
+        self.path_to_fake_log = "test_data/fake_logs/gsys_fake_log"
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = parse_cache.ParseCache(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+        super(ParseCacheTest, self).tearDown()
+
+    def parse_fake_log(self):
+        parser = LogParser(self.path_to_fake_log, self.fake_events)
+        parser.parse_log()
+        return parser.log_events_found
+
+    def load_events(self, key):
+        return self.cache.load_entry(key, lambda entry_file:
+                                     log_event_table.read_from_file(entry_file, self.fake_events))
+
+    def store_events(self, key, events_table):
+        self.cache.store_entry(key, events_table.write_to_file)
+
+    def test_cached_table_matches_parsed_table(self):
+        key = parse_cache.get_log_key([self.path_to_fake_log], self.fake_events)
+        self.assertIsNone(self.load_events(key))
+
+        events_table = self.parse_fake_log()
+        self.store_events(key, events_table)
+        cached_table = self.load_events(key)
+
+        self.assertEqual([event.convert_to_dict() for event in cached_table],
+                         [event.convert_to_dict() for event in events_table])
+
+    def test_key_changes_with_rules(self):
+        key = parse_cache.get_log_key([self.path_to_fake_log], self.fake_events)
+        changed_events = [event_rule.EventRule("A", "(.*)(I'm a test event)(.*)")]
+
+        self.assertNotEqual(parse_cache.get_log_key([self.path_to_fake_log], changed_events), key)
+
+    def test_key_only_tracks_parser_source(self):
+        source_dir = os.path.join(self.temp_dir, "source")
+        os.mkdir(source_dir)
+        for module_name in parse_cache.PARSER_MODULES + ("gsys_constants",):
+            shutil.copy(os.path.join(fingerprint.SOURCE_DIRECTORY, module_name + ".py"),
+                        source_dir)
+
+        def get_edited_key(module_name):
+            with open(os.path.join(source_dir, module_name + ".py"), "a") as source_file:
+                source_file.write("# edited\n")
+            fingerprint.get_source_fingerprint.cache_clear()
+            return parse_cache.get_log_key([self.path_to_fake_log], self.fake_events)
+
+        with mock.patch.object(fingerprint, "SOURCE_DIRECTORY", source_dir):
+            fingerprint.get_source_fingerprint.cache_clear()
+            key = parse_cache.get_log_key([self.path_to_fake_log], self.fake_events)
+
+            # Tuning a threshold keeps the parsed events
+            self.assertEqual(get_edited_key("gsys_constants"), key)
+            self.assertNotEqual(get_edited_key("log_parser"), key)
+
+        fingerprint.get_source_fingerprint.cache_clear()
+
+    def test_evicts_least_recently_used(self):
+        events_table = self.parse_fake_log()
+        self.store_events("old", events_table)
+        entry_size = os.path.getsize(self.cache.get_entry_path("old"))
+        os.utime(self.cache.get_entry_path("old"), (0, 0))
+
+        self.cache.size_limit_bytes = entry_size
+        self.store_events("new", events_table)
+
+        self.assertFalse(os.path.exists(self.cache.get_entry_path("old")))
+        self.assertTrue(os.path.exists(self.cache.get_entry_path("new")))
+
+    def test_refuses_cache_dir_writable_by_others(self):
+        shared_dir = os.path.join(self.temp_dir, "shared")
+        os.mkdir(shared_dir)
+        os.chmod(shared_dir, 0o777)
+
+        with self.assertRaises(Exception):
+            parse_cache.ParseCache(shared_dir)
+
+    def test_skips_entry_writable_by_others(self):
+        key = parse_cache.get_log_key([self.path_to_fake_log], self.fake_events)
+        self.store_events(key, self.parse_fake_log())
+        os.chmod(self.cache.get_entry_path(key), 0o666)
+
+        self.assertIsNone(self.load_events(key))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+""" Module for attributing the cost of a run to the rules that caused it """
+
+import json
+import time
+
+from criteria import Criteria
+from event_parser import LogEventParser
+from log_parser import LogParser
+
+EVENT_RULE_STAGE = "event_rule"
+GROUP_RULE_STAGE = "group_rule"
+CRITERIA_STAGE = "criteria"
+
+class Profiler:
+    """ Records the time spent in, and the results of, each application
+        of an EventRule, an EventGroupRule and a Criteria. The methods
+        that apply them are wrapped only while the profiler is
+        instrumented, so runs without profiling pay nothing for it.
+        Profiling only sees work done in this process.
+
+        Attributes
+        ----------
+        costs: dict of [seconds, calls, hits] lists with (stage, tag) as
+               key, where hits counts lines matched by an event rule,
+               groups completed by a group rule or symptoms confirmed by
+               a criteria
+        patched_methods: list of (class, method name, original method)
+                         replaced while instrumented """
+
+    def __init__(self):
+        self.costs = {}
+        self.patched_methods = []
+
+    def record(self, stage, tag, seconds, hits):
+        cost = self.costs.get((stage, tag))
+        if cost is None:
+            cost = self.costs[(stage, tag)] = [0.0, 0, 0]
+
+        cost[0] += seconds
+        cost[1] += 1
+        cost[2] += hits
+
+    def instrument(self):
+        self.patch_method(LogParser, "apply_rule", self.wrap_apply_rule)
+        self.patch_method(LogEventParser, "update_search_dict", self.wrap_update_search_dict)
+        self.patch_method(Criteria, "apply_criteria", self.wrap_apply_criteria)
+
+    def patch_method(self, cls, method_name, wrap_method):
+        original_method = cls.__dict__[method_name]
+        self.patched_methods.append((cls, method_name, original_method))
+        setattr(cls, method_name, wrap_method(original_method))
+
+    def remove_instrumentation(self):
+        for cls, method_name, original_method in reversed(self.patched_methods):
+            setattr(cls, method_name, original_method)
+        self.patched_methods = []
+
+    def wrap_apply_rule(self, apply_rule):
+        profiler = self
+
+        def profiled_apply_rule(log_parser, line, rule):
+            start_time = time.perf_counter()
+            match_object = apply_rule(log_parser, line, rule)
+
+            profiler.record(EVENT_RULE_STAGE, rule.tag, time.perf_counter() - start_time,
+                            match_object is not None)
+            return match_object
+
+        return profiled_apply_rule
+
+    def wrap_update_search_dict(self, update_search_dict):
+        profiler = self
+
+        def profiled_update_search_dict(event_parser, rule_index, position, event):
+            groups_found = event_parser.rule_groups_found[rule_index]
+            group_count = len(groups_found)
+            start_time = time.perf_counter()
+            update_search_dict(event_parser, rule_index, position, event)
+
+            profiler.record(GROUP_RULE_STAGE, event_parser.event_group_rules[rule_index].tag,
+                            time.perf_counter() - start_time, len(groups_found) - group_count)
+
+        return profiled_update_search_dict
+
+    def wrap_apply_criteria(self, apply_criteria):
+        profiler = self
+
+        def profiled_apply_criteria(criteria, event_groups, collect_statistics,
+                                    signal_plan=None):
+            start_time = time.perf_counter()
+            output_dict = apply_criteria(criteria, event_groups, collect_statistics,
+                                         signal_plan)
+
+            profiler.record(CRITERIA_STAGE, criteria.symptom_tag,
+                            time.perf_counter() - start_time, len(output_dict["symptoms"]))
+            return output_dict
+
+        return profiled_apply_criteria
+
+    def get_ranked_costs(self):
+        """ Returns a dict describing the cost of each rule, most time
+            consuming first. """
+
+        ranked_costs = []
+        for (stage, tag), (seconds, calls, hits) in self.costs.items():
+            ranked_costs.append({
+                "stage": stage,
+                "tag": tag,
+                "seconds": seconds,
+                "calls": calls,
+                "hits": hits
+            })
+
+        ranked_costs.sort(key=lambda cost: cost["seconds"], reverse=True)
+        return ranked_costs
+
+    def write_report(self):
+        ranked_costs = self.get_ranked_costs()
+        total_seconds = sum(cost["seconds"] for cost in ranked_costs) or 1
+
+        print("\nProfile")
+        print("------------------------------------")
+        print("{0:<12} {1:<28} {2:>10} {3:>10} {4:>8} {5:>7}".format(
+            "Stage", "Tag", "Seconds", "Calls", "Hits", "Share"))
+
+        for cost in ranked_costs:
+            print("{0:<12} {1:<28} {2:>10.4f} {3:>10} {4:>8} {5:>6.1f}%".format(
+                cost["stage"], str(cost["tag"])[:28], cost["seconds"], cost["calls"],
+                cost["hits"], cost["seconds"] * 100 / total_seconds))
+
+        print("------------------------------------")
+
+    def write_json(self, json_path):
+        with open(json_path, "w") as outfile:
+            json.dump(self.get_ranked_costs(), outfile, indent=4)
@@ -0,0 +1,72 @@
+""" Module for unit testing the cost attribution profiler """
+
+import unittest
+
+import criteria
+import evaluators
+import event_group_rule
+import event_rule
+import profiler
+import signals
+from event_parser import LogEventParser
+from group_parser import EventGroupParser
+from log_parser import LogParser
+
+class ProfilerTest(unittest.TestCase):
+    """ Test suite for the profiler """
+    def setUp(self):
+        super(ProfilerTest, self).setUp()
+
+        self.event_rules = [event_rule.EventRule("A", "(.*)(I'm a test event)(.*)"),
+                            event_rule.EventRule("B", "(.*)(I'm a different test event)(.*)")]
+        self.group_rules = [event_group_rule.EventGroupRule("test", ["A"])]
+        self.criterias = [
+            criteria.Criteria(
+                symptom_tag="Test Event",
+                signal=signals.ExistenceGroupSignal(tag="test_signal", group_tag="test"),
+                evaluator=evaluators.ExistenceEvaluator(),
+                action_msg="Do Nothing."
+            )
+        ]
+
+    def run_stages(self):
+        log_parser = LogParser("test_data/fake_logs/gsys_fake_log", self.event_rules)
+        log_parser.parse_log()
+
+        event_parser = LogEventParser(log_parser.log_events_found, self.group_rules)
+        event_parser.parse_log_events()
+
+        EventGroupParser(event_parser.event_groups_found, self.criterias).parse_event_groups()
+
+    def test_costs_attributed_to_each_rule(self):
+        run_profiler = profiler.Profiler()
+        run_profiler.instrument()
+        try:
+            self.run_stages()
+        finally:
+            run_profiler.remove_instrumentation()
+
+        costs = {(cost["stage"], cost["tag"]): cost for cost in run_profiler.get_ranked_costs()}
+
+        self.assertEqual(costs[(profiler.EVENT_RULE_STAGE, "A")]["hits"], 2)
+        self.assertEqual(costs[(profiler.EVENT_RULE_STAGE, "B")]["hits"], 2)
+        self.assertEqual(costs[(profiler.GROUP_RULE_STAGE, "test")]["calls"], 2)
+        self.assertEqual(costs[(profiler.GROUP_RULE_STAGE, "test")]["hits"], 2)
+        self.assertEqual(costs[(profiler.CRITERIA_STAGE, "Test Event")]["calls"], 1)
+        self.assertEqual(costs[(profiler.CRITERIA_STAGE, "Test Event")]["hits"], 2)
+
+    def test_instrumentation_removed(self):
+        original_apply_rule = LogParser.__dict__["apply_rule"]
+
+        run_profiler = profiler.Profiler()
+        run_profiler.instrument()
+        self.assertIsNot(LogParser.__dict__["apply_rule"], original_apply_rule)
+        run_profiler.remove_instrumentation()
+
+        self.assertIs(LogParser.__dict__["apply_rule"], original_apply_rule)
+        self.run_stages()
+        self.assertEqual(run_profiler.costs, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
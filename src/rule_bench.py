@@ -0,0 +1,109 @@
+""" Module for timing each EventRule against a sample of log lines """
+
+import random
+import time
+
+import multi_log_parser
+from log_parser import LogParser
+
+DEFAULT_SAMPLE_SIZE = 10000
+
+def sample_log_lines(log_file_path, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """ Returns a uniform sample of the lines of the log, or of every log
+        in a directory or glob, in log order. The sample is reservoir
+        sampled with a fixed seed so repeated runs time the same lines. """
+
+    if multi_log_parser.is_multi_log_path(log_file_path):
+        log_file_paths = multi_log_parser.get_log_file_paths(log_file_path)
+    else:
+        log_file_paths = [log_file_path]
+
+    sampler = random.Random(seed)
+    sampled_lines = []
+    line_count = 0
+
+    for path_to_log in log_file_paths:
+        for line in LogParser(path_to_log, []).read_log_lines():
+            if line_count < sample_size:
+                sampled_lines.append((line_count, line))
+            else:
+                sample_index = sampler.randint(0, line_count)
+                if sample_index < sample_size:
+                    sampled_lines[sample_index] = (line_count, line)
+            line_count += 1
+
+    return [line for _, line in sorted(sampled_lines)]
+
+class RuleBenchmark:
+    """ Times each event rule against the same sample of lines, both as
+        written and in the rewritten form used to detect events, so the
+        rules that dominate parsing time can be found.
+
+        Attributes
+        ----------
+        event_rules: list of EventRules to time
+        sample_lines: list of log lines to apply each rule to
+        results: list of dicts of timings for each rule, slowest first """
+
+    def __init__(self, event_rules, sample_lines):
+        self.event_rules = event_rules
+        self.sample_lines = sample_lines
+        self.results = []
+
+    def run(self):
+        self.results = []
+
+        for rule in self.event_rules:
+            original_seconds, original_matches = self.time_lines(rule.regular_expression.match)
+            detection_seconds, detection_matches = self.time_lines(rule.detect)
+
+            if original_matches != detection_matches:
+                raise Exception("Rule {0} detects {1} lines but matches {2}.".format(
+                    rule.tag, detection_matches, original_matches))
+
+            self.results.append({
+                "tag": rule.tag,
+                "matches": original_matches,
+                "original_seconds": original_seconds,
+                "detection_seconds": detection_seconds,
+                "detect_with_search": rule.detect_with_search,
+                "nested_quantifiers": rule.nested_quantifiers
+            })
+
+        self.results.sort(key=lambda result: result["original_seconds"], reverse=True)
+
+    def time_lines(self, apply_rule):
+        """ Returns the seconds taken to apply the rule to every sampled
+            line and the number of lines it matched. """
+
+        matches = 0
+        start_time = time.perf_counter()
+
+        for line in self.sample_lines:
+            if apply_rule(line) is not None:
+                matches += 1
+
+        return time.perf_counter() - start_time, matches
+
+    def write_report(self):
+        line_count = max(len(self.sample_lines), 1)
+        total_seconds = sum(result["original_seconds"] for result in self.results) or 1
+
+        print("Timed {0} rules against {1} sampled lines".format(len(self.results),
+                                                                 len(self.sample_lines)))
+        print("------------------------------------")
+        print("{0:<28} {1:>8} {2:>12} {3:>12} {4:>7} {5:>6}".format(
+            "Rule", "Matches", "Original", "Detection", "Share", "Form"))
+
+        for result in self.results:
+            print("{0:<28} {1:>8} {2:>9.3f} us {3:>9.3f} us {4:>6.1f}% {5:>6}".format(
+                result["tag"][:28], result["matches"],
+                result["original_seconds"] * 1e6 / line_count,
+                result["detection_seconds"] * 1e6 / line_count,
+                result["original_seconds"] * 100 / total_seconds,
+                "search" if result["detect_with_search"] else "match"))
+
+            for nested_quantifier in result["nested_quantifiers"]:
+                print("    Backtracking risk: {0}".format(nested_quantifier))
+
+        print("------------------------------------")
@@ -0,0 +1,163 @@
+""" Module for rewriting EventRule patterns into cheaper forms for
+    detecting events, and for flagging patterns at risk of catastrophic
+    backtracking """
+
+import re
+
+try:
+    import re._parser as sre_parse
+except ImportError:
+    import sre_parse
+
+# A leading or trailing "(.*)", "(?:.*)", "(?P<name>.*)" or bare ".*",
+# optionally lazy
+WILDCARD_SOURCE = r"(?:\((?:\?:|\?P<\w+>)?\.\*\??\)|\.\*\??)"
+LEADING_WILDCARD_REGEX = re.compile(WILDCARD_SOURCE)
+TRAILING_WILDCARD_REGEX = re.compile(WILDCARD_SOURCE + r"\Z")
+
+REPEAT_OPS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+
+def get_detection_pattern(pattern, flags=0):
+    """ Returns a pattern that finds the same lines as matching the given
+        pattern from the start of a line, and whether it must be applied
+        with search rather than match. A leading wildcard is replaced by
+        searching, and a trailing wildcard is dropped since it can always
+        match the empty string. Log lines hold no newlines, so a leading
+        wildcard can reach every position a search can.
+
+        ex: "(.*)(SIGTERM)(.*)" => ("(SIGTERM)", True) """
+
+    parsed_items = parse_items(pattern, flags)
+    if parsed_items is None or contains_group_reference(parsed_items):
+        return pattern, False
+
+    detection_pattern = pattern
+    use_search = False
+
+    if len(parsed_items) > 0 and is_unbounded_wildcard(parsed_items[0]):
+        wildcard_match = LEADING_WILDCARD_REGEX.match(detection_pattern)
+        stripped_pattern = detection_pattern[wildcard_match.end():] if wildcard_match else None
+
+        if is_stripped_form(stripped_pattern, len(parsed_items), flags):
+            detection_pattern = stripped_pattern
+            parsed_items = parsed_items[1:]
+            use_search = True
+
+    if len(parsed_items) > 0 and is_unbounded_wildcard(parsed_items[-1]):
+        wildcard_match = TRAILING_WILDCARD_REGEX.search(detection_pattern)
+        stripped_pattern = detection_pattern[:wildcard_match.start()] if wildcard_match else None
+
+        if is_stripped_form(stripped_pattern, len(parsed_items), flags):
+            detection_pattern = stripped_pattern
+
+    return detection_pattern, use_search
+
+def is_stripped_form(stripped_pattern, item_count, flags):
+    """ Checks that removing the wildcard text removed exactly one item
+        of the pattern, rather than part of an escape or a class. """
+
+    if stripped_pattern is None:
+        return False
+
+    stripped_items = parse_items(stripped_pattern, flags)
+    return stripped_items is not None and len(stripped_items) == item_count - 1
+
+def parse_items(pattern, flags=0):
+    try:
+        return list(sre_parse.parse(pattern, flags))
+    except:
+        return None
+
+def is_unbounded_wildcard(item):
+    """ Checks if a parsed item is ".*" or ".*?", optionally wrapped in a
+        group. """
+
+    op, av = item
+    if op == sre_parse.SUBPATTERN:
+        group_items = list(av[-1])
+        return len(group_items) == 1 and is_unbounded_wildcard(group_items[0])
+
+    if op in REPEAT_OPS:
+        min_count, max_count, repeated_items = av
+        repeated_items = list(repeated_items)
+        return (min_count == 0 and max_count == sre_parse.MAXREPEAT and
+                len(repeated_items) == 1 and repeated_items[0][0] == sre_parse.ANY)
+
+    return False
+
+def contains_group_reference(parsed_items):
+    for op, av in parsed_items:
+        if op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS):
+            return True
+        if any(contains_group_reference(child_items)
+               for child_items in get_child_item_lists(op, av)):
+            return True
+
+    return False
+
+def get_child_item_lists(op, av):
+    """ Returns the lists of parsed items nested inside a parsed item. """
+
+    if op == sre_parse.SUBPATTERN:
+        return [av[-1]]
+    if op in REPEAT_OPS or op == getattr(sre_parse, "POSSESSIVE_REPEAT", None):
+        return [av[2]]
+    if op == sre_parse.BRANCH:
+        return av[1]
+    if op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+        return [av[1]]
+    if op == getattr(sre_parse, "ATOMIC_GROUP", None):
+        return [av]
+    if op == sre_parse.GROUPREF_EXISTS:
+        return [items for items in av[1:] if items is not None]
+
+    return []
+
+def find_nested_quantifiers(pattern, flags=0):
+    """ Returns a description of each repeated part of the pattern that
+        itself holds a quantifier, such as "(\\w+)*", which can take
+        exponential time to fail on a line that almost matches. """
+
+    try:
+        parsed_pattern = sre_parse.parse(pattern, flags)
+    except:
+        return []
+
+    parse_state = getattr(parsed_pattern, "state", None) or parsed_pattern.pattern
+    group_names = {number: name for name, number in parse_state.groupdict.items()}
+
+    nested_quantifiers = []
+    collect_nested_quantifiers(list(parsed_pattern), group_names, nested_quantifiers)
+
+    return nested_quantifiers
+
+def collect_nested_quantifiers(parsed_items, group_names, nested_quantifiers):
+    for op, av in parsed_items:
+        if op in REPEAT_OPS and av[1] > 1 and contains_repeat(av[2]):
+            nested_quantifiers.append("quantified {0} holds another quantifier".format(
+                describe_repeated_items(list(av[2]), group_names)))
+            continue
+
+        for child_items in get_child_item_lists(op, av):
+            collect_nested_quantifiers(child_items, group_names, nested_quantifiers)
+
+def contains_repeat(parsed_items):
+    for op, av in parsed_items:
+        if op in REPEAT_OPS and av[1] > 1:
+            return True
+        if any(contains_repeat(child_items) for child_items in get_child_item_lists(op, av)):
+            return True
+
+    return False
+
+def describe_repeated_items(repeated_items, group_names):
+    if len(repeated_items) == 1 and repeated_items[0][0] == sre_parse.SUBPATTERN:
+        group_number = repeated_items[0][1][0]
+
+        if group_number is None:
+            return "non-capturing group"
+        if group_number in group_names:
+            return "group '{0}'".format(group_names[group_number])
+        return "group {0}".format(group_number)
+
+    return "expression"
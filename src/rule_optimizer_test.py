@@ -0,0 +1,46 @@
+""" Module for unit testing the rewriting of event rule patterns """
+
+import re
+import unittest
+
+import rule_optimizer
+
+class RuleOptimizerTest(unittest.TestCase):
+    """ Test suite for the rule optimizer """
+    def test_wildcards_rewritten_to_search(self):
+        self.assertEqual(rule_optimizer.get_detection_pattern("(.*)(SIGTERM)(.*)"),
+                         ("(SIGTERM)", True))
+        self.assertEqual(rule_optimizer.get_detection_pattern(".*?(a)(?P<msg>.*)"),
+                         ("(a)", True))
+        self.assertEqual(rule_optimizer.get_detection_pattern("(SIGTERM)(.*)"),
+                         ("(SIGTERM)", False))
+
+    def test_unsafe_patterns_left_alone(self):
+        for pattern in ["(.*)a|b", "(.*)(a)\\2", "I(.*)a", "(.*a)b"]:
+            detection_pattern, _ = rule_optimizer.get_detection_pattern(pattern)
+            self.assertEqual(detection_pattern, pattern)
+
+        # An escaped dot is not a wildcard, so only the leading one goes
+        self.assertEqual(rule_optimizer.get_detection_pattern("(.*)a\\.*"), ("a\\.*", True))
+
+    def test_detection_finds_same_lines(self):
+        pattern = "(.*)(Failed read of reg\\s)(?P<reg>\\d*)(.*)"
+        detection_pattern, use_search = rule_optimizer.get_detection_pattern(pattern)
+        self.assertTrue(use_search)
+
+        lines = ["I0924 fake.cc:1] Failed read of reg 12", "Failed read of reg x",
+                 "I0924 fake.cc:1] Failed read of", ""]
+        for line in lines:
+            self.assertEqual(re.search(detection_pattern, line) is None,
+                             re.match(pattern, line) is None)
+
+    def test_nested_quantifiers_flagged(self):
+        self.assertEqual(len(rule_optimizer.find_nested_quantifiers("(?P<word>\\w+\\s?)*x")), 1)
+        self.assertEqual(len(rule_optimizer.find_nested_quantifiers("(?:a|b+)+")), 1)
+        self.assertEqual(rule_optimizer.find_nested_quantifiers("(.*)(SIGTERM)(.*)"), [])
+        self.assertIn("group 'word'",
+                      rule_optimizer.find_nested_quantifiers("(?P<word>\\w+)*")[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
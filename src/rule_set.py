@@ -0,0 +1,188 @@
+""" Module for compiling EventRules into a rule set that scans each log
+    line once for every rule """
+
+import re
+
+try:
+    import re._parser as sre_parse
+except ImportError:
+    import sre_parse
+
+def extract_literal_anchor(pattern, flags=0):
+    """ Finds the longest run of literal characters that any line matching
+        the pattern must contain, or None if there is no such run.
+
+        ex: "(.*)(SIGTERM)(.*)" => "SIGTERM" """
+
+    if flags & re.IGNORECASE:
+        return None
+
+    try:
+        parsed_pattern = sre_parse.parse(pattern, flags)
+    except:
+        return None
+
+    # Inline flags such as (?i) are stored on the parse state
+    parse_state = getattr(parsed_pattern, "state", None) or parsed_pattern.pattern
+    if parse_state.flags & re.IGNORECASE:
+        return None
+
+    literal_runs = []
+    current_run = collect_literal_runs(parsed_pattern, literal_runs, [])
+    literal_runs.append(current_run)
+
+    longest_run = max(literal_runs, key=len)
+    if len(longest_run) == 0:
+        return None
+
+    return "".join(longest_run)
+
+def collect_literal_runs(parsed_pattern, literal_runs, current_run):
+    """ Walks the items every match must pass through in order, appending
+        each finished run of consecutive literals to literal_runs and
+        returning the run still in progress. """
+
+    for op, av in parsed_pattern:
+        if op == sre_parse.LITERAL:
+            current_run.append(chr(av))
+        elif op == sre_parse.SUBPATTERN:
+            add_flags = av[1]
+            if add_flags & re.IGNORECASE:
+                literal_runs.append(current_run)
+                current_run = []
+            else:
+                current_run = collect_literal_runs(av[-1], literal_runs, current_run)
+        else:
+            literal_runs.append(current_run)
+            current_run = []
+
+    return current_run
+
+def build_trie_regex_source(anchors):
+    """ Builds a regular expression matching any of the anchors, factored
+        into a trie so that scanning cost grows with the number of
+        distinct prefixes rather than the number of anchors. Where
+        anchors share a start position the longest one is matched. """
+
+    trie = {}
+    for anchor in anchors:
+        node = trie
+        for character in anchor:
+            node = node.setdefault(character, {})
+        node[""] = None
+
+    return build_trie_node_source(trie)
+
+def build_trie_node_source(node):
+    branches = []
+    for character in sorted(key for key in node if key != ""):
+        branches.append(re.escape(character) + build_trie_node_source(node[character]))
+
+    if len(branches) == 0:
+        return ""
+
+    if len(branches) == 1:
+        source = branches[0]
+    else:
+        source = "(?:" + "|".join(branches) + ")"
+
+    if "" in node:
+        source = "(?:" + source + ")?"
+
+    return source
+
+class EventRuleSet:
+    """ Compiled form of a list of EventRules. The literal anchor of each
+        rule is pulled out of its regular expression, and a line is
+        checked once for all anchors together so that the full regular
+        expression only runs for rules whose anchor appeared.
+
+        Attributes
+        ----------
+        event_rules: ordered list of EventRules in the set
+        anchors: literal anchor for each rule, None when a rule has none
+        unanchored_rule_indices: indices of rules that must always be
+                                 applied since they have no anchor
+        anchor_regex: compiled regex matching any anchor in a str line
+        bytes_anchor_regex: compiled regex matching any anchor in bytes
+        anchor_rule_indices: dict with an anchor as key and the sorted
+                             indices of rules satisfied by finding it
+        bytes_anchor_rule_indices: anchor_rule_indices keyed by the
+                                   utf-8 encoded anchors """
+
+    def __init__(self, event_rules):
+        self.event_rules = event_rules
+        self.anchors = []
+        self.unanchored_rule_indices = []
+
+        for rule_index, rule in enumerate(event_rules):
+            rule_regex = rule.regular_expression
+            anchor = extract_literal_anchor(rule_regex.pattern, rule_regex.flags)
+
+            self.anchors.append(anchor)
+            if anchor is None:
+                self.unanchored_rule_indices.append(rule_index)
+
+        distinct_anchors = set(anchor for anchor in self.anchors if anchor is not None)
+
+        # Only the longest anchor starting at a position is matched, so
+        # finding an anchor also satisfies every anchor that prefixes it
+        self.anchor_rule_indices = {}
+        for anchor in distinct_anchors:
+            rule_indices = set(self.unanchored_rule_indices)
+            for rule_index, rule_anchor in enumerate(self.anchors):
+                if rule_anchor is not None and anchor.startswith(rule_anchor):
+                    rule_indices.add(rule_index)
+
+            self.anchor_rule_indices[anchor] = sorted(rule_indices)
+
+        self.bytes_anchor_rule_indices = {anchor.encode(): rule_indices
+                                          for anchor, rule_indices
+                                          in self.anchor_rule_indices.items()}
+
+        if distinct_anchors:
+            anchor_regex_source = build_trie_regex_source(distinct_anchors)
+            self.anchor_regex = re.compile(anchor_regex_source)
+            self.bytes_anchor_regex = re.compile(anchor_regex_source.encode())
+        else:
+            self.anchor_regex = None
+            self.bytes_anchor_regex = None
+
+    def get_candidate_rules(self, line):
+        """ Returns the rules, in their original order, whose anchors
+            appear in the line. """
+
+        return self.find_candidate_rules(self.anchor_regex, self.anchor_rule_indices,
+                                         line, 0, len(line))
+
+    def get_mapped_candidate_rules(self, mapped_log, line_start, line_end):
+        """ Returns the candidate rules for a line of a bytes buffer
+            without copying the line out of the buffer. """
+
+        return self.find_candidate_rules(self.bytes_anchor_regex,
+                                         self.bytes_anchor_rule_indices,
+                                         mapped_log, line_start, line_end)
+
+    def find_candidate_rules(self, anchor_regex, anchor_rule_indices, line, start, end):
+        if anchor_regex is None:
+            return [self.event_rules[index] for index in self.unanchored_rule_indices]
+
+        anchor_match = anchor_regex.search(line, start, end)
+        if anchor_match is None:
+            return [self.event_rules[index] for index in self.unanchored_rule_indices]
+
+        # Restart one past each found anchor to catch overlapping anchors
+        found_anchors = set()
+        while anchor_match is not None:
+            found_anchors.add(anchor_match.group())
+            anchor_match = anchor_regex.search(line, anchor_match.start() + 1, end)
+
+        if len(found_anchors) == 1:
+            rule_indices = anchor_rule_indices[found_anchors.pop()]
+        else:
+            rule_indices = set()
+            for anchor in found_anchors:
+                rule_indices.update(anchor_rule_indices[anchor])
+            rule_indices = sorted(rule_indices)
+
+        return [self.event_rules[index] for index in rule_indices]
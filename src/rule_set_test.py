@@ -0,0 +1,56 @@
+""" Module for unit testing the compiled event rule set """
+
+import unittest
+
+import rule_set
+import event_rule
+
+class RuleSetTest(unittest.TestCase):
+    """ Test suite for the event rule set """
+    def setUp(self):
+        super(RuleSetTest, self).setUp()
+
+        self.fake_rules = [
+            event_rule.EventRule("term", "(.*)(SIGTERM)(.*)"),
+            event_rule.EventRule("sig", "(.*)(SIG)(?P<name>[A-Z]*)"),
+            event_rule.EventRule("termination", "(.*)(TERMINATION)(.*)"),
+            event_rule.EventRule("any", "(.*)")
+        ]
+        self.fake_rule_set = rule_set.EventRuleSet(self.fake_rules)
+
+    def test_extract_literal_anchor(self):
+        self.assertEqual(rule_set.extract_literal_anchor("(.*)(SIGTERM)(.*)"), "SIGTERM")
+        self.assertEqual(rule_set.extract_literal_anchor("(.*)(reg\\s)(?P<reg>\\d*)"), "reg")
+        self.assertIsNone(rule_set.extract_literal_anchor("(.*)"))
+        self.assertIsNone(rule_set.extract_literal_anchor("(?i)(.*)(SIGTERM)"))
+        self.assertIsNone(rule_set.extract_literal_anchor("(a|b)"))
+
+    def test_candidate_rules_keep_rule_order(self):
+        candidate_tags = [rule.tag for rule in
+                          self.fake_rule_set.get_candidate_rules("got SIGTERM")]
+
+        # "SIG" is a prefix of "SIGTERM" so both rules are candidates
+        self.assertEqual(candidate_tags, ["term", "sig", "any"])
+
+    def test_candidate_rules_with_overlapping_anchors(self):
+        candidate_tags = [rule.tag for rule in
+                          self.fake_rule_set.get_candidate_rules("SIGTERMINATION")]
+
+        self.assertEqual(candidate_tags, ["term", "sig", "termination", "any"])
+
+    def test_candidate_rules_without_anchor(self):
+        candidate_tags = [rule.tag for rule in
+                          self.fake_rule_set.get_candidate_rules("noise")]
+
+        self.assertEqual(candidate_tags, ["any"])
+
+    def test_mapped_candidate_rules(self):
+        buffer = b"noise\nSIGSEGV\n"
+        candidate_tags = [rule.tag for rule in
+                          self.fake_rule_set.get_mapped_candidate_rules(buffer, 6, 13)]
+
+        self.assertEqual(candidate_tags, ["sig", "any"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+""" Module for running the parsing stages as a pipeline, so the log is
+    analyzed as it is read instead of one stage at a time """
+
+import coroutines
+import signal_plan
+import signal_statistics
+from event_parser import LogEventParser
+from group_parser import EventGroupParser, track_bursts
+
+class SiftPipeline:
+    """ Streams batches of log events through the group rules, and each
+        completed group through the signal, evaluator and burst tracking
+        coroutines of every criteria, with one signal detector for each
+        distinct signal. Nothing is kept per line or per
+        group that is not still in use, so memory follows the partial
+        groups and symptoms in flight rather than the size of the log,
+        and each symptom is available as soon as it is confirmed.
+
+        Groups reach the signals in the order of the batch they complete
+        in, then by rule, whereas running the stages in turn sends every
+        group of one rule before any group of the next. The results are
+        the same either way, except for a signal pairing groups of
+        different rules, such as an IntervalGroupSignal, over a log read
+        in more than one batch: its pairs then follow the batch order.
+        Bursts never run on from one criteria's symptoms to the next.
+        Once every group is through, the bursts of all the criteria are
+        ordered by when they start, as EventGroupParser orders them.
+
+        Attributes
+        ----------
+        log_event_batches: iterable of LogEventTables or lists of
+                           LogEvents in the order they were logged
+        criterias: list of Criteria objects to be applied
+        collect_statistics: boolean denoting if statistics should
+                            be collected
+        burst_max_gap: timedelta after the end of a symptom that the next
+                       symptom of its burst must start within, or None
+        event_parser: LogEventParser grouping the streamed events
+        group_parser: EventGroupParser holding the results once the
+                      pipeline has run
+        criteria_signal_accumulators: list of the SignalAccumulator of
+                                      each criteria's signal, or of None
+                                      when not collecting statistics
+        criteria_bursts: list of the bursts found by each criteria
+        symptom_detectors: list of the coroutines each event group is
+                           sent to, one for each distinct signal, or
+                           None before the pipeline is started
+        new_symptoms: list of the symptoms confirmed since they were
+                      last handed on """
+
+    def __init__(self, log_event_batches, group_rules, criterias, collect_statistics=False,
+                 burst_max_gap=None):
+        self.log_event_batches = log_event_batches
+        self.criterias = criterias
+        self.collect_statistics = collect_statistics
+        self.burst_max_gap = burst_max_gap
+
+        self.event_parser = LogEventParser([], group_rules)
+        self.group_parser = EventGroupParser([], criterias, collect_statistics, burst_max_gap)
+
+        self.criteria_signal_accumulators = [
+            signal_statistics.SignalAccumulator(criteria.signal.tag) if collect_statistics else None
+            for criteria in criterias]
+        self.criteria_bursts = [[] for criteria in criterias]
+
+        self.symptom_detectors = None
+        self.new_symptoms = []
+
+    def iter_symptoms(self):
+        """ Runs the pipeline, yielding each symptom as soon as it is
+            confirmed. Once exhausted the group parser holds the same
+            results as parsing each stage in turn, apart from signals
+            pairing groups of different rules across batches. """
+
+        self.start()
+
+        for event_group in self.event_parser.iter_event_groups(self.log_event_batches):
+            yield from self.send_event_groups([event_group])
+
+        self.finish()
+
+    def start(self):
+        """ Builds the signal, evaluator, symptom recording and burst
+            tracking coroutines of every criteria, which keep their state
+            between the groups sent through them. """
+
+        self.group_parser.criteria_symptoms = [[] for criteria in self.criterias]
+
+        # Criteria applying the same signal share a single detector of it
+        signal_evaluators = {}
+        for criteria_index, criteria in enumerate(self.criterias):
+            burst_tracker = track_bursts(coroutines.collect(self.criteria_bursts[criteria_index]),
+                                         self.burst_max_gap)
+            symptom_recorder = record_symptoms(
+                burst_tracker, self.group_parser.criteria_symptoms[criteria_index],
+                self.new_symptoms)
+            signal_evaluator = criteria.signal_evaluator(
+                symptom_recorder, self.criteria_signal_accumulators[criteria_index])
+
+            signal_key = signal_plan.get_signal_key(criteria.signal)
+            if signal_key not in signal_evaluators:
+                signal_evaluators[signal_key] = (criteria.signal, [signal_evaluator])
+            else:
+                signal_evaluators[signal_key][1].append(
+                    signal_plan.retag_signal_stream(signal_evaluator, criteria.signal.tag))
+
+        self.symptom_detectors = []
+        for signal, targets in signal_evaluators.values():
+            if len(targets) == 1:
+                self.symptom_detectors.append(signal.signal_detector(targets[0]))
+            else:
+                self.symptom_detectors.append(
+                    signal.signal_detector(coroutines.broadcast(targets)))
+
+    def send_event_groups(self, event_groups):
+        """ Sends event groups completed after every group sent so far
+            through the started pipeline, and returns the symptoms they
+            confirmed. Until the pipeline is finished, the group parser's
+            symptoms_found holds the symptoms in the order confirmed. """
+
+        for event_group in event_groups:
+            for symptom_detector in self.symptom_detectors:
+                symptom_detector.send(event_group)
+
+        new_symptoms = list(self.new_symptoms)
+        self.new_symptoms.clear()
+
+        self.group_parser.symptoms_found += new_symptoms
+        return new_symptoms
+
+    def finish(self):
+        """ Closes the pipeline, flushing the bursts still open, and
+            stores the results in the group parser. """
+
+        for symptom_detector in self.symptom_detectors:
+            symptom_detector.close()
+
+        self.store_results()
+
+    def run(self):
+        """ Runs the pipeline to the end and returns the group parser
+            holding the results. """
+
+        for _ in self.iter_symptoms():
+            pass
+
+        return self.group_parser
+
+    def store_results(self):
+        """ Orders the results of every criteria as EventGroupParser
+            orders them, symptoms criteria by criteria and bursts by when
+            they start. """
+
+        group_parser = self.group_parser
+        group_parser.symptoms_found = []
+        group_parser.bursts = []
+        group_parser.burst_dict = {}
+
+        # Bursts starting together are ordered by criteria
+        criteria_bursts = [(criteria_index, burst)
+                           for criteria_index, bursts in enumerate(self.criteria_bursts)
+                           for burst in bursts]
+        criteria_bursts.sort(key=lambda criteria_burst: (criteria_burst[1].burst_start_timestamp,
+                                                         criteria_burst[0]))
+        group_parser.add_bursts(burst for _, burst in criteria_bursts)
+
+        for criteria_index, symptoms in enumerate(group_parser.criteria_symptoms):
+            group_parser.symptoms_found += symptoms
+
+            signal_accumulator = self.criteria_signal_accumulators[criteria_index]
+            if signal_accumulator is not None and signal_accumulator.signal_count > 0:
+                statistics_summary = signal_accumulator.get_summary()
+                group_parser.statistics_summaries[statistics_summary["signal_tag"]] = \
+                    statistics_summary
+
+@coroutines.coroutine
+def record_symptoms(target, symptoms, new_symptoms):
+    """ Coroutine appending each symptom sent to it to both symptoms and
+        new_symptoms, and passing it and each None on to target. """
+
+    try:
+        while True:
+            symptom = yield
+
+            if symptom is not None:
+                symptoms.append(symptom)
+                new_symptoms.append(symptom)
+
+            target.send(symptom)
+    finally:
+        target.close()
@@ -0,0 +1,109 @@
+""" Module for testing the pipelined parsing stages """
+
+import datetime
+import unittest
+
+import criteria
+import evaluators
+import event_group_rule
+import event_parser
+import group_parser
+import mocks
+import signals
+import sift_pipeline
+
+class SiftPipelineTest(unittest.TestCase):
+    """ Test suite for the sift pipeline """
+    def setUp(self):
+        super(SiftPipelineTest, self).setUp()
+
+        start_time = datetime.datetime(2020, 1, 1)
+        timed_tags = [("A", 0), ("A", 1), ("B", 2), ("A", 10), ("A", 11), ("A", 12),
+                      ("B", 13), ("B", 30), ("A", 31)]
+        self.log_events = [mocks.MockLogEvent(tag, start_time + datetime.timedelta(seconds=seconds))
+                           for tag, seconds in timed_tags]
+
+        self.group_rules = [event_group_rule.EventGroupRule("a", ["A"]),
+                            event_group_rule.EventGroupRule("b", ["B"])]
+        self.criterias = [
+            criteria.Criteria("Fast Repeat",
+                              signals.RepeatGroupSignal("a_repeat", "a"),
+                              evaluators.LessThanEvaluator(datetime.timedelta(seconds=5)),
+                              "Slow down."),
+            criteria.Criteria("B Seen",
+                              signals.ExistenceGroupSignal("b_exists", "b"),
+                              evaluators.ExistenceEvaluator(),
+                              "Look at B.")
+        ]
+
+    def test_matches_stage_by_stage_results(self):
+        log_event_parser = event_parser.LogEventParser(self.log_events, self.group_rules)
+        log_event_parser.parse_log_events()
+        expected_parser = group_parser.EventGroupParser(log_event_parser.event_groups_found,
+                                                        self.criterias, True)
+        expected_parser.parse_event_groups()
+
+        # Split the events into batches to stream through the pipeline
+        log_event_batches = [self.log_events[:4], self.log_events[4:7], self.log_events[7:]]
+        pipeline = sift_pipeline.SiftPipeline(iter(log_event_batches), self.group_rules,
+                                              self.criterias, True)
+        streamed_parser = pipeline.run()
+
+        self.assertEqual([(symptom.tag, symptom.start_timestamp)
+                          for symptom in streamed_parser.symptoms_found],
+                         [(symptom.tag, symptom.start_timestamp)
+                          for symptom in expected_parser.symptoms_found])
+        self.assertEqual([(burst.tag, burst.symptom_count) for burst in streamed_parser.bursts],
+                         [(burst.tag, burst.symptom_count) for burst in expected_parser.bursts])
+        self.assertEqual(list(streamed_parser.burst_dict), list(expected_parser.burst_dict))
+        self.assertEqual(list(streamed_parser.statistics_summaries),
+                         list(expected_parser.statistics_summaries))
+
+    def test_cross_rule_signal_follows_batch_order(self):
+        self.criterias = [
+            criteria.Criteria("A After B",
+                              signals.IntervalGroupSignal("b_to_a", "b", "a"),
+                              evaluators.LessThanEvaluator(datetime.timedelta(seconds=100)),
+                              "Look at A.")
+        ]
+
+        log_event_parser = event_parser.LogEventParser(self.log_events, self.group_rules)
+        log_event_parser.parse_log_events()
+        expected_parser = group_parser.EventGroupParser(log_event_parser.event_groups_found,
+                                                        self.criterias)
+        expected_parser.parse_event_groups()
+
+        def get_intervals(log_event_batches):
+            pipeline = sift_pipeline.SiftPipeline(iter(log_event_batches), self.group_rules,
+                                                  self.criterias)
+            return [symptom.signal.interval for symptom in pipeline.run().symptoms_found]
+
+        # Staged, every "a" group is sent before every "b" group, as is
+        # the case within a single batch
+        self.assertEqual(get_intervals([self.log_events]),
+                         [symptom.signal.interval for symptom in expected_parser.symptoms_found])
+        self.assertEqual(get_intervals([self.log_events]), [])
+
+        # Across batches the groups arrive closer to the order logged
+        log_event_batches = [self.log_events[:4], self.log_events[4:7], self.log_events[7:]]
+        self.assertEqual(get_intervals(log_event_batches),
+                         [datetime.timedelta(seconds=9), datetime.timedelta(seconds=18)])
+
+    def test_symptoms_yielded_before_log_is_read(self):
+        batches_read = []
+
+        def iter_log_event_batches():
+            for batch_index in range(0, len(self.log_events), 3):
+                batches_read.append(batch_index)
+                yield self.log_events[batch_index:batch_index + 3]
+
+        pipeline = sift_pipeline.SiftPipeline(iter_log_event_batches(), self.group_rules,
+                                              self.criterias)
+        first_symptom = next(pipeline.iter_symptoms())
+
+        self.assertEqual(first_symptom.tag, "Fast Repeat")
+        self.assertEqual(batches_read, [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
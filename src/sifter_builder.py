@@ -1,15 +1,26 @@
 """ Module for providing an object that will ease the process of
     building a LogSifter object """
 
+import sys
+
 from log_sifter import LogSifter
+from stage_cache import StageCache
 
 class SifterBuilder:
-    """ Class for building a Sifter object """
+    """ Class for building a Sifter object. Rules that no criteria
+        depends on are pruned before the sifter is built, so the log is
+        only searched for events that can contribute to a symptom. The
+        stage cache is shared by every sifter the builder builds, so
+        rebuilding after changing some of the rules only reruns the
+        stages that depend on them. """
     def __init__(self):
         self.event_rules = []
         self.group_rules = []
         self.criterias = []
         self.log_file_path = None
+        self.stage_cache = StageCache()
+        self.pruned_event_rules = []
+        self.pruned_group_rules = []
 
     def add_event_rule(self, rule):
         self.event_rules.append(rule)
@@ -30,8 +41,74 @@ class SifterBuilder:
         if not self.criterias:
             raise Exception("BUILDER ERROR:\nBuilder has no criteria defined.")
 
+        group_rules = self.prune_group_rules()
+        event_rules = self.prune_event_rules(group_rules)
+
+        pruning_report = self.get_pruning_report()
+        if pruning_report:
+            print(pruning_report, file=sys.stderr)
+
+        for rule in event_rules:
+            for nested_quantifier in rule.nested_quantifiers:
+                print("Event rule {0} risks catastrophic backtracking: {1}".format(
+                    rule.tag, nested_quantifier), file=sys.stderr)
+
         log_file_path = flags.log_file_path
-        sifter = LogSifter(log_file_path, self.event_rules, self.group_rules,
-                           self.criterias, flags)
+        sifter = LogSifter(log_file_path, event_rules, group_rules,
+                           self.criterias, flags, stage_cache=self.stage_cache)
 
         return sifter
+
+    def prune_group_rules(self):
+        """ Returns the group rules whose groups are consumed by the
+            signal of some criteria. If a signal does not declare the
+            group tags it consumes, no group rule can be pruned. """
+
+        consumed_group_tags = set()
+        for criteria in self.criterias:
+            get_group_tags = getattr(criteria.signal, "get_group_tags", None)
+            if get_group_tags is None:
+                self.pruned_group_rules = []
+                return self.group_rules
+
+            consumed_group_tags.update(get_group_tags())
+
+        group_rules = [rule for rule in self.group_rules if rule.tag in consumed_group_tags]
+        self.pruned_group_rules = [rule for rule in self.group_rules
+                                   if rule.tag not in consumed_group_tags]
+
+        return group_rules
+
+    def prune_event_rules(self, group_rules):
+        """ Returns the event rules whose events trigger or give context
+            to one of the given group rules. """
+
+        consumed_event_tags = set()
+        for rule in group_rules:
+            consumed_event_tags.update(rule.trigger_event_tags)
+            consumed_event_tags.update(rule.context_event_tags)
+
+        event_rules = [rule for rule in self.event_rules if rule.tag in consumed_event_tags]
+        self.pruned_event_rules = [rule for rule in self.event_rules
+                                   if rule.tag not in consumed_event_tags]
+
+        return event_rules
+
+    def get_pruning_report(self):
+        """ Returns a listing of the rules left out of the last sifter
+            built because no criteria depends on them, or an empty string
+            if every rule was used. """
+
+        report_lines = []
+
+        if self.pruned_group_rules:
+            report_lines.append("Pruned {0} unused event group rules: {1}".format(
+                len(self.pruned_group_rules),
+                ", ".join(rule.tag for rule in self.pruned_group_rules)))
+
+        if self.pruned_event_rules:
+            report_lines.append("Pruned {0} unused event rules: {1}".format(
+                len(self.pruned_event_rules),
+                ", ".join(rule.tag for rule in self.pruned_event_rules)))
+
+        return "\n".join(report_lines)
@@ -0,0 +1,65 @@
+""" Module for unit testing the building of a LogSifter """
+
+import argparse
+import contextlib
+import io
+import unittest
+
+import criteria
+import evaluators
+import event_group_rule
+import event_rule
+import signals
+import sifter_builder
+
+class SifterBuilderTest(unittest.TestCase):
+    """ Test suite for the sifter builder """
+    def setUp(self):
+        super(SifterBuilderTest, self).setUp()
+
+        self.builder = sifter_builder.SifterBuilder()
+        for tag in ["start", "end", "context", "unused"]:
+            self.builder.add_event_rule(event_rule.EventRule(tag, "(.*)(" + tag + ")(.*)"))
+
+        self.builder.add_group_rule(event_group_rule.EventGroupRule("used", ["start", "end"],
+                                                                    ["context"]))
+        self.builder.add_group_rule(event_group_rule.EventGroupRule("unused", ["unused"]))
+        self.builder.add_criteria(
+            criteria.Criteria(
+                symptom_tag="Test Symptom",
+                signal=signals.ExistenceGroupSignal(tag="test_signal", group_tag="used"),
+                evaluator=evaluators.ExistenceEvaluator(),
+                action_msg="Do Nothing."
+            )
+        )
+
+        self.flags = argparse.Namespace(log_file_path="test_data/fake_logs/gsys_fake_log")
+
+    def build_sifter(self):
+        with contextlib.redirect_stderr(io.StringIO()) as report:
+            sifter = self.builder.build_sifter(self.flags)
+        return sifter, report.getvalue()
+
+    def test_unreachable_rules_pruned(self):
+        sifter, report = self.build_sifter()
+
+        self.assertEqual([rule.tag for rule in sifter.group_rules], ["used"])
+        self.assertEqual([rule.tag for rule in sifter.event_rules], ["start", "end", "context"])
+        self.assertIn("unused event group rules: unused", report)
+        self.assertIn("unused event rules: unused", report)
+
+    def test_undeclared_signal_keeps_all_rules(self):
+        class CustomSignal:
+            def detect_signals(self, event_groups):
+                return []
+
+        self.builder.criterias[0].signal = CustomSignal()
+        sifter, report = self.build_sifter()
+
+        self.assertEqual(len(sifter.group_rules), 2)
+        self.assertEqual(len(sifter.event_rules), 4)
+        self.assertEqual(report, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+""" Module for sharing the work of detecting a signal between every
+    criteria that applies it """
+
+import copy
+
+import coroutines
+import fingerprint
+
+def get_signal_key(signal):
+    """ Returns a key identifying what a signal detects, made from its
+        type and every parameter but its tag, so signals that only
+        differ in tag share a key. """
+
+    parameters = {name: value for name, value in vars(signal).items() if name != "tag"}
+    return fingerprint.get_fingerprint(type(signal).__module__, type(signal).__qualname__,
+                                       parameters)
+
+def retag_signals(detected_signals, tag):
+    """ Returns copies of the detected signals carrying the tag, sharing
+        their groups with the originals. """
+
+    retagged_signals = []
+    for detected_signal in detected_signals:
+        retagged_signal = copy.copy(detected_signal)
+        retagged_signal.tag = tag
+        retagged_signals.append(retagged_signal)
+
+    return retagged_signals
+
+@coroutines.coroutine
+def retag_signal_stream(target, tag):
+    """ Coroutine sending target a copy of each detected signal sent to
+        it carrying the tag. """
+
+    try:
+        while True:
+            target.send(retag_signals([(yield)], tag)[0])
+    finally:
+        target.close()
+
+class SignalPlan:
+    """ Detects each distinct signal in the event groups only once, no
+        matter how many criteria apply it, and hands every criteria the
+        signals it detects under its own signal's tag.
+
+        Attributes
+        ----------
+        event_groups: list of LogEventGroups or EventGroupIndex the
+                      signals are detected in
+        detected_signals: dict of lists of DetectedSignals with the
+                          signal key as key, holding the first detection
+                          of each distinct signal
+        detected_signal_arrays: dict of SignalArrays, or None for groups
+                                without datetime timestamps, with the
+                                signal key as key """
+
+    def __init__(self, event_groups):
+        self.event_groups = event_groups
+        self.detected_signals = {}
+        self.detected_signal_arrays = {}
+
+    def detect_signals(self, signal):
+        """ Returns the signals detected by the signal, reusing those of
+            any signal with the same key that was already detected. """
+
+        signal_key = get_signal_key(signal)
+
+        if signal_key not in self.detected_signals:
+            detected_signals = signal.detect_signals(self.event_groups)
+            self.detected_signals[signal_key] = detected_signals
+            return detected_signals
+
+        # Each criteria gets its own copies, as a detected signal
+        # identifies the symptom built from it
+        return retag_signals(self.detected_signals[signal_key], signal.tag)
+
+    def detect_signal_arrays(self, signal):
+        """ Returns the SignalArrays detected by the signal, reusing those
+            of any signal with the same key that was already detected. """
+
+        signal_key = get_signal_key(signal)
+
+        if signal_key not in self.detected_signal_arrays:
+            signal_arrays = signal.detect_signal_arrays(self.event_groups)
+            self.detected_signal_arrays[signal_key] = signal_arrays
+            return signal_arrays
+
+        signal_arrays = self.detected_signal_arrays[signal_key]
+        if signal_arrays is None:
+            return None
+        return signal_arrays.retag(signal.tag)
@@ -0,0 +1,66 @@
+""" Module for testing the sharing of signal detection between criteria """
+
+import datetime
+import unittest
+
+import criteria
+import evaluators
+import group_parser
+import mocks
+import signal_plan
+import signals
+
+class CountingRepeatGroupSignal(signals.RepeatGroupSignal):
+    """ Repeat signal counting the times it is detected """
+    detection_count = 0
+
+    def detect_signal_arrays(self, event_groups):
+        CountingRepeatGroupSignal.detection_count += 1
+        return super(CountingRepeatGroupSignal, self).detect_signal_arrays(event_groups)
+
+class SignalPlanTest(unittest.TestCase):
+    """ Test suite for the signal plan """
+    def setUp(self):
+        super(SignalPlanTest, self).setUp()
+
+        start_time = datetime.datetime(2020, 1, 1)
+        self.event_groups = []
+        for seconds in [0, 2, 10, 11, 30]:
+            trigger_event = mocks.MockLogEvent("A", start_time + datetime.timedelta(seconds=seconds))
+            self.event_groups.append(mocks.MockLogEventGroup("a", [trigger_event]))
+
+        CountingRepeatGroupSignal.detection_count = 0
+
+    def test_signal_key_ignores_tag_only(self):
+        repeat_key = signal_plan.get_signal_key(signals.RepeatGroupSignal("warning", "a"))
+
+        self.assertEqual(repeat_key,
+                         signal_plan.get_signal_key(signals.RepeatGroupSignal("critical", "a")))
+        self.assertNotEqual(repeat_key,
+                            signal_plan.get_signal_key(signals.RepeatGroupSignal("warning", "b")))
+        self.assertNotEqual(repeat_key,
+                            signal_plan.get_signal_key(signals.ExistenceGroupSignal("warning", "a")))
+
+    def test_shared_signal_detected_once(self):
+        warning_criteria = criteria.Criteria(
+            "Warning", CountingRepeatGroupSignal("warning_signal", "a"),
+            evaluators.LessThanEvaluator(datetime.timedelta(seconds=5)), "Watch it.")
+        critical_criteria = criteria.Criteria(
+            "Critical", CountingRepeatGroupSignal("critical_signal", "a"),
+            evaluators.LessThanEvaluator(datetime.timedelta(seconds=2)), "Act now.")
+
+        parser = group_parser.EventGroupParser(self.event_groups,
+                                               [warning_criteria, critical_criteria], True)
+        parser.parse_event_groups()
+
+        self.assertEqual(CountingRepeatGroupSignal.detection_count, 1)
+        self.assertEqual([len(symptoms) for symptoms in parser.criteria_symptoms], [2, 1])
+        self.assertEqual(sorted(parser.statistics_summaries), ["critical_signal", "warning_signal"])
+
+        critical_signal = parser.criteria_symptoms[1][0].signal
+        self.assertEqual(critical_signal.tag, "critical_signal")
+        self.assertEqual(critical_signal.interval, datetime.timedelta(seconds=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,85 +1,329 @@
 """ Module for collecting statistics on occcurences of signals """
 
+import math
+
 import numpy as np
 
-class SignalStatistics:
-    """ Object for parsing over signals and collecting statistics about
-        occurence rates, durations, and interval """
+US_PER_SECOND = 10 ** 6
+US_PER_HOUR = 3600 * US_PER_SECOND
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BUCKET_COUNT = 2048
+SUMMARY_QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+class QuantileSketch:
+    """ Mergeable sketch estimating quantiles of a stream of values
+        without storing them. Values are counted in buckets growing
+        geometrically in size, so any quantile is estimated within the
+        relative accuracy of the true value, and sketches with the same
+        relative accuracy merge by adding their bucket counts. Once more
+        than max_bucket_count buckets are used on either side of zero,
+        the buckets nearest zero are folded together, so memory stays
+        bounded at the cost of accuracy for the smallest values only.
+
+        Attributes
+        ----------
+        relative_accuracy: float relative error of an estimated quantile
+        max_bucket_count: int number of buckets kept per sign
+        gamma: float ratio between the bounds of each bucket
+        positive_counts: dict of value counts with the bucket as key
+        negative_counts: dict of counts of the negated values with the
+                         bucket as key
+        zero_count: int count of the values equal to zero
+        count: int count of every value added """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY,
+                 max_bucket_count=DEFAULT_MAX_BUCKET_COUNT):
+        if not 0 < relative_accuracy < 1:
+            raise Exception("The relative accuracy of a quantile sketch must be between 0 and 1.")
+
+        self.relative_accuracy = relative_accuracy
+        self.max_bucket_count = max_bucket_count
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+
+        self.positive_counts = {}
+        self.negative_counts = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        if value > 0:
+            self.add_bucket_counts(self.positive_counts, {self.get_bucket(value): 1})
+        elif value < 0:
+            self.add_bucket_counts(self.negative_counts, {self.get_bucket(-value): 1})
+        else:
+            self.zero_count += 1
+
+        self.count += 1
+
+    def add_array(self, values):
+        """ Adds every value of a NumPy array at once. """
+
+        values = np.asarray(values, dtype=np.float64)
+
+        for counts, magnitudes in [(self.positive_counts, values[values > 0]),
+                                   (self.negative_counts, -values[values < 0])]:
+            if len(magnitudes) > 0:
+                buckets = np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64)
+                bucket_keys, bucket_counts = np.unique(buckets, return_counts=True)
+                self.add_bucket_counts(counts, dict(zip(bucket_keys.tolist(),
+                                                        bucket_counts.tolist())))
+
+        self.zero_count += int(np.count_nonzero(values == 0))
+        self.count += len(values)
+
+    def merge(self, other):
+        """ Adds the counts of another sketch with the same relative
+            accuracy to this one. """
+
+        if other.relative_accuracy != self.relative_accuracy:
+            raise Exception("Only quantile sketches with the same relative accuracy can be merged.")
+
+        self.add_bucket_counts(self.positive_counts, other.positive_counts)
+        self.add_bucket_counts(self.negative_counts, other.negative_counts)
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def get_quantile(self, quantile):
+        """ Returns the estimated value at the quantile, between 0 and 1,
+            or None if no value was added. """
+
+        if self.count == 0:
+            return None
+
+        rank = quantile * (self.count - 1)
+        seen_count = 0
+
+        # Walk the buckets from the lowest value to the highest
+        for bucket in sorted(self.negative_counts, reverse=True):
+            seen_count += self.negative_counts[bucket]
+            if seen_count > rank:
+                return -self.get_bucket_value(bucket)
+
+        seen_count += self.zero_count
+        if seen_count > rank:
+            return 0.0
+
+        for bucket in sorted(self.positive_counts):
+            seen_count += self.positive_counts[bucket]
+            if seen_count > rank:
+                return self.get_bucket_value(bucket)
+
+    def get_bucket(self, magnitude):
+        return math.ceil(math.log(magnitude) / self.log_gamma)
+
+    def get_bucket_value(self, bucket):
+        """ Returns the value within the relative accuracy of every
+            value in the bucket. """
+
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    def add_bucket_counts(self, counts, new_counts):
+        for bucket, count in new_counts.items():
+            counts[bucket] = counts.get(bucket, 0) + count
+
+        if len(counts) > self.max_bucket_count:
+            # Fold the buckets nearest zero into the lowest one kept
+            buckets = sorted(counts)
+            folded_buckets = buckets[:len(buckets) - self.max_bucket_count + 1]
+            folded_count = sum(counts.pop(bucket) for bucket in folded_buckets)
+            counts[folded_buckets[-1]] = folded_count
+
+class RunningStatistics:
+    """ Mean, variance, extremes and quantiles of a stream of values,
+        updated as each value arrives with Welford's method instead of
+        storing the values. Statistics of separate streams, such as
+        those of different workers, merge into those of the combined
+        stream.
+
+        Attributes
+        ----------
+        count: int count of the values added
+        mean: float mean of the values added
+        m2: float sum of the squared differences from the mean
+        min: minimum value added, or None
+        max: maximum value added, or None
+        sketch: QuantileSketch of the values added """
+
     def __init__(self):
-        pass
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch()
 
-    def collect_signal_stats(self, signals):
-        """ Loops through the given signals and adds their hour of
-            occurrence, duration, and interval since last occurence to
-            their respective datasets. """
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
 
-        occurence_rate_data = {}
-        duration_data = []
-        interval_data = []
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.sketch.add(value)
 
-        signal_tag = signals[0].tag
+    def add_array(self, values):
+        """ Adds every value of a NumPy array at once, by merging in
+            the statistics of the array. """
+
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+
+        array_mean = float(np.mean(values))
+        self.merge_moments(len(values), array_mean,
+                           float(np.sum(np.square(values - array_mean))),
+                           float(np.min(values)), float(np.max(values)))
+        self.sketch.add_array(values)
+
+    def merge(self, other):
+        """ Merges the statistics of another stream into these. """
+
+        if other.count > 0:
+            self.merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+            self.sketch.merge(other.sketch)
+
+    def merge_moments(self, count, mean, m2, min_value, max_value):
+        """ Combines the moments of the values added with those of
+            another set of values, following Chan et al. """
+
+        total_count = self.count + count
+        delta = mean - self.mean
+
+        self.m2 += m2 + delta * delta * self.count * count / total_count
+        self.mean += delta * count / total_count
+        self.count = total_count
+
+        self.min = min_value if self.min is None else min(self.min, min_value)
+        self.max = max_value if self.max is None else max(self.max, max_value)
+
+    def get_std(self):
+        """ Returns the population standard deviation of the values. """
+
+        return math.sqrt(self.m2 / self.count)
+
+    def get_summary(self):
+        """ Returns a dictionary of the statistics of the values, each
+            None if no value was added. """
+
+        if self.count == 0:
+            summary = {"mean": None, "std": None, "max": None, "min": None}
+            summary.update({name: None for name in SUMMARY_QUANTILES})
+            return summary
+
+        summary = {
+            "mean": self.mean,
+            "std": self.get_std(),
+            "max": self.max,
+            "min": self.min
+        }
+
+        # Estimates are kept within the values actually seen
+        for name, quantile in SUMMARY_QUANTILES.items():
+            estimate = self.sketch.get_quantile(quantile)
+            summary[name] = min(max(estimate, self.min), self.max)
 
-        for signal in signals:
-            duration = signal.duration
-            hour = signal.start_timestamp.hour
-            interval = signal.interval
-            
-            if hour not in occurence_rate_data:
-                occurence_rate_data[hour] = 1
-            else:
-                occurence_rate_data[hour] += 1
-            
-            duration_data.append(duration.total_seconds())
-            if interval is not None:
-                interval_data.append(interval.total_seconds())
-
-        summary = self.get_summary(signal_tag, occurence_rate_data,
-                                   duration_data, interval_data)
         return summary
 
-    def get_summary(self, signal_tag, occurence_rate_data, 
-                    duration_data, interval_data):
-        """ Makes the NumPy calls to calculate the actual statistics
-            and groups all these together into a summary dicitonary. """
+class SignalAccumulator:
+    """ Accumulates statistics about the occurence rates, durations and
+        intervals of a signal as each detected signal is produced, in
+        memory that does not grow with the number of signals.
+        Accumulators of the same signal over different parts of a log
+        can be merged.
 
-        all_hours = list(occurence_rate_data.keys())
-        hour_span = np.max(all_hours) - np.min(all_hours)
-        hourly_rate = np.sum(list(occurence_rate_data.values())) / max(float(hour_span), 1)
+        Attributes
+        ----------
+        signal_tag: string tag of the signal
+        signal_count: int count of the signals added
+        hour_counts: dict of signal counts with the hour of the day
+                     they started in as key
+        durations: RunningStatistics of signal durations in seconds
+        intervals: RunningStatistics of signal intervals in seconds """
 
-        durations = np.array(duration_data)
-        duration_mean = np.mean(durations)
-        duration_std = np.std(durations)
-        duration_max = np.max(durations)
-        duration_min = np.min(durations)
+    def __init__(self, signal_tag):
+        self.signal_tag = signal_tag
+        self.signal_count = 0
+        self.hour_counts = {}
+        self.durations = RunningStatistics()
+        self.intervals = RunningStatistics()
 
-        intervals = np.array(interval_data)
+    def add_signal(self, detected_signal):
+        hour = detected_signal.start_timestamp.hour
+        self.hour_counts[hour] = self.hour_counts.get(hour, 0) + 1
+        self.signal_count += 1
 
-        if len(intervals) > 0:
-            interval_mean_s = np.mean(intervals)
-            interval_std_s = np.std(intervals)
-            interval_max_s = np.max(intervals)
-            interval_min_s = np.min(intervals)
-        else:
-            interval_mean_s = None
-            interval_std_s = None
-            interval_max_s = None
-            interval_min_s = None
+        self.durations.add(detected_signal.duration.total_seconds())
+        if detected_signal.interval is not None:
+            self.intervals.add(detected_signal.interval.total_seconds())
+
+    def add_signal_arrays(self, signal_arrays):
+        """ Adds every signal of the SignalArrays at once. """
+
+        start_hours = (signal_arrays.start_timestamps_us // US_PER_HOUR) % 24
+        hours, hour_counts = np.unique(start_hours, return_counts=True)
+        for hour, hour_count in zip(hours.tolist(), hour_counts.tolist()):
+            self.hour_counts[hour] = self.hour_counts.get(hour, 0) + hour_count
+        self.signal_count += len(signal_arrays)
+
+        self.durations.add_array((signal_arrays.end_timestamps_us
+                                  - signal_arrays.start_timestamps_us) / US_PER_SECOND)
+        self.intervals.add_array(signal_arrays.intervals_us / US_PER_SECOND)
+
+    def merge(self, other):
+        """ Merges the statistics another accumulator collected of the
+            same signal into these. """
+
+        for hour, hour_count in other.hour_counts.items():
+            self.hour_counts[hour] = self.hour_counts.get(hour, 0) + hour_count
+        self.signal_count += other.signal_count
+
+        self.durations.merge(other.durations)
+        self.intervals.merge(other.intervals)
+
+    def get_summary(self):
+        """ Groups the statistics into a summary dictionary, or returns
+            None if no signal was added. """
+
+        if self.signal_count == 0:
+            return None
+
+        hour_span = max(self.hour_counts) - min(self.hour_counts)
+        hourly_rate = self.signal_count / max(float(hour_span), 1)
 
         summary_dict = {
-            "signal_tag": signal_tag,
+            "signal_tag": self.signal_tag,
             "hourly_rate": hourly_rate,
-            "durations_data_seconds": {
-                "mean": duration_mean,
-                "std": duration_std,
-                "max": duration_max,
-                "min": duration_min
-            },
-            "interval_data_seconds": {
-                "mean": interval_mean_s,
-                "std": interval_std_s,
-                "max": interval_max_s,
-                "min": interval_min_s,
-            }
+            "durations_data_seconds": self.durations.get_summary(),
+            "interval_data_seconds": self.intervals.get_summary()
         }
 
         return summary_dict
+
+class SignalStatistics:
+    """ Object for parsing over signals and collecting statistics about
+        occurence rates, durations, and interval """
+    def __init__(self):
+        pass
+
+    def collect_signal_stats(self, signals):
+        """ Adds each of the given signals to an accumulator and returns
+            the summary of their statistics. """
+
+        signal_accumulator = SignalAccumulator(signals[0].tag)
+
+        for signal in signals:
+            signal_accumulator.add_signal(signal)
+
+        return signal_accumulator.get_summary()
+
+    def collect_signal_array_stats(self, signal_arrays):
+        """ Collects the same statistics as collect_signal_stats from
+            SignalArrays, without building a signal for each entry. """
+
+        signal_accumulator = SignalAccumulator(signal_arrays.tag)
+        signal_accumulator.add_signal_arrays(signal_arrays)
+
+        return signal_accumulator.get_summary()
@@ -0,0 +1,85 @@
+""" Module for testing the collection of signal statistics """
+
+import datetime
+import unittest
+
+import numpy as np
+
+import mocks
+import signal_statistics
+import signals
+
+class SignalStatisticsTest(unittest.TestCase):
+    """ Test suite for the signal statistics """
+    def setUp(self):
+        super(SignalStatisticsTest, self).setUp()
+
+        self.values = np.random.default_rng(0).lognormal(0, 2, 10000) - 1
+
+    def test_running_statistics_match_numpy(self):
+        running_statistics = signal_statistics.RunningStatistics()
+        for value in self.values.tolist():
+            running_statistics.add(value)
+
+        summary = running_statistics.get_summary()
+
+        self.assertAlmostEqual(summary["mean"], np.mean(self.values))
+        self.assertAlmostEqual(summary["std"], np.std(self.values))
+        self.assertEqual(summary["max"], np.max(self.values))
+        self.assertEqual(summary["min"], np.min(self.values))
+
+        for name, quantile in signal_statistics.SUMMARY_QUANTILES.items():
+            exact_value = np.quantile(self.values, quantile, method="lower")
+            self.assertLessEqual(abs(summary[name] - exact_value),
+                                 abs(exact_value) * signal_statistics.DEFAULT_RELATIVE_ACCURACY)
+
+    def test_merged_statistics_match_single_stream(self):
+        single_statistics = signal_statistics.RunningStatistics()
+        single_statistics.add_array(self.values)
+
+        # Each worker sees part of the stream
+        merged_statistics = signal_statistics.RunningStatistics()
+        for worker_values in np.array_split(self.values, 3):
+            worker_statistics = signal_statistics.RunningStatistics()
+            for value in worker_values.tolist():
+                worker_statistics.add(value)
+            merged_statistics.merge(worker_statistics)
+
+        single_summary = single_statistics.get_summary()
+        merged_summary = merged_statistics.get_summary()
+
+        for name in ["mean", "std", "max", "min"]:
+            self.assertAlmostEqual(merged_summary[name], single_summary[name])
+        for name in signal_statistics.SUMMARY_QUANTILES:
+            self.assertEqual(merged_summary[name], single_summary[name])
+
+    def test_bucket_count_bounded(self):
+        sketch = signal_statistics.QuantileSketch(max_bucket_count=16)
+        sketch.add_array(np.abs(self.values) + 1e-9)
+
+        self.assertLessEqual(len(sketch.positive_counts), 16)
+        self.assertEqual(sum(sketch.positive_counts.values()), len(self.values))
+
+    def test_accumulator_matches_signal_arrays(self):
+        start_time = datetime.datetime(2020, 1, 1, 5)
+        mock_event_groups = []
+        for seconds in [0, 2, 10, 11, 30, 3700]:
+            trigger_event = mocks.MockLogEvent("A", start_time + datetime.timedelta(seconds=seconds))
+            mock_event_groups.append(mocks.MockLogEventGroup("a", [trigger_event]))
+
+        signal = signals.RepeatGroupSignal("a_repeat", "a")
+
+        signal_accumulator = signal_statistics.SignalAccumulator("a_repeat")
+        for detected_signal in signal.detect_signals(mock_event_groups):
+            signal_accumulator.add_signal(detected_signal)
+
+        statistics_collector = signal_statistics.SignalStatistics()
+        array_summary = statistics_collector.collect_signal_array_stats(
+            signal.detect_signal_arrays(mock_event_groups))
+
+        self.assertEqual(signal_accumulator.hour_counts, {5: 5})
+        self.assertEqual(signal_accumulator.get_summary(), array_summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,16 @@
 """ Module for defining the different types of signals that can be 
     extracted from a list of event groups. """
 
+import collections
+import copy
 import datetime
 
+import numpy as np
+
+import coroutines
+import event_group_index
+from log_event_table import EPOCH
+
 class DetectedSignal:
     """ Object for representing a signal that has been found """
     def __init__(self, tag, time, groups):
@@ -34,6 +42,129 @@ class DetectedSignal:
 
         return dict_form
 
+class SignalArrays:
+    """ Signals detected between pairs of groups, held as arrays with one
+        entry per signal in the order they are detected, so they can be
+        evaluated before any DetectedSignal is built for them.
+
+        Attributes
+        ----------
+        tag: label of the signal detected
+        start_groups: list of the groups the signals start at
+        end_groups: list of the groups the signals end at
+        start_indices: int64 array of the index in start_groups of the
+                       group each signal starts at
+        end_indices: int64 array of the index in end_groups of the group
+                     each signal ends at
+        intervals_us: int64 array of the microseconds between the last
+                      trigger event of each start group and the first
+                      trigger event of its end group
+        start_timestamps_us: int64 array of the epoch microsecond
+                             timestamp each signal starts at
+        end_timestamps_us: int64 array of the epoch microsecond
+                           timestamp each signal ends at """
+
+    def __init__(self, tag, start_groups, end_groups, start_indices, end_indices,
+                 intervals_us, start_timestamps_us, end_timestamps_us):
+        self.tag = tag
+        self.start_groups = start_groups
+        self.end_groups = end_groups
+        self.start_indices = start_indices
+        self.end_indices = end_indices
+        self.intervals_us = intervals_us
+        self.start_timestamps_us = start_timestamps_us
+        self.end_timestamps_us = end_timestamps_us
+
+    def __len__(self):
+        return len(self.intervals_us)
+
+    def build_signal(self, index):
+        """ Builds the DetectedSignal of the signal at the index. """
+
+        interval = datetime.timedelta(microseconds=int(self.intervals_us[index]))
+        groups = [self.start_groups[self.start_indices[index]],
+                  self.end_groups[self.end_indices[index]]]
+        return DetectedSignal(self.tag, interval, groups)
+
+    def retag(self, tag):
+        """ Returns a copy of the signals labelled with the tag, sharing
+            the arrays of these signals. """
+
+        retagged_arrays = copy.copy(self)
+        retagged_arrays.tag = tag
+        return retagged_arrays
+
+class SignalMarks:
+    """ Marks each signal a criteria detected, in the order it detected
+        them, as confirmed or innocent, along with the times each signal
+        spans, so bursts can be found without the signals themselves.
+
+        Attributes
+        ----------
+        is_confirmed: bool array marking the confirmed signals
+        start_timestamps_us: int64 array of the epoch microsecond
+                             timestamp each signal starts at
+        end_timestamps_us: int64 array of the epoch microsecond
+                           timestamp each signal ends at """
+
+    def __init__(self, is_confirmed, start_timestamps_us, end_timestamps_us):
+        self.is_confirmed = is_confirmed
+        self.start_timestamps_us = start_timestamps_us
+        self.end_timestamps_us = end_timestamps_us
+
+    def __len__(self):
+        return len(self.is_confirmed)
+
+def mark_signals(detected_signals, confirmed_signals):
+    """ Builds the SignalMarks of detected signals, where those in
+        confirmed_signals are confirmed. """
+
+    signal_count = len(detected_signals)
+
+    return SignalMarks(
+        np.fromiter((detected_signal in confirmed_signals for detected_signal in detected_signals),
+                    bool, signal_count),
+        np.fromiter((get_epoch_microseconds(detected_signal.start_timestamp)
+                     for detected_signal in detected_signals), np.int64, signal_count),
+        np.fromiter((get_epoch_microseconds(detected_signal.end_timestamp)
+                     for detected_signal in detected_signals), np.int64, signal_count))
+
+def get_epoch_microseconds(timestamp):
+    """ Converts a datetime to epoch microseconds. """
+
+    if not isinstance(timestamp, datetime.datetime):
+        raise Exception("Only datetime timestamps can be converted to epoch microseconds.")
+    return (timestamp - EPOCH) // datetime.timedelta(microseconds=1)
+
+def get_timestamps_us(events):
+    """ Returns an int64 array of the epoch microsecond timestamps of the
+        events, or None if the events' timestamps are not datetimes. """
+
+    if len(events) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if not isinstance(events[0].timestamp, datetime.datetime):
+        return None
+
+    return np.fromiter((event.timestamp_us for event in events), np.int64, len(events))
+
+def get_trigger_timestamps_us(groups):
+    """ Returns int64 arrays of the epoch microsecond timestamps of the
+        first and of the last trigger event of each group, or None if
+        the events' timestamps are not datetimes. """
+
+    first_timestamps_us = get_timestamps_us([group.trigger_log_events[0] for group in groups])
+    last_timestamps_us = get_timestamps_us([group.trigger_log_events[-1] for group in groups])
+
+    if first_timestamps_us is None or last_timestamps_us is None:
+        return None
+    return first_timestamps_us, last_timestamps_us
+
+def get_group_index(event_groups):
+    if isinstance(event_groups, event_group_index.EventGroupIndex):
+        return event_groups
+    return event_group_index.EventGroupIndex(event_groups)
+
 class IntervalGroupSignal:
     """ Interval signal detector for event groups """
     def __init__(self, tag, start_group_tag, end_group_tag):
@@ -41,59 +172,148 @@ class IntervalGroupSignal:
         self.start_group_tag = start_group_tag
         self.end_group_tag = end_group_tag
 
+    def get_group_tags(self):
+        return [self.start_group_tag, self.end_group_tag]
+
     def detect_signals(self, event_groups):
         """ Loops through event groups and creates a DetectedSignal for
             each time delta between the start and end event group. """
 
-        signals = []
-        start_group_queue = []
+        event_groups = event_group_index.select_groups(event_groups, self.get_group_tags())
+        return coroutines.run_pipeline(self.signal_detector, event_groups)
 
-        for group in event_groups:
-            tag = group.tag
+    def detect_signal_arrays(self, event_groups):
+        """ Detects the same signals as detect_signals as SignalArrays,
+            or returns None if the groups' timestamps are not datetimes.
 
-            if tag == self.start_group_tag:
-                start_group_queue.append(group)
-            elif tag == self.end_group_tag:
-                if len(start_group_queue) > 0:
-                    start_group = start_group_queue.pop(0)
-            
-                    start_timestamp = start_group.trigger_log_events[-1].timestamp
-                    end_timestamp = group.trigger_log_events[0].timestamp
-                    timedelta = end_timestamp - start_timestamp
+            Each end group is paired with the oldest unpaired start group
+            before it. If c[j] start groups come before the jth end group,
+            the number of end groups paired up to and including the jth
+            is m[j] = min(m[j - 1] + 1, c[j]), which unrolls to
+            j + min(1, min(c[i] - i for i <= j)). The jth end group is
+            paired when m[j] grows, and is paired with start group
+            m[j] - 1. """
+
+        group_index = get_group_index(event_groups)
+
+        start_groups = group_index.tag_groups.get(self.start_group_tag, [])
+        start_positions = group_index.tag_positions.get(self.start_group_tag, [])
+        end_groups = group_index.tag_groups.get(self.end_group_tag, [])
+        end_positions = group_index.tag_positions.get(self.end_group_tag, [])
+
+        if self.start_group_tag == self.end_group_tag:
+            # Every group is a start group, so none is an end group
+            end_groups = []
+            end_positions = []
+
+        start_timestamps_us = get_trigger_timestamps_us(start_groups)
+        end_timestamps_us = get_trigger_timestamps_us(end_groups)
+        if start_timestamps_us is None or end_timestamps_us is None:
+            return None
+
+        prior_start_counts = np.searchsorted(np.array(start_positions, dtype=np.int64),
+                                             np.array(end_positions, dtype=np.int64))
+        end_numbers = np.arange(len(end_groups), dtype=np.int64)
+        paired_counts = end_numbers + np.minimum(
+            np.minimum.accumulate(prior_start_counts - end_numbers), 1)
+
+        is_paired = np.diff(paired_counts, prepend=0) == 1
+        end_indices = np.flatnonzero(is_paired)
+        start_indices = paired_counts[is_paired] - 1
+
+        start_first_us, start_last_us = start_timestamps_us
+        end_first_us, end_last_us = end_timestamps_us
+
+        return SignalArrays(self.tag, start_groups, end_groups, start_indices, end_indices,
+                            end_first_us[end_indices] - start_last_us[start_indices],
+                            start_first_us[start_indices], end_last_us[end_indices])
+
+    @coroutines.coroutine
+    def signal_detector(self, target):
+        """ Coroutine receiving event groups in order and sending target
+            a DetectedSignal as each end group is paired with the
+            oldest unpaired start group. """
+
+        start_group_queue = collections.deque()
 
-                    detected_signal = DetectedSignal(self.tag, timedelta, 
-                                                     [start_group, group])
-                    signals.append(detected_signal)
+        try:
+            while True:
+                group = yield
+                tag = group.tag
 
-        return signals
+                if tag == self.start_group_tag:
+                    start_group_queue.append(group)
+                elif tag == self.end_group_tag:
+                    if len(start_group_queue) > 0:
+                        start_group = start_group_queue.popleft()
+                
+                        start_timestamp = start_group.trigger_log_events[-1].timestamp
+                        end_timestamp = group.trigger_log_events[0].timestamp
+                        timedelta = end_timestamp - start_timestamp
+
+                        detected_signal = DetectedSignal(self.tag, timedelta, 
+                                                         [start_group, group])
+                        target.send(detected_signal)
+        finally:
+            target.close()
 
 class RepeatGroupSignal:
     """ Repeating group signal detector """
     def __init__(self, tag, group_tag):
         self.tag = tag
         self.group_tag = group_tag
+
+    def get_group_tags(self):
+        return [self.group_tag]
         
     def detect_signals(self, event_groups):
         """ Loops through event groups and creates a DetectedSignal for
             each time delta between repeats of the given event group. """
 
-        signals = []
+        event_groups = event_group_index.select_groups(event_groups, self.get_group_tags())
+        return coroutines.run_pipeline(self.signal_detector, event_groups)
+
+    def detect_signal_arrays(self, event_groups):
+        """ Detects the same signals as detect_signals as SignalArrays,
+            or returns None if the groups' timestamps are not datetimes. """
+
+        groups = get_group_index(event_groups).tag_groups.get(self.group_tag, [])
+
+        trigger_timestamps_us = get_trigger_timestamps_us(groups)
+        if trigger_timestamps_us is None:
+            return None
+
+        first_timestamps_us, last_timestamps_us = trigger_timestamps_us
+        start_indices = np.arange(max(len(groups) - 1, 0), dtype=np.int64)
+
+        return SignalArrays(self.tag, groups, groups, start_indices, start_indices + 1,
+                            first_timestamps_us[1:] - last_timestamps_us[:-1],
+                            first_timestamps_us[:-1], last_timestamps_us[1:])
+
+    @coroutines.coroutine
+    def signal_detector(self, target):
+        """ Coroutine receiving event groups in order and sending target
+            a DetectedSignal for each repeat of the group. """
 
         start_group = None
-        for group in event_groups:
-            if group.tag == self.group_tag:
-                if start_group is not None:
-                    start_timestamp = start_group.trigger_log_events[-1].timestamp
-                    end_timestamp = group.trigger_log_events[0].timestamp
-                    timedelta = end_timestamp - start_timestamp
 
-                    detected_signals = DetectedSignal(self.tag, timedelta, 
-                                                      [start_group, group])
-                    signals.append(detected_signals)
+        try:
+            while True:
+                group = yield
+
+                if group.tag == self.group_tag:
+                    if start_group is not None:
+                        start_timestamp = start_group.trigger_log_events[-1].timestamp
+                        end_timestamp = group.trigger_log_events[0].timestamp
+                        timedelta = end_timestamp - start_timestamp
 
-                start_group = group
+                        detected_signal = DetectedSignal(self.tag, timedelta, 
+                                                         [start_group, group])
+                        target.send(detected_signal)
 
-        return signals
+                    start_group = group
+        finally:
+            target.close()
 
 class ExistenceGroupSignal:
     """ Object for detecting existence of a group """
@@ -101,18 +321,30 @@ class ExistenceGroupSignal:
         self.tag = tag
         self.group_tag = group_tag
 
+    def get_group_tags(self):
+        return [self.group_tag]
+
     def detect_signals(self, event_groups):
         """ Loops through event groups and creates a DetctedSignal for
             each occurence of the given event group. """
 
-        signals = []
-        for group in event_groups:
-            if group.tag == self.group_tag:
-                timestamp = group.trigger_log_events[0].timestamp
-                detected_signal = DetectedSignal(self.tag, timestamp, [group])
-                signals.append(detected_signal)
+        event_groups = event_group_index.select_groups(event_groups, self.get_group_tags())
+        return coroutines.run_pipeline(self.signal_detector, event_groups)
 
-        return signals
+    @coroutines.coroutine
+    def signal_detector(self, target):
+        """ Coroutine receiving event groups and sending target a
+            DetectedSignal for each occurence of the group. """
+
+        try:
+            while True:
+                group = yield
+
+                if group.tag == self.group_tag:
+                    timestamp = group.trigger_log_events[0].timestamp
+                    target.send(DetectedSignal(self.tag, timestamp, [group]))
+        finally:
+            target.close()
 
 class IntervalEventSignal:
     """ Object for intervals between events rather than groups"""
@@ -121,29 +353,39 @@ class IntervalEventSignal:
         self.group_tag = group_tag
         self.start_event_tag = start_event_tag
         self.end_event_tag = end_event_tag
+
+    def get_group_tags(self):
+        return [self.group_tag]
     
     def detect_signals(self, event_groups):
         """ Loops through event groups and creates a DetectedSignal for
             the interval between each start and end event within the 
             given event group. """
 
-        signals = []
+        event_groups = event_group_index.select_groups(event_groups, self.get_group_tags())
+        return coroutines.run_pipeline(self.signal_detector, event_groups)
 
-        for group in event_groups:
-            if group.tag == self.group_tag:
-                events = group.all_log_events
-                start_time = None
+    @coroutines.coroutine
+    def signal_detector(self, target):
+        """ Coroutine receiving event groups and sending target a
+            DetectedSignal for each start and end event pair within
+            the group. """
 
-                for event in events:
-                    event_tag = event.tag
+        try:
+            while True:
+                group = yield
 
-                    if event_tag == self.start_event_tag:
-                        start_time = event.timestamp
-                    elif event_tag == self.end_event_tag and start_time is not None:
-                        end_time = event.timestamp
-                        timedelta = end_time - start_time
-                        detected_signal = DetectedSignal(self.tag, timedelta, [group])
-                        signals.append(detected_signal)
+                if group.tag == self.group_tag:
+                    start_time = None
 
-        return signals
+                    for event in group.all_log_events:
+                        event_tag = event.tag
 
+                        if event_tag == self.start_event_tag:
+                            start_time = event.timestamp
+                        elif event_tag == self.end_event_tag and start_time is not None:
+                            end_time = event.timestamp
+                            timedelta = end_time - start_time
+                            target.send(DetectedSignal(self.tag, timedelta, [group]))
+        finally:
+            target.close()
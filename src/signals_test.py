@@ -5,6 +5,7 @@ import datetime
 
 import signals
 import mocks
+from event_group_index import EventGroupIndex
 
 class SignalsTest(unittest.TestCase):
     def setUp(self):
@@ -131,5 +132,59 @@ class SignalsTest(unittest.TestCase):
 
         self.assertEqual(len(detected_signals), 3)
 
+    def test_signal_detection_from_group_index(self):
+        group_index = EventGroupIndex(self.mock_event_groups)
+
+        for signal in [signals.IntervalGroupSignal("C_T_interval_signal", "C", "T"),
+                       signals.RepeatGroupSignal("A_repeat_signal", "A"),
+                       signals.IntervalEventSignal("s_t_event_interval_signal", "C", "s", "t")]:
+            listed_signals = signal.detect_signals(self.mock_event_groups)
+            indexed_signals = signal.detect_signals(group_index)
+
+            self.assertEqual([detected_signal.groups for detected_signal in indexed_signals],
+                             [detected_signal.groups for detected_signal in listed_signals])
+
+    def test_group_index_merges_tags_in_order(self):
+        group_index = EventGroupIndex(self.mock_event_groups)
+
+        merged_groups = group_index.get_groups(["T", "C"])
+        expected_groups = [group for group in self.mock_event_groups if group.tag in ["C", "T"]]
+
+        self.assertEqual(merged_groups, expected_groups)
+        self.assertEqual(group_index.get_groups(["NOISE"]), [])
+        self.assertEqual(list(group_index), self.mock_event_groups)
+
+    def test_signal_arrays_match_detected_signals(self):
+        # Arrays need datetime timestamps, so shift the fake timestamps
+        start_time = datetime.datetime(2020, 1, 1)
+        for group in self.mock_event_groups:
+            for event in group.all_log_events:
+                event.timestamp = start_time + datetime.timedelta(seconds=event.timestamp)
+
+        for signal in [signals.IntervalGroupSignal("C_T_interval_signal", "C", "T"),
+                       signals.IntervalGroupSignal("T_C_interval_signal", "T", "C"),
+                       signals.RepeatGroupSignal("A_repeat_signal", "A")]:
+            detected_signals = signal.detect_signals(self.mock_event_groups)
+            signal_arrays = signal.detect_signal_arrays(self.mock_event_groups)
+            built_signals = [signal_arrays.build_signal(index)
+                             for index in range(len(signal_arrays))]
+
+            self.assertEqual([(detected_signal.groups, detected_signal.interval)
+                              for detected_signal in built_signals],
+                             [(detected_signal.groups, detected_signal.interval)
+                              for detected_signal in detected_signals])
+
+    def test_signal_arrays_need_datetime_timestamps(self):
+        signal = signals.RepeatGroupSignal(tag="A_repeat_signal", group_tag="A")
+        self.assertIsNone(signal.detect_signal_arrays(self.mock_event_groups))
+
+    def test_get_epoch_microseconds(self):
+        timestamp = datetime.datetime(1970, 1, 1, 0, 0, 1, 5)
+        self.assertEqual(signals.get_epoch_microseconds(timestamp), 1000005)
+
+        with self.assertRaises(Exception):
+            signals.get_epoch_microseconds(5)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,81 @@
+""" Module for memoizing the output of each stage of the LogSifter """
+
+import pickle
+
+import fingerprint
+from log_event import LogEvent
+
+# Modules whose code builds the output of each stage. The modules defining
+# the rules are left out, as the rules are fingerprinted by value.
+STAGE_MODULES = {
+    "event_groups": ("event_parser", "log_event_group", "stage_cache"),
+    "signals": ("group_parser", "event_group_index", "signal_plan", "criteria", "signals",
+                "evaluators", "signal_statistics", "symptom", "symptom_burst", "coroutines",
+                "stage_cache")
+}
+
+class StageCache:
+    """ Memo of the latest output of each stage of the LogSifter, keyed
+        by a fingerprint of the stage's input, the rules it applies and
+        the source of the modules implementing the stage.
+        A SifterBuilder keeps one for its lifetime, so rebuilding the
+        sifter after changing only a Criteria reruns only the signal
+        stage.
+
+        Attributes
+        ----------
+        stage_outputs: dict of (stage key, output) with the stage name
+                       as key """
+
+    def __init__(self):
+        self.stage_outputs = {}
+
+    def get_stage_key(self, stage_name, input_key, *rules):
+        """ Returns the key of a stage run over the input with the key
+            input_key, applying the given rules. """
+
+        source_fingerprint = fingerprint.get_source_fingerprint(STAGE_MODULES[stage_name])
+        return fingerprint.get_fingerprint(source_fingerprint, stage_name, input_key, *rules)
+
+    def load_output(self, stage_name, stage_key):
+        """ Returns the memoized output of the stage if it was last run
+            with the same key, or None. """
+
+        stage_output = self.stage_outputs.get(stage_name)
+
+        if stage_output is not None and stage_output[0] == stage_key:
+            return stage_output[1]
+        return None
+
+    def store_output(self, stage_name, stage_key, output):
+        self.stage_outputs[stage_name] = (stage_key, output)
+
+class SnapshotPickler(pickle.Pickler):
+    """ Pickler for persisting a stage output built from a LogEventTable.
+        LogEvents are written as their row in the table, so a snapshot
+        only holds what its own stage built. """
+
+    def __init__(self, snapshot_file):
+        super(SnapshotPickler, self).__init__(snapshot_file, pickle.HIGHEST_PROTOCOL)
+
+    def persistent_id(self, obj):
+        if type(obj) is LogEvent:
+            return obj.row
+        return None
+
+class SnapshotUnpickler(pickle.Unpickler):
+    """ Unpickler resolving the rows written by a SnapshotPickler against
+        the table the snapshot was taken from. """
+
+    def __init__(self, snapshot_file, log_events):
+        super(SnapshotUnpickler, self).__init__(snapshot_file)
+        self.log_events = log_events
+
+    def persistent_load(self, row):
+        return self.log_events[row]
+
+def dump_snapshot(output, snapshot_file):
+    SnapshotPickler(snapshot_file).dump(output)
+
+def load_snapshot(snapshot_file, log_events):
+    return SnapshotUnpickler(snapshot_file, log_events).load()
@@ -0,0 +1,135 @@
+""" Module for unit testing the memoization of pipeline stages """
+
+import argparse
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import criteria
+import evaluators
+import event_group_rule
+import event_rule
+import fingerprint
+import parse_cache
+import signals
+import stage_cache
+from event_parser import LogEventParser
+from log_parser import LogParser
+from log_sifter import LogSifter
+
+class StageCacheTest(unittest.TestCase):
+    """ Test suite for the stage cache """
+    def setUp(self):
+        super(StageCacheTest, self).setUp()
+
+        self.event_rules = [event_rule.EventRule("A", "(.*)(I'm a test event)(.*)")]
+        self.group_rules = [event_group_rule.EventGroupRule("test", ["A"])]
+        self.cache = stage_cache.StageCache()
+
+    def build_criterias(self, threshold_seconds):
+        return [
+            criteria.Criteria(
+                symptom_tag="Test Event",
+                signal=signals.RepeatGroupSignal(tag="test_signal", group_tag="test"),
+                evaluator=evaluators.GreaterThanEvaluator(
+                    datetime.timedelta(seconds=threshold_seconds)),
+                action_msg="Do Nothing."
+            )
+        ]
+
+    def test_key_tracks_rule_contents(self):
+        key = self.cache.get_stage_key("signals", "input", self.build_criterias(1))
+
+        self.assertEqual(self.cache.get_stage_key("signals", "input", self.build_criterias(1)),
+                         key)
+        self.assertNotEqual(self.cache.get_stage_key("signals", "input",
+                                                     self.build_criterias(2)), key)
+        self.assertNotEqual(self.cache.get_stage_key("signals", "other input",
+                                                     self.build_criterias(1)), key)
+
+    def test_key_tracks_pipeline_source(self):
+        key = self.cache.get_stage_key("signals", "input", self.build_criterias(1))
+
+        with mock.patch.object(fingerprint, "get_source_fingerprint", return_value="edited"):
+            self.assertNotEqual(self.cache.get_stage_key("signals", "input",
+                                                         self.build_criterias(1)), key)
+
+    def test_criteria_edit_reuses_parsed_stages(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        self.addCleanup(fingerprint.get_source_fingerprint.cache_clear)
+
+        # Run over a copy of the source, so a constant can be edited
+        source_dir = os.path.join(temp_dir, "source")
+        os.mkdir(source_dir)
+        for file_name in os.listdir(fingerprint.SOURCE_DIRECTORY):
+            if file_name.endswith(".py"):
+                shutil.copy(os.path.join(fingerprint.SOURCE_DIRECTORY, file_name), source_dir)
+
+        flags = argparse.Namespace(collect_statistics=False, burst_max_gap=None,
+                                   mmap=False, workers=1)
+        cache = parse_cache.ParseCache(os.path.join(temp_dir, "cache"))
+        stage_runs = []
+
+        def run_sifter(threshold_seconds):
+            # Each run starts with an empty StageCache, as a new process would
+            sifter = LogSifter("test_data/fake_logs/gsys_fake_log", self.event_rules,
+                               self.group_rules, self.build_criterias(threshold_seconds), flags)
+            sifter.parse_cache = cache
+
+            parse_log_files = sifter.parse_log_files
+            parse_log_events = sifter.parse_log_events
+            sifter.parse_log_files = lambda: stage_runs.append("events") or parse_log_files()
+            sifter.parse_log_events = lambda log_events: (stage_runs.append("event_groups")
+                                                          or parse_log_events(log_events))
+
+            return sifter.run_stages()
+
+        with mock.patch.object(fingerprint, "SOURCE_DIRECTORY", source_dir):
+            fingerprint.get_source_fingerprint.cache_clear()
+            run_sifter(1)
+            self.assertEqual(stage_runs, ["events", "event_groups"])
+
+            with open(os.path.join(source_dir, "gsys_constants.py"), "a") as constants_file:
+                constants_file.write("GSYS_SLOW_STARTUP_THRESHOLD = "
+                                     "datetime.timedelta(seconds=2)\n")
+            fingerprint.get_source_fingerprint.cache_clear()
+            group_parser = run_sifter(2)
+
+        # Only the signal stage ran again
+        self.assertEqual(stage_runs, ["events", "event_groups"])
+        self.assertEqual(group_parser.criterias[0].evaluator.threshold,
+                         datetime.timedelta(seconds=2))
+
+    def test_output_only_reused_for_same_key(self):
+        self.cache.store_output("signals", "old key", ["output"])
+
+        self.assertEqual(self.cache.load_output("signals", "old key"), ["output"])
+        self.assertIsNone(self.cache.load_output("signals", "new key"))
+        self.assertIsNone(self.cache.load_output("event_groups", "old key"))
+
+    def test_snapshot_restores_groups_over_table(self):
+        log_parser = LogParser("test_data/fake_logs/gsys_fake_log", self.event_rules)
+        log_parser.parse_log()
+        log_events = log_parser.log_events_found
+
+        event_parser = LogEventParser(log_events, self.group_rules)
+        event_parser.parse_log_events()
+        event_groups = event_parser.event_groups_found
+
+        snapshot_file = io.BytesIO()
+        stage_cache.dump_snapshot(event_groups, snapshot_file)
+        snapshot_file.seek(0)
+        restored_groups = stage_cache.load_snapshot(snapshot_file, log_events)
+
+        self.assertEqual([group.convert_to_dict() for group in restored_groups],
+                         [group.convert_to_dict() for group in event_groups])
+        self.assertIs(restored_groups[0].all_log_events[0].event_table, log_events)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -38,3 +38,11 @@ class TextGenerator:
                 print("{0} symptom detected.".format(tag))
                 print(burst.action_msg)
                 print("------------------------------------\n")
+
+    def write_symptoms(self, symptoms):
+        """ Outputs a line for each newly confirmed symptom as it is found
+            while following a live log. """
+
+        for symptom in symptoms:
+            print("[{0}] {1}: {2}".format(symptom.start_timestamp, symptom.tag,
+                                          symptom.action_msg))
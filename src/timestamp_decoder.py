@@ -0,0 +1,64 @@
+""" Module for decoding log line timestamps into epoch microseconds """
+
+import datetime
+
+EPOCH_DATE = datetime.date(1970, 1, 1)
+MICROSECONDS_PER_SECOND = 1000000
+MICROSECONDS_PER_DAY = 86400 * MICROSECONDS_PER_SECOND
+
+class TimestampDecoder:
+    """ Converts the mmdd date and hh:mm:ss.uuuuuu timestamp of a log line
+        into microseconds since the epoch using integer arithmetic, with
+        the microsecond offset of each day cached after its first use.
+
+        Log lines do not carry a year, so it is taken from the log
+        creation header. A line dated in an earlier month than the
+        header was logged after the log crossed into the next year.
+
+        Attributes
+        ----------
+        log_year: int year the log was created in
+        log_month: int month the log was created in
+        day_offsets: dictionary of epoch microseconds at the start of
+                     each day with key of the mmdd date string """
+
+    def __init__(self, log_year, log_month=1):
+        self.log_year = log_year
+        self.log_month = log_month
+        self.day_offsets = {}
+
+    def decode(self, date_str, time_str):
+        """ Returns the epoch microseconds of a "mmdd" date string and a
+            "hh:mm:ss.uuuuuu" time string. """
+
+        day_offset = self.day_offsets.get(date_str)
+        if day_offset is None:
+            day_offset = self.get_day_offset(date_str)
+
+        seconds = (int(time_str[0:2]) * 3600
+                   + int(time_str[3:5]) * 60
+                   + int(time_str[6:8]))
+
+        return day_offset + seconds * MICROSECONDS_PER_SECOND + int(time_str[9:15])
+
+    def get_day_offset(self, date_str):
+        """ Computes and caches the epoch microseconds at the start of the
+            day given by a "mmdd" date string. """
+
+        if self.log_year is None:
+            raise Exception("Log creation year is unknown. The log must start "
+                            "with a \"Log file created at:\" line.")
+
+        month = int(date_str[:2])
+        day = int(date_str[2:])
+
+        # Handle the December to January rollover of long running logs
+        year = self.log_year
+        if month < self.log_month:
+            year += 1
+
+        days = (datetime.date(year, month, day) - EPOCH_DATE).days
+        day_offset = days * MICROSECONDS_PER_DAY
+
+        self.day_offsets[date_str] = day_offset
+        return day_offset
@@ -0,0 +1,47 @@
+""" Module for unit testing the log timestamp decoder """
+
+import datetime
+import unittest
+
+import timestamp_decoder
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+class TimestampDecoderTest(unittest.TestCase):
+    """ Test suite for the timestamp decoder """
+    def setUp(self):
+        super(TimestampDecoderTest, self).setUp()
+
+        self.decoder = timestamp_decoder.TimestampDecoder(2019, 12)
+
+    def get_datetime(self, timestamp_us):
+        return EPOCH + datetime.timedelta(microseconds=timestamp_us)
+
+    def test_decode(self):
+        timestamp_us = self.decoder.decode("1231", "23:59:58.123456")
+        expected_timestamp = datetime.datetime(2019, 12, 31, 23, 59, 58, 123456)
+
+        self.assertEqual(self.get_datetime(timestamp_us), expected_timestamp)
+
+    def test_decode_year_rollover(self):
+        before_rollover = self.decoder.decode("1231", "23:59:59.999999")
+        after_rollover = self.decoder.decode("0101", "00:00:00.000000")
+
+        self.assertEqual(self.get_datetime(after_rollover), datetime.datetime(2020, 1, 1))
+        self.assertEqual(after_rollover - before_rollover, 1)
+
+    def test_day_offsets_are_cached(self):
+        self.decoder.decode("1231", "00:00:00.000000")
+        self.decoder.decode("1231", "12:00:00.000000")
+
+        self.assertEqual(list(self.decoder.day_offsets.keys()), ["1231"])
+
+    def test_decode_without_year(self):
+        decoder = timestamp_decoder.TimestampDecoder(None)
+
+        with self.assertRaises(Exception):
+            decoder.decode("0101", "00:00:00.000000")
+
+
+if __name__ == "__main__":
+    unittest.main()